@@ -0,0 +1,6 @@
+"""
+Benchmarks for the pokemon_env hot paths.
+
+Run `python -m benchmarks.run_benchmarks` to time them against recorded or
+synthetic emulator fixtures; see benchmarks/README.md.
+"""
@@ -0,0 +1,318 @@
+"""
+Recorded emulator fixtures for running pokemon_env code without a ROM.
+
+A fixture is a snapshot of everything the environment reads from PyBoy: the full
+address space, the game area / collision / background tilemaps, the 40 OAM
+sprites and the screen. FixturePyBoy serves a snapshot through the subset of the
+PyBoy API that Emulator uses, so `Emulator(None, pyboy=load_fixture(path))`
+behaves like an emulator frozen at the recorded frame.
+
+Record a fixture from a real game (requires the ROM):
+
+    python -m benchmarks.fixtures --rom Pokemon_Red.gb --state my.state --output benchmarks/fixtures/my.npz
+
+When no recorded fixture is available, synthetic_fixture() builds a plausible
+overworld state with a party, an inventory and an open text box.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from pokemon_env.memory_reader import Move, Pokemon, PokemonType
+
+MEMORY_SIZE = 0x10000
+SCREEN_SHAPE = (144, 160, 4)
+TILEMAP_SHAPE = (18, 20)
+SPRITE_COUNT = 40
+
+
+class FixtureMemory:
+    """Byte-addressable memory with PyBoy's indexing semantics (slices return lists)."""
+
+    def __init__(self, data: bytes):
+        self._data = bytearray(data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(self._data[key])
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            self._data[key] = bytes(value)
+        else:
+            self._data[key] = value
+
+    def tobytes(self) -> bytes:
+        """Return a copy of the whole address space."""
+        return bytes(self._data)
+
+    def load(self, data: bytes) -> None:
+        """Replace the contents in place, so everything holding this memory sees them."""
+        self._data[:] = data
+
+
+class FixtureSprite:
+    """An OAM entry as returned by PyBoy.get_sprite."""
+
+    def __init__(self, x: int, y: int, on_screen: bool):
+        self.x = x
+        self.y = y
+        self.on_screen = on_screen
+
+
+class FixtureScreen:
+    """Screen buffer as exposed by PyBoy.screen."""
+
+    def __init__(self, ndarray: np.ndarray):
+        self.ndarray = ndarray
+
+
+class FixtureGameWrapper:
+    """Serves the recorded tilemaps in place of PyBoy's Pokemon Gen 1 game wrapper."""
+
+    def __init__(self, game_area: np.ndarray, collision: np.ndarray, background: np.ndarray):
+        self._game_area = game_area
+        self._collision = collision
+        self._background = background
+
+    def game_area(self) -> np.ndarray:
+        return self._game_area.copy()
+
+    def game_area_collision(self) -> np.ndarray:
+        return self._collision.copy()
+
+    def _get_screen_background_tilemap(self) -> np.ndarray:
+        return self._background.copy()
+
+
+class FixturePyBoy:
+    """A PyBoy stand-in frozen at a recorded frame; ticks and button presses change nothing."""
+
+    def __init__(self, memory: bytes, game_area: np.ndarray, collision: np.ndarray,
+                 background: np.ndarray, sprites: np.ndarray, screen: np.ndarray):
+        self.memory = FixtureMemory(memory)
+        self.game_wrapper = FixtureGameWrapper(game_area, collision, background)
+        self.screen = FixtureScreen(screen)
+        self._sprites = [FixtureSprite(int(x), int(y), bool(on_screen)) for x, y, on_screen in sprites]
+
+    def tick(self, count: int = 1, render: bool = True) -> bool:
+        return True
+
+    def button_press(self, button: str) -> None:
+        pass
+
+    def button_release(self, button: str) -> None:
+        pass
+
+    def set_emulation_speed(self, speed: int) -> None:
+        pass
+
+    def get_sprite(self, index: int) -> FixtureSprite:
+        return self._sprites[index]
+
+    def save_state(self, file_like) -> None:
+        file_like.write(self.memory.tobytes())
+
+    def load_state(self, file_like) -> None:
+        # Watchers, recorders and differs keep a reference to the memory object
+        self.memory.load(file_like.read())
+
+    def stop(self, save: bool = True) -> None:
+        pass
+
+
+def record_fixture(pyboy, path: str) -> None:
+    """
+    Snapshot everything the environment reads from a live PyBoy into an .npz file.
+
+    Args:
+        pyboy: A running PyBoy instance with the Pokemon Gen 1 game wrapper
+        path: Output path of the fixture
+    """
+    wrapper = pyboy.game_wrapper
+    sprites = []
+    for i in range(SPRITE_COUNT):
+        sprite = pyboy.get_sprite(i)
+        sprites.append((sprite.x, sprite.y, int(sprite.on_screen)))
+
+    np.savez_compressed(
+        path,
+        memory=np.frombuffer(bytes(pyboy.memory[0:MEMORY_SIZE]), dtype=np.uint8),
+        game_area=np.asarray(wrapper.game_area(), dtype=np.uint32),
+        collision=np.asarray(wrapper.game_area_collision(), dtype=np.uint32),
+        background=np.asarray(wrapper._get_screen_background_tilemap(), dtype=np.uint32),
+        sprites=np.asarray(sprites, dtype=np.int32),
+        screen=np.asarray(pyboy.screen.ndarray, dtype=np.uint8),
+    )
+
+
+def load_fixture(path: str) -> FixturePyBoy:
+    """Load a fixture written by record_fixture."""
+    with np.load(path) as data:
+        return FixturePyBoy(
+            memory=data["memory"].tobytes(),
+            game_area=data["game_area"],
+            collision=data["collision"],
+            background=data["background"],
+            sprites=data["sprites"],
+            screen=data["screen"],
+        )
+
+
+def encode_text(text: str) -> List[int]:
+    """Encode ASCII text in the game's character set, terminated by 0x50."""
+    encoded = []
+    for char in text:
+        if "A" <= char <= "Z":
+            encoded.append(0x80 + ord(char) - ord("A"))
+        elif "a" <= char <= "z":
+            encoded.append(0xA0 + ord(char) - ord("a"))
+        elif "0" <= char <= "9":
+            encoded.append(0xF6 + ord(char) - ord("0"))
+        elif char == "!":
+            encoded.append(0xE7)
+        elif char == ".":
+            encoded.append(0xE8)
+        elif char == ",":
+            encoded.append(0xF4)
+        else:
+            encoded.append(0x7F)
+    return encoded + [0x50]
+
+
+def _write_party(memory: bytearray, party: List[Tuple[Pokemon, int, Tuple[PokemonType, PokemonType], List[Move]]]) -> None:
+    """Write party Pokemon structures and nicknames into memory."""
+    base_addresses = [0xD16B, 0xD197, 0xD1C3, 0xD1EF, 0xD21B, 0xD247]
+    nickname_addresses = [0xD2B5, 0xD2C0, 0xD2CB, 0xD2D6, 0xD2E1, 0xD2EC]
+
+    memory[0xD163] = len(party)
+    for i, (species, level, (type1, type2), moves) in enumerate(party):
+        memory[0xD164 + i] = species
+        addr = base_addresses[i]
+        max_hp = 10 + level * 3
+        memory[addr] = species
+        memory[addr + 1:addr + 3] = (max_hp - 2).to_bytes(2, "big")
+        memory[addr + 3] = level
+        memory[addr + 5] = type1
+        memory[addr + 6] = type2
+        for j, move in enumerate(moves):
+            memory[addr + 8 + j] = move
+            memory[addr + 0x1D + j] = 20
+        memory[addr + 12:addr + 14] = (12345).to_bytes(2, "big")
+        memory[addr + 0x1A:addr + 0x1D] = (level ** 3).to_bytes(3, "big")
+        memory[addr + 0x21] = level
+        memory[addr + 0x22:addr + 0x24] = max_hp.to_bytes(2, "big")
+        nickname = encode_text(species.name)
+        memory[nickname_addresses[i]:nickname_addresses[i] + len(nickname)] = bytes(nickname)
+    memory[0xD164 + len(party)] = 0xFF
+
+
+def _write_text_box(memory: bytearray, lines: List[str]) -> None:
+    """Draw the standard bottom text box into the tilemap buffer at 0xC3A0."""
+    tilemap = 0xC3A0
+    for row in range(12, 18):
+        for col in range(20):
+            if row in (12, 17):
+                tile = 0x7A
+                if col == 0:
+                    tile = 0x79 if row == 12 else 0x7D
+                elif col == 19:
+                    tile = 0x7B if row == 12 else 0x7E
+            else:
+                tile = 0x7C if col in (0, 19) else 0x7F
+            memory[tilemap + row * 20 + col] = tile
+    for line_number, line in enumerate(lines):
+        encoded = encode_text(line)[:-1][:18]
+        start = tilemap + (14 + 2 * line_number) * 20 + 1
+        memory[start:start + len(encoded)] = bytes(encoded)
+
+
+def synthetic_fixture(seed: int = 0) -> FixturePyBoy:
+    """
+    Build a plausible overworld fixture without a ROM.
+
+    The state has a named player and rival, money, one badge, three party
+    Pokemon, a small inventory, an open two-line text box, an NPC sprite next to
+    the player and a collision map with walls to route around.
+    """
+    rng = np.random.default_rng(seed)
+    memory = bytearray(MEMORY_SIZE)
+
+    # Overworld tiles behind the text box
+    memory[0xC3A0:0xC3A0 + 12 * 20] = bytes(rng.integers(0x00, 0x40, 12 * 20, dtype=np.uint8))
+    _write_text_box(memory, ["Hello there!", "Glad to meet you!"])
+
+    name = encode_text("RED")
+    memory[0xD158:0xD158 + len(name)] = bytes(name)
+    rival = encode_text("BLUE")
+    memory[0xD34A:0xD34A + len(rival)] = bytes(rival)
+    memory[0xD347:0xD34A] = bytes([0x00, 0x30, 0x00])  # 3000 in BCD
+    memory[0xD356] = 0b00000001  # Boulder badge
+    memory[0xD35E] = 0x01  # Viridian City
+    memory[0xD367] = 0x00  # Overworld tileset
+    memory[0xD361] = 10
+    memory[0xD362] = 12
+
+    _write_party(memory, [
+        (Pokemon.CHARMANDER, 14, (PokemonType.FIRE, PokemonType.FIRE),
+         [Move.SCRATCH, Move.GROWL, Move.EMBER]),
+        (Pokemon.PIDGEY, 9, (PokemonType.NORMAL, PokemonType.FLYING),
+         [Move.TACKLE, Move.SAND_ATTACK, Move.GUST]),
+        (Pokemon.RATTATA, 7, (PokemonType.NORMAL, PokemonType.NORMAL),
+         [Move.TACKLE, Move.TAIL_WHIP, Move.QUICK_ATTACK]),
+    ])
+
+    items = [(0x04, 5), (0x14, 3), (0x0B, 1), (0x46, 1)]
+    memory[0xD31D] = len(items)
+    for i, (item_id, quantity) in enumerate(items):
+        memory[0xD31E + i * 2] = item_id
+        memory[0xD31F + i * 2] = quantity
+    memory[0xD31E + len(items) * 2] = 0xFF
+
+    # Game area with the player facing down at the centre of the screen
+    game_area = rng.integers(300, 380, TILEMAP_SHAPE, dtype=np.uint32)
+    game_area[8:10, 8:10] = [[0, 1], [2, 3]]
+
+    # Walkable everywhere except a wall segment above and to the right of the player
+    walkable = np.ones((9, 10), dtype=np.uint32)
+    walkable[0, :] = 0
+    walkable[2, 2:8] = 0
+    walkable[3:7, 6] = 0
+    collision = np.kron(walkable, np.ones((2, 2), dtype=np.uint32))
+
+    background = rng.integers(256, 384, TILEMAP_SHAPE, dtype=np.uint32)
+
+    sprites = np.zeros((SPRITE_COUNT, 3), dtype=np.int32)
+    # Player (two rows of two 8x8 sprites) and one NPC two tiles to the left
+    for i, (x, y) in enumerate([(64, 64), (72, 64), (64, 72), (72, 72),
+                                (32, 64), (40, 64), (32, 72), (40, 72)]):
+        sprites[i] = (x, y, 1)
+
+    screen = rng.integers(0, 256, SCREEN_SHAPE, dtype=np.uint8)
+    screen[:, :, 3] = 255
+
+    return FixturePyBoy(bytes(memory), game_area, collision, background, sprites, screen)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from pokemon_env.emulator import Emulator
+
+    parser = argparse.ArgumentParser(description="Record an emulator fixture for benchmarks")
+    parser.add_argument("--rom", default="Pokemon_Red.gb", help="Path to the Pokemon ROM file")
+    parser.add_argument("--state", help="State file to load before recording (default: fresh boot)")
+    parser.add_argument("--output", required=True, help="Output .npz path")
+
+    args = parser.parse_args()
+
+    emulator = Emulator(args.rom, headless=True)
+    emulator.initialize()
+    if args.state:
+        emulator.load_state(args.state)
+        emulator.tick(1)
+    record_fixture(emulator.pyboy, args.output)
+    emulator.stop()
+    print(f"Fixture written to {args.output}")
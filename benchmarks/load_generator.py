@@ -0,0 +1,289 @@
+"""
+Load generator for the evaluator server.
+
+Runs many synthetic agents against server/evaluator_server.py over HTTP and
+reports the request rate, per-endpoint latency percentiles and error rate at
+each concurrency level. Agents either press random buttons or replay a fixed
+script; a fraction of their requests can be reads (/status, /evaluate, /metrics).
+
+The server hosts one game session, so all agents share it: higher concurrency
+measures how the server holds up when requests queue behind each other.
+
+    # Against a running server
+    python -m benchmarks.load_generator --url http://localhost:8080 --concurrency 1 2 4 8
+
+    # Without the ROM: start a stub-emulator server on a free port for the run
+    python -m benchmarks.load_generator --stub --concurrency 1 4 16 --duration 20
+"""
+
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+BUTTONS = ["a", "b", "start", "select", "up", "down", "left", "right"]
+
+# A short loop of overworld and menu inputs, similar to what an agent sends
+SCRIPT = [
+    {"action_type": "press_key", "keys": ["a"]},
+    {"action_type": "press_key", "keys": ["up", "up"]},
+    {"action_type": "press_key", "keys": ["right"]},
+    {"action_type": "wait", "frames": 30},
+    {"action_type": "press_key", "keys": ["start"]},
+    {"action_type": "press_key", "keys": ["down", "a"]},
+    {"action_type": "press_key", "keys": ["b", "b"]},
+    {"action_type": "press_key", "keys": ["left", "down"]},
+]
+
+READ_ENDPOINTS = ["/status", "/evaluate", "/metrics"]
+
+
+class SyntheticAgent:
+    """Produces the request sequence of one simulated client."""
+
+    def __init__(self, policy: str, read_ratio: float, seed: int, include_timings: bool = False):
+        """
+        Create an agent.
+
+        Args:
+            policy: "random" for random button presses and waits, "scripted" to loop over SCRIPT
+            read_ratio: Fraction of requests that are reads instead of actions
+            seed: Seed for this agent's random choices
+            include_timings: Ask the server for its per-phase timing breakdown
+        """
+        if policy not in ("random", "scripted"):
+            raise ValueError(f"Unknown policy: {policy}")
+        self.policy = policy
+        self.read_ratio = read_ratio
+        self.include_timings = include_timings
+        self.rng = random.Random(seed)
+        self.script_position = self.rng.randrange(len(SCRIPT))
+
+    def next_request(self) -> Tuple[str, str, Optional[Dict]]:
+        """Return the method, endpoint and JSON body of the next request."""
+        if self.rng.random() < self.read_ratio:
+            return "GET", self.rng.choice(READ_ENDPOINTS), None
+
+        if self.policy == "scripted":
+            body = dict(SCRIPT[self.script_position])
+            self.script_position = (self.script_position + 1) % len(SCRIPT)
+        elif self.rng.random() < 0.85:
+            keys = [self.rng.choice(BUTTONS) for _ in range(self.rng.randint(1, 3))]
+            body = {"action_type": "press_key", "keys": keys}
+        else:
+            body = {"action_type": "wait", "frames": self.rng.randint(1, 60)}
+
+        if self.include_timings:
+            body["include_timings"] = True
+        return "POST", "/action", body
+
+
+class EndpointStats:
+    """Latencies and failures recorded for one endpoint during a stage."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+            if not ok:
+                self.errors += 1
+
+    def summary(self, duration: float) -> Dict[str, float]:
+        """Summarise the stage: request rate, latency percentiles in seconds and error rate."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            errors = self.errors
+        count = len(latencies)
+        return {
+            "requests": count,
+            "requests_per_sec": count / duration if duration > 0 else 0.0,
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0,
+            "errors": errors,
+            "error_rate": errors / count if count else 0.0,
+        }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _client_loop(base_url: str, agent: SyntheticAgent, deadline: float, timeout: float,
+                 stats: Dict[str, EndpointStats], stats_lock: threading.Lock) -> None:
+    """Send requests from one agent until the deadline, recording every outcome."""
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        method, endpoint, body = agent.next_request()
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base_url + endpoint, json=body, timeout=timeout)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        latency = time.perf_counter() - start
+
+        with stats_lock:
+            endpoint_stats = stats.setdefault(endpoint, EndpointStats())
+        endpoint_stats.record(latency, ok)
+    session.close()
+
+
+def run_stage(base_url: str, concurrency: int, duration: float, policy: str, read_ratio: float,
+              seed: int = 0, timeout: float = 30.0, include_timings: bool = False) -> Dict:
+    """
+    Run one concurrency level for a fixed duration.
+
+    Args:
+        base_url: Server URL, e.g. http://localhost:8080
+        concurrency: Number of simultaneous clients
+        duration: Seconds to generate load for
+        policy: Agent policy, "random" or "scripted"
+        read_ratio: Fraction of requests that are reads
+        seed: Base seed; client i uses seed + i
+        timeout: Per-request timeout in seconds
+        include_timings: Ask the server for its per-phase timing breakdown
+
+    Returns:
+        Stage summary with per-endpoint and total statistics
+    """
+    stats: Dict[str, EndpointStats] = {}
+    stats_lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    threads = []
+    for i in range(concurrency):
+        agent = SyntheticAgent(policy, read_ratio, seed + i, include_timings)
+        thread = threading.Thread(target=_client_loop, daemon=True,
+                                  args=(base_url, agent, deadline, timeout, stats, stats_lock))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        for latency in endpoint_stats.latencies:
+            total.record(latency, True)
+        total.errors += endpoint_stats.errors
+
+    return {
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "endpoints": {endpoint: s.summary(elapsed) for endpoint, s in sorted(stats.items())},
+        "total": total.summary(elapsed),
+    }
+
+
+def print_stage(stage: Dict) -> None:
+    """Print one stage as a table, latencies in milliseconds."""
+    print(f"\nconcurrency={stage['concurrency']}  ({stage['duration']:.1f}s)")
+    print(f"{'endpoint':<12}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    rows = list(stage["endpoints"].items()) + [("total", stage["total"])]
+    for endpoint, s in rows:
+        print(f"{endpoint:<12}{s['requests']:>10}{s['requests_per_sec']:>10.1f}"
+              f"{s['p50'] * 1000:>10.1f}{s['p90'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}{s['error_rate']:>9.1%}")
+
+
+def wait_for_server(base_url: str, timeout: float = 30.0) -> None:
+    """Poll /status until the server answers or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(base_url + "/status", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not come up within {timeout}s")
+
+
+def start_stub_server(port: int, fixture: Optional[str] = None) -> subprocess.Popen:
+    """Start evaluator_server with the stub emulator in a subprocess."""
+    command = [sys.executable, "-m", "server.evaluator_server", "--host", "127.0.0.1",
+               "--port", str(port), "--stub"]
+    if fixture:
+        command += ["--stub-fixture", fixture]
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(command, cwd=repo_root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drive the evaluator server with synthetic agents")
+    parser.add_argument("--url", default="http://localhost:8080", help="Server URL")
+    parser.add_argument("--stub", action="store_true",
+                        help="Start a stub-emulator server (no ROM needed) for the run instead of using --url")
+    parser.add_argument("--stub-fixture", help="Recorded fixture for the stub server (default: synthetic state)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Concurrency levels to run, in order")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--policy", choices=["random", "scripted"], default="random", help="Agent policy")
+    parser.add_argument("--read-ratio", type=float, default=0.1,
+                        help="Fraction of requests that are /status, /evaluate or /metrics reads")
+    parser.add_argument("--include-timings", action="store_true",
+                        help="Request the per-phase timing breakdown with every action")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--no-initialize", action="store_true",
+                        help="Use the server's current session instead of initializing a new one")
+    parser.add_argument("--output", help="Save all stage results as JSON")
+
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url.rstrip("/")
+    if args.stub or args.stub_fixture:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_stub_server(port, args.stub_fixture)
+
+    try:
+        wait_for_server(base_url)
+        if not args.no_initialize:
+            response = requests.post(base_url + "/initialize", json={"headless": True}, timeout=300)
+            response.raise_for_status()
+
+        stages = []
+        for concurrency in args.concurrency:
+            stage = run_stage(base_url, concurrency, args.duration, args.policy, args.read_ratio,
+                              seed=args.seed, timeout=args.timeout, include_timings=args.include_timings)
+            print_stage(stage)
+            stages.append(stage)
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"url": base_url, "policy": args.policy, "read_ratio": args.read_ratio,
+                           "stub": server is not None, "stages": stages}, f, indent=2)
+            print(f"\nResults saved to {args.output}")
+    finally:
+        if server is not None:
+            try:
+                requests.post(base_url + "/stop", timeout=30)
+            except requests.RequestException:
+                pass
+            server.terminate()
+            server.wait()
@@ -0,0 +1,241 @@
+"""
+Micro-benchmarks for the pokemon_env and evaluator hot paths.
+
+Each benchmark runs against an emulator fixture (see benchmarks/fixtures.py), so
+no ROM is needed. Results report ops/sec and per-call latency percentiles, can be
+saved as JSON, and can be compared against a stored baseline to flag regressions.
+
+    python -m benchmarks.run_benchmarks --output results.json
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+
+from benchmarks.fixtures import FixturePyBoy, load_fixture, synthetic_fixture
+from evaluator.evaluate import PokemonEvaluator
+from pokemon_env.emulator import STATE_SECTIONS, Emulator
+from pokemon_env.environment import GameState
+from pokemon_env.events import EventRecorder
+from pokemon_env.memory_reader import PokemonRedReader
+from pokemon_env.readiness import InputReadyDetector
+from pokemon_env.wram_diff import WramDiffer
+
+# Minimum duration of one timed sample; fast calls are repeated until a sample takes this long
+MIN_SAMPLE_SECONDS = 0.002
+
+
+def build_benchmarks(pyboy: FixturePyBoy) -> Dict[str, Callable[[], object]]:
+    """
+    Create the benchmarked calls, all bound to the given fixture.
+
+    Args:
+        pyboy: Fixture the emulator and memory reader read from
+
+    Returns:
+        Mapping of benchmark name to a zero-argument callable
+    """
+    emulator = Emulator(None, pyboy=pyboy)
+    reader = PokemonRedReader(pyboy.memory)
+
+    memory_info = emulator.get_state_from_memory()
+    player = memory_info["player"]
+    state = GameState(
+        player_name=player["name"],
+        rival_name=player["rival_name"],
+        money=player["money"],
+        location=player["location"],
+        coordinates=player["coordinates"],
+        badges=player["badges"],
+        valid_moves=memory_info["valid_moves"],
+        inventory=memory_info["inventory"],
+        dialog=memory_info["dialog"],
+        pokemons=memory_info["pokemons"],
+        screenshot=Image.fromarray(pyboy.screen.ndarray),
+    )
+    row = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "step_number": "1",
+        "badges": str(state.badges),
+        "location": state.location,
+        "pokemons": str(state.pokemons),
+    }
+    evaluator = PokemonEvaluator(verbose=False)
+    recorder = EventRecorder(pyboy.memory)
+    differ = WramDiffer(pyboy.memory)
+
+    def get_state_from_memory_uncached():
+        # The fixture never changes, so every section would come from the cache; flip the
+        # last byte of each section's range to make every section decode again
+        for start, end in STATE_SECTIONS.values():
+            pyboy.memory[end - 1] ^= 1
+        return emulator.get_state_from_memory()
+
+    return {
+        "reader.read_dialog": reader.read_dialog,
+        "reader.read_party_pokemon": reader.read_party_pokemon,
+        "reader.read_items": reader.read_items,
+        "reader.read_observation": reader.read_observation,
+        "readiness.update": InputReadyDetector(pyboy.memory).update,
+        "events.sample": lambda: recorder.sample(0),
+        "wram_diff.diff": differ.diff,
+        "emulator.get_collision_map": emulator.get_collision_map,
+        "emulator.get_sprites": emulator.get_sprites,
+        "emulator.find_path": lambda: emulator.find_path(0, 9),
+        "emulator.get_state_from_memory": emulator.get_state_from_memory,
+        "emulator.get_state_from_memory_uncached": get_state_from_memory_uncached,
+        "game_state.screenshot_base64": lambda: state.screenshot_base64,
+        "evaluator.evaluate_row": lambda: evaluator.evaluate_row(row),
+    }
+
+
+def time_benchmark(func: Callable[[], object], samples: int) -> Dict[str, float]:
+    """
+    Time a callable and summarise its per-call latency.
+
+    Args:
+        func: Zero-argument callable to time
+        samples: Number of timed samples to collect
+
+    Returns:
+        ops/sec, mean and percentile latencies in seconds, and the sampling parameters
+    """
+    # Calibrate how many calls make up one sample
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS or number >= 1 << 20:
+            break
+        number *= 2
+
+    per_call = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - start) / number)
+
+    per_call.sort()
+    mean = statistics.fmean(per_call)
+
+    def percentile(fraction: float) -> float:
+        return per_call[min(len(per_call) - 1, int(fraction * len(per_call)))]
+
+    return {
+        "ops_per_sec": 1.0 / mean if mean > 0 else float("inf"),
+        "mean": mean,
+        "p50": percentile(0.50),
+        "p90": percentile(0.90),
+        "p99": percentile(0.99),
+        "samples": samples,
+        "calls_per_sample": number,
+    }
+
+
+def run_benchmarks(pyboy: FixturePyBoy, samples: int, only: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark (or those whose name contains one of `only`) and print a table."""
+    results = {}
+    print(f"{'benchmark':<42}{'ops/sec':>12}{'p50':>12}{'p90':>12}{'p99':>12}")
+    for name, func in build_benchmarks(pyboy).items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        result = time_benchmark(func, samples)
+        results[name] = result
+        print(f"{name:<42}{result['ops_per_sec']:>12.1f}"
+              f"{result['p50'] * 1e6:>10.1f}us{result['p90'] * 1e6:>10.1f}us{result['p99'] * 1e6:>10.1f}us")
+    return results
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, float]], baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compare median latencies against a baseline run.
+
+    Args:
+        results: Results of the current run
+        baseline: Contents of a saved results file
+        threshold: Allowed relative slowdown of the median, e.g. 0.2 for 20%
+
+    Returns:
+        Names of the benchmarks that regressed
+    """
+    regressions = []
+    print(f"\n{'benchmark':<42}{'baseline p50':>14}{'current p50':>14}{'change':>10}")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<42}{'-':>14}{result['p50'] * 1e6:>12.1f}us{'new':>10}")
+            continue
+        change = result["p50"] / base["p50"] - 1.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<42}{base['p50'] * 1e6:>12.1f}us{result['p50'] * 1e6:>12.1f}us{change:>+9.1%}{flag}")
+    return regressions
+
+
+def save_results(path: str, results: Dict[str, Dict[str, float]], fixture: str) -> None:
+    """Save results together with enough metadata to judge whether two runs are comparable."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.datetime.now().isoformat(),
+                "fixture": fixture,
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run pokemon_env micro-benchmarks against emulator fixtures")
+    parser.add_argument("--fixture", help="Recorded .npz fixture (default: synthetic overworld state)")
+    parser.add_argument("--samples", type=int, default=50, help="Timed samples per benchmark")
+    parser.add_argument("--only", nargs="*", help="Only run benchmarks whose name contains one of these")
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--save-baseline", help="Save results as the baseline for later comparisons")
+    parser.add_argument("--baseline", help="Compare against a saved baseline and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative slowdown of the median before flagging a regression")
+
+    args = parser.parse_args()
+
+    pyboy = load_fixture(args.fixture) if args.fixture else synthetic_fixture()
+    fixture_name = os.path.basename(args.fixture) if args.fixture else "synthetic"
+
+    results = run_benchmarks(pyboy, args.samples, args.only)
+
+    if args.output:
+        save_results(args.output, results, fixture_name)
+    if args.save_baseline:
+        save_results(args.save_baseline, results, fixture_name)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("fixture") != fixture_name:
+            print(f"Warning: baseline was recorded with fixture {baseline.get('meta', {}).get('fixture')}")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
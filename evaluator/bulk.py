@@ -0,0 +1,238 @@
+"""
+Bulk evaluation of many recorded gameplay sessions.
+
+Scores every session's gameplay_data.csv in a process pool, writes a per-session
+evaluation_result.json and an aggregated leaderboard. Results are cached by log
+size, modification time and a hash of the milestone ratings and scoring version,
+so re-running after a change to milestones.py or to the scoring logic re-scores
+everything while an unchanged archive is free.
+"""
+
+import csv
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .evaluate import SCORING_VERSION, PokemonEvaluator
+from .milestones import pokemon_difficulty_ratings_refined, badge_difficulty_ratings, location_scores_by_name
+
+SESSION_LOG_FILENAME = "gameplay_data.csv"
+RESULT_FILENAME = "evaluation_result.json"
+DEFAULT_CACHE_FILENAME = ".bulk_evaluation_cache.json"
+
+LEADERBOARD_FIELDS = ['rank', 'session', 'total_score', 'pokemon_count', 'badges_count',
+                      'locations_count', 'steps', 'csv_path']
+
+
+def ratings_fingerprint():
+    """Hash of the milestone ratings and scoring version, so cached results are invalidated when scores change"""
+    ratings = {
+        "scoring_version": SCORING_VERSION,
+        "pokemon": pokemon_difficulty_ratings_refined,
+        "badges": badge_difficulty_ratings,
+        "locations": location_scores_by_name,
+    }
+    payload = json.dumps(ratings, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+def find_session_logs(pattern):
+    """
+    Resolve a session directory, a directory of sessions or a glob into CSV log paths
+
+    Args:
+        pattern (str): Session directory, directory containing sessions, or glob
+            matching session directories or CSV files
+
+    Returns:
+        list[str]: Sorted paths to gameplay CSV files
+    """
+    if os.path.isdir(pattern):
+        own_log = os.path.join(pattern, SESSION_LOG_FILENAME)
+        if os.path.exists(own_log):
+            return [own_log]
+        candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        candidates = glob.glob(pattern)
+
+    # Stray CSVs (e.g. a previous leaderboard) are only picked up when the glob asks for CSVs
+    accept_any_csv = pattern.endswith(".csv")
+
+    csv_paths = []
+    for path in candidates:
+        if os.path.isdir(path):
+            path = os.path.join(path, SESSION_LOG_FILENAME)
+        elif not (accept_any_csv and path.endswith(".csv")):
+            continue
+        if os.path.isfile(path):
+            csv_paths.append(path)
+    return sorted(csv_paths)
+
+
+def evaluate_session(csv_path):
+    """
+    Score a single session log; runs inside a worker process
+
+    Args:
+        csv_path (str): Path to the session's gameplay CSV file
+
+    Returns:
+        dict: Evaluation result for the session
+    """
+    evaluator = PokemonEvaluator(verbose=False)
+    steps = 0
+    with open(csv_path, 'r', newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            evaluator.evaluate_row(row)
+            # Step numbers restart with each resumed segment, so count the action rows instead
+            if row.get('action_type') != 'initialize':
+                steps += 1
+
+    return {
+        "session": os.path.basename(os.path.dirname(os.path.abspath(csv_path))),
+        "csv_path": csv_path,
+        "total_score": evaluator.total_score,
+        "pokemon_count": len(evaluator.pokemon_seen),
+        "badges_count": len(evaluator.badges_earned),
+        "locations_count": len(evaluator.locations_visited),
+        "steps": steps,
+        "pokemon": sorted(evaluator.pokemon_seen),
+        "badges": sorted(evaluator.badges_earned),
+        "locations": sorted(evaluator.locations_visited),
+    }
+
+
+def _load_cache(cache_path):
+    """Load the result cache, returning an empty cache if it is missing or unreadable"""
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path, cache):
+    """Write the result cache atomically"""
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cache_path)
+
+
+def _log_signature(csv_path, fingerprint):
+    """Signature identifying an unchanged log scored with unchanged ratings"""
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "ratings": fingerprint}
+
+
+def evaluate_sessions(csv_paths, workers=None, cache_path=None, write_results=True):
+    """
+    Evaluate many session logs in parallel, reusing cached results for unchanged logs
+
+    Args:
+        csv_paths (list[str]): Paths to gameplay CSV files
+        workers (int): Number of worker processes (default: number of CPUs)
+        cache_path (str): Path of the result cache file, or None to disable caching
+        write_results (bool): Whether to write evaluation_result.json into each session directory
+
+    Returns:
+        list[dict]: Evaluation results sorted by descending score
+    """
+    fingerprint = ratings_fingerprint()
+    cache = _load_cache(cache_path) if cache_path else {}
+
+    results = []
+    pending = []
+    for csv_path in csv_paths:
+        key = os.path.abspath(csv_path)
+        entry = cache.get(key)
+        if entry and entry.get("signature") == _log_signature(csv_path, fingerprint):
+            results.append(entry["result"])
+        else:
+            pending.append(csv_path)
+
+    print(f"Evaluating {len(pending)} session(s), {len(results)} unchanged session(s) from cache")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(evaluate_session, csv_path): csv_path for csv_path in pending}
+            for future in as_completed(futures):
+                csv_path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error evaluating {csv_path}: {e}")
+                    continue
+
+                results.append(result)
+                cache[os.path.abspath(csv_path)] = {
+                    "signature": _log_signature(csv_path, fingerprint),
+                    "result": result,
+                }
+                if write_results:
+                    result_path = os.path.join(os.path.dirname(csv_path), RESULT_FILENAME)
+                    with open(result_path, 'w') as f:
+                        json.dump(result, f, indent=2)
+
+    if cache_path:
+        _save_cache(cache_path, cache)
+
+    results.sort(key=lambda result: (-result["total_score"], result["session"]))
+    return results
+
+
+def write_leaderboard(results, output_path):
+    """
+    Write the aggregated leaderboard as JSON or CSV, chosen by file extension
+
+    Args:
+        results (list[dict]): Evaluation results sorted by descending score
+        output_path (str): Path ending in .json or .csv
+    """
+    leaderboard = [{"rank": rank, **result} for rank, result in enumerate(results, start=1)]
+
+    if output_path.endswith(".csv"):
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=LEADERBOARD_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(leaderboard)
+    else:
+        with open(output_path, 'w') as f:
+            json.dump({"ratings": ratings_fingerprint(), "sessions": leaderboard}, f, indent=2)
+
+    print(f"Leaderboard with {len(leaderboard)} session(s) written to {output_path}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate many Pokemon gameplay sessions in parallel")
+    parser.add_argument("sessions", nargs="+",
+                        help="Session directories, a directory of sessions, or globs (quote them)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--output", default="leaderboard.json", help="Leaderboard file (.json or .csv)")
+    parser.add_argument("--cache", default=None,
+                        help=f"Result cache file (default: {DEFAULT_CACHE_FILENAME} next to the leaderboard)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-score every session")
+    parser.add_argument("--no-session-results", action="store_true",
+                        help=f"Do not write {RESULT_FILENAME} into each session directory")
+
+    args = parser.parse_args()
+
+    csv_paths = sorted({path for pattern in args.sessions for path in find_session_logs(pattern)})
+    if not csv_paths:
+        raise SystemExit("No session logs found")
+
+    cache_path = None
+    if not args.no_cache:
+        cache_path = args.cache or os.path.join(os.path.dirname(os.path.abspath(args.output)),
+                                                DEFAULT_CACHE_FILENAME)
+
+    results = evaluate_sessions(csv_paths, workers=args.workers, cache_path=cache_path,
+                                write_results=not args.no_session_results)
+    write_leaderboard(results, args.output)
+
+    for rank, result in enumerate(results[:10], start=1):
+        print(f"{rank:>3}. {result['session']}: {result['total_score']:.2f}")
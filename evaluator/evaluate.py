@@ -1,51 +1,207 @@
 import csv
+import datetime
+import glob
+import json
 import os
 import ast
-from .milestones import all_difficulty_ratings
+import time
+from types import SimpleNamespace
+from .milestones import pokemon_difficulty_ratings_refined, badge_difficulty_ratings, location_scores_by_name
+from .milestone_index import BADGE_BITS, get_milestone_index
+
+# Checkpoints are stored next to the state file they belong to, e.g. autosave.eval.json
+CHECKPOINT_SUFFIX = ".eval.json"
+CHECKPOINT_VERSION = 3
+# Bump when a change to the scoring logic (not the ratings) changes the score of an existing log
+SCORING_VERSION = 2
 
 class PokemonEvaluator:
     """
     Class for evaluating Pokemon game progress and calculating scores
     """
     
-    def __init__(self):
-        """Initialize the evaluator"""
+    def __init__(self, verbose=True):
+        """
+        Initialize the evaluator
+        
+        Args:
+            verbose (bool): Whether to print each new milestone and the summary
+        """
+        self.verbose = verbose
+        
         # Initialize sets to track achievements
         self.pokemon_seen = set()
         self.badges_earned = set()
         self.locations_visited = set()
         self.total_score = 0.0
+        
+        # Every milestone in the order it was achieved, with when it happened
+        self.milestone_timeline = []
+        
+        # Progress position that new milestones are stamped with
+        self.first_timestamp = None
+        self.current_timestamp = None
+        self.current_step = 0  # Steps taken over all segments of the session
+        self.current_frame = None
+        # Seconds spent in segments, without the time between a session's segments
+        self.active_seconds = 0.0
+        # Steps taken before the current segment, and the segment's own step number
+        self._step_offset = 0
+        self._segment_step = 0
+        
+        # Fields seen by the previous evaluate_state call, used to skip unchanged ones
+        self._last_species = None
+        self._last_badges = None
+        self._last_location = None
+        self._last_species_ids = None
+        self._last_badge_byte = None
+        self._last_map_id = None
+    
+    def _award(self, achieved, category, name, score):
+        """Record a newly achieved milestone and add its score"""
+        self.total_score += score
+        achieved.add(name)
+        self.milestone_timeline.append({
+            "category": category,
+            "name": name,
+            "score": score,
+            "total_score": self.total_score,
+            "step": self.current_step,
+            "frame": self.current_frame,
+            "timestamp": self.current_timestamp,
+        })
+        if self.verbose:
+            print(f"New {category}: {name}, Score: +{score}")
+    
+    def advance(self, step=None, frame=None, timestamp=None):
+        """
+        Update the progress position that milestones found from now on are stamped with
+        
+        Each segment of a session (every /initialize, including resumes) numbers its
+        steps from 0 again. Step 0 starts a new segment: its steps are counted on top
+        of the previous segments', and the time since the previous segment ended is
+        not counted as active time.
+        
+        Args:
+            step (int): Step number within the current segment
+            frame (int): Emulator frame count
+            timestamp (float): Wall-clock time in seconds since the epoch (default: now)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        if step is not None and (step == 0 or step < self._segment_step):
+            self._step_offset = self.current_step
+        elif self.current_timestamp is not None:
+            self.active_seconds += max(0.0, timestamp - self.current_timestamp)
+        self.current_timestamp = timestamp
+        if step is not None:
+            self._segment_step = step
+            self.current_step = self._step_offset + step
+        if frame is not None:
+            self.current_frame = frame
+    
+    def get_progress_stats(self):
+        """
+        Running aggregates describing how fast milestones are being reached
+        
+        Returns:
+            dict: Active time, steps, frames and per-milestone / per-hour rates, with
+                steps and time summed over the segments of the session
+        """
+        elapsed = self.active_seconds
+        milestones = len(self.milestone_timeline)
+        
+        return {
+            "milestones": milestones,
+            "steps": self.current_step,
+            "frames": self.current_frame,
+            "elapsed_seconds": elapsed,
+            "score_per_hour": self.total_score * 3600 / elapsed if elapsed > 0 else 0.0,
+            "steps_per_milestone": self.current_step / milestones if milestones else None,
+            "frames_per_milestone": (
+                self.current_frame / milestones if milestones and self.current_frame is not None else None
+            ),
+            "seconds_per_milestone": elapsed / milestones if milestones else None,
+        }
     
     def evaluate_pokemon(self, pokemon_name):
         """Evaluate a new Pokemon"""
-        if pokemon_name and pokemon_name not in self.pokemon_seen:
-            if pokemon_name in all_difficulty_ratings:
-                pokemon_score = all_difficulty_ratings[pokemon_name]
-                self.total_score += pokemon_score
-                self.pokemon_seen.add(pokemon_name)
-                print(f"New Pokemon: {pokemon_name}, Score: +{pokemon_score}")
+        if not pokemon_name:
+            return
+        pokemon_name = pokemon_name.replace(" ", "_")
+        if pokemon_name not in self.pokemon_seen and pokemon_name in pokemon_difficulty_ratings_refined:
+            self._award(self.pokemon_seen, "Pokemon", pokemon_name,
+                        pokemon_difficulty_ratings_refined[pokemon_name])
     
     def evaluate_badge(self, badge_name):
         """Evaluate a new badge"""
         if badge_name and badge_name not in self.badges_earned:
-            if badge_name in all_difficulty_ratings:
-                badge_score = all_difficulty_ratings[badge_name]
-                self.total_score += badge_score
-                self.badges_earned.add(badge_name)
-                print(f"New Badge: {badge_name}, Score: +{badge_score}")
+            if badge_name in badge_difficulty_ratings:
+                self._award(self.badges_earned, "Badge", badge_name,
+                            badge_difficulty_ratings[badge_name])
     
     def evaluate_location(self, location_name):
         """Evaluate a new location"""
         location_name = location_name.replace(" ", "_")
         if location_name and location_name not in self.locations_visited:
-            if location_name in all_difficulty_ratings:
-                location_score = all_difficulty_ratings[location_name]
-                self.total_score += location_score
-                self.locations_visited.add(location_name)
-                print(f"New Location: {location_name}, Score: +{location_score}")
+            if location_name in location_scores_by_name:
+                self._award(self.locations_visited, "Location", location_name,
+                            location_scores_by_name[location_name])
+    
+    def evaluate_ids(self, species_ids, badge_byte, map_id, step=None, frame=None, timestamp=None):
+        """
+        Evaluate raw game values read straight from WRAM, without building strings
+        
+        Lookups go through the precompiled MilestoneIndex, and each of the three
+        inputs is only examined when it changed since the previous call.
+        
+        Args:
+            species_ids (list[int]): Species IDs of the party Pokemon
+            badge_byte (int): Obtained badges bit field
+            map_id (int): Current map ID
+            step, frame, timestamp: Progress position, see advance()
+        """
+        self.advance(step, frame, timestamp)
+        index = get_milestone_index()
+        
+        species_ids = tuple(species_ids)
+        if species_ids != self._last_species_ids:
+            self._last_species_ids = species_ids
+            for species_id in species_ids:
+                name = index.pokemon_names[species_id]
+                if name is not None and name not in self.pokemon_seen:
+                    self._award(self.pokemon_seen, "Pokemon", name, index.pokemon_scores[species_id])
+        
+        if badge_byte != self._last_badge_byte:
+            self._last_badge_byte = badge_byte
+            for bit in range(BADGE_BITS):
+                name = index.badge_names[bit]
+                if badge_byte & (1 << bit) and name is not None and name not in self.badges_earned:
+                    self._award(self.badges_earned, "Badge", name, index.badge_scores[bit])
+        
+        if map_id != self._last_map_id:
+            self._last_map_id = map_id
+            name = index.location_names[map_id]
+            if name is not None and name not in self.locations_visited:
+                self._award(self.locations_visited, "Location", name, index.location_scores[map_id])
     
     def evaluate_row(self, row):
         """Evaluate a single row from the CSV data"""
+        # Stamp milestones with the step, frame and time the row was logged at
+        try:
+            step = int(row['step_number']) if row.get('step_number') else None
+            frame = int(row['frame_count']) if row.get('frame_count') else None
+            timestamp = (
+                datetime.datetime.fromisoformat(row['timestamp']).timestamp()
+                if row.get('timestamp') else None
+            )
+        except (TypeError, ValueError) as e:
+            print(f"Error parsing row position: {e}")
+            step = frame = timestamp = None
+        self.advance(step, frame, timestamp)
+        
         # Check for Pokemon
         if row.get('pokemons'):
             try:
@@ -76,12 +232,54 @@ class PokemonEvaluator:
             except Exception as e:
                 print(f"Error parsing Location data: {e}")
     
-    def evaluate_csv(self, csv_file_path):
+    def evaluate_state(self, state, step=None, frame=None, timestamp=None):
+        """
+        Evaluate a game state directly, without going through a CSV row.
+        
+        Only the fields that changed since the previous call are checked, so a
+        step that just walks around a known map costs three comparisons. Scores
+        are identical to feeding the equivalent rows to evaluate_row.
+        
+        Args:
+            state: A GameState, GameStateResponse or any object with
+                `pokemons`, `badges` and `location` attributes
+            step, frame, timestamp: Progress position, see advance()
+        """
+        if step is None:
+            step = getattr(state, 'step_number', None)
+        self.advance(step, frame, timestamp)
+        
+        # Check for Pokemon
+        species = tuple(
+            pokemon_dict['species'] for pokemon_dict in (state.pokemons or [])
+            if isinstance(pokemon_dict, dict) and 'species' in pokemon_dict
+        )
+        if species != self._last_species:
+            self._last_species = species
+            for species_name in species:
+                self.evaluate_pokemon(species_name)
+        
+        # Check for Badges
+        badges = tuple(state.badges or ())
+        if badges != self._last_badges:
+            self._last_badges = badges
+            for badge in badges:
+                self.evaluate_badge(badge)
+        
+        # Check for Locations
+        location = state.location
+        if location and location != self._last_location:
+            self._last_location = location
+            self.evaluate_location(location)
+    
+    def evaluate_csv(self, csv_file_path, start_offset=0):
         """
         Evaluate a Pokemon gameplay CSV file and calculate score based on milestones achieved
         
         Args:
             csv_file_path (str): Path to the CSV file to evaluate
+            start_offset (int): Byte offset of the first row to evaluate; the header
+                is always read from the start of the file
         
         Returns:
             float: Total score achieved
@@ -93,7 +291,12 @@ class PokemonEvaluator:
         # Read the CSV file
         try:
             with open(csv_file_path, 'r', newline='') as csvfile:
-                reader = csv.DictReader(csvfile)
+                if start_offset:
+                    fieldnames = next(csv.reader([csvfile.readline()]))
+                    csvfile.seek(start_offset)
+                    reader = csv.DictReader(csvfile, fieldnames=fieldnames)
+                else:
+                    reader = csv.DictReader(csvfile)
                 
                 for row in reader:
                     self.evaluate_row(row)
@@ -107,10 +310,102 @@ class PokemonEvaluator:
         
         return self.total_score
     
+    def save_checkpoint(self, checkpoint_path, csv_offset=None, step_number=None):
+        """
+        Save the evaluator state so a resumed session does not have to replay the whole CSV
+        
+        Args:
+            checkpoint_path (str): Path of the checkpoint file to write
+            csv_offset (int): Byte offset in gameplay_data.csv up to which rows are
+                already reflected in this state
+            step_number (int): Step number of the last evaluated row
+        """
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "timestamp": time.time(),
+            "csv_offset": csv_offset,
+            "step_number": step_number,
+            "total_score": self.total_score,
+            "pokemon_seen": sorted(self.pokemon_seen),
+            "badges_earned": sorted(self.badges_earned),
+            "locations_visited": sorted(self.locations_visited),
+            "milestone_timeline": self.milestone_timeline,
+            "first_timestamp": self.first_timestamp,
+            "current_timestamp": self.current_timestamp,
+            "current_step": self.current_step,
+            "current_frame": self.current_frame,
+            "active_seconds": self.active_seconds,
+            "step_offset": self._step_offset,
+            "segment_step": self._segment_step,
+        }
+        
+        # Write to a temporary file first so a crash never leaves a truncated checkpoint
+        tmp_path = checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, checkpoint_path)
+    
+    def load_checkpoint(self, checkpoint_path):
+        """
+        Restore evaluator state from a checkpoint file
+        
+        Args:
+            checkpoint_path (str): Path of the checkpoint file to read
+            
+        Returns:
+            dict: The checkpoint data, or None if it could not be loaded
+        """
+        try:
+            with open(checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading evaluator checkpoint {checkpoint_path}: {e}")
+            return None
+        
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            print(f"Ignoring evaluator checkpoint {checkpoint_path} with unsupported version")
+            return None
+        
+        self.reset()
+        self.total_score = checkpoint["total_score"]
+        self.pokemon_seen.update(checkpoint["pokemon_seen"])
+        self.badges_earned.update(checkpoint["badges_earned"])
+        self.locations_visited.update(checkpoint["locations_visited"])
+        self.milestone_timeline = checkpoint["milestone_timeline"]
+        self.first_timestamp = checkpoint["first_timestamp"]
+        self.current_timestamp = checkpoint["current_timestamp"]
+        self.current_step = checkpoint["current_step"]
+        self.current_frame = checkpoint["current_frame"]
+        self.active_seconds = checkpoint["active_seconds"]
+        self._step_offset = checkpoint["step_offset"]
+        self._segment_step = checkpoint["segment_step"]
+        return checkpoint
+    
+    def _find_latest_checkpoint(self, session_dir, csv_size):
+        """Find the checkpoint covering the most CSV rows that is still valid for the current CSV"""
+        best_path = None
+        best_offset = -1
+        for checkpoint_path in glob.glob(os.path.join(session_dir, "*" + CHECKPOINT_SUFFIX)):
+            try:
+                with open(checkpoint_path, 'r') as f:
+                    csv_offset = json.load(f).get("csv_offset")
+            except (OSError, ValueError):
+                continue
+            # A checkpoint beyond the end of the CSV belongs to a different log
+            if csv_offset is None or csv_offset > csv_size:
+                continue
+            if csv_offset > best_offset:
+                best_path = checkpoint_path
+                best_offset = csv_offset
+        return best_path
+    
     def load_state_from_session(self, session_dir):
         """
         Load evaluation state from an existing session directory
         
+        Uses the most recent evaluator checkpoint if one exists and replays only the
+        CSV rows written after it, falling back to a full CSV replay otherwise.
+        
         Args:
             session_dir (str): Path to the session directory
             
@@ -123,8 +418,15 @@ class PokemonEvaluator:
         # Look for the gameplay data CSV file
         csv_path = os.path.join(session_dir, "gameplay_data.csv")
         if os.path.exists(csv_path):
-            print(f"Loading evaluation state from {csv_path}")
-            self.evaluate_csv(csv_path)
+            checkpoint_path = self._find_latest_checkpoint(session_dir, os.path.getsize(csv_path))
+            checkpoint = self.load_checkpoint(checkpoint_path) if checkpoint_path else None
+            if checkpoint:
+                print(f"Loading evaluation state from {checkpoint_path} "
+                      f"(step {checkpoint.get('step_number')}), replaying newer rows of {csv_path}")
+                self.evaluate_csv(csv_path, start_offset=checkpoint["csv_offset"])
+            else:
+                print(f"Loading evaluation state from {csv_path}")
+                self.evaluate_csv(csv_path)
             return True
         else:
             print(f"No gameplay data file found in {session_dir}")
@@ -132,11 +434,19 @@ class PokemonEvaluator:
     
     def print_summary(self):
         """Print evaluation summary"""
+        if not self.verbose:
+            return
         print("\n=== Evaluation Summary ===")
         print(f"Total Unique Pokemon: {len(self.pokemon_seen)}")
         print(f"Total Badges Earned: {len(self.badges_earned)}")
         print(f"Total Locations Visited: {len(self.locations_visited)}")
         print(f"Total Score: {self.total_score:.2f}")
+        
+        progress = self.get_progress_stats()
+        if progress["milestones"]:
+            print(f"Milestones: {progress['milestones']} in {progress['steps']} steps "
+                  f"({progress['steps_per_milestone']:.1f} steps/milestone)")
+            print(f"Score per Hour: {progress['score_per_hour']:.2f}")
     
     def reset(self):
         """Reset evaluator state"""
@@ -144,6 +454,102 @@ class PokemonEvaluator:
         self.badges_earned.clear()
         self.locations_visited.clear()
         self.total_score = 0.0
+        self.milestone_timeline = []
+        self.first_timestamp = None
+        self.current_timestamp = None
+        self.current_step = 0
+        self.current_frame = None
+        self.active_seconds = 0.0
+        self._step_offset = 0
+        self._segment_step = 0
+        self._last_species = None
+        self._last_badges = None
+        self._last_location = None
+        self._last_species_ids = None
+        self._last_badge_byte = None
+        self._last_map_id = None
+
+
+def ids_from_state(state):
+    """
+    Convert the logged names of a state back to the raw WRAM values evaluate_ids takes
+    
+    Names the game's ID enums do not know are skipped.
+    
+    Args:
+        state: Object with `pokemons`, `badges` and `location` attributes, as logged
+    
+    Returns:
+        tuple: (party species IDs, badge bit field, map ID or None)
+    """
+    # Imported here so the evaluator package stays usable without the emulator installed
+    from pokemon_env.memory_reader import Badge, MapLocation, Pokemon
+    
+    species_ids = []
+    for pokemon_dict in state.pokemons or []:
+        if isinstance(pokemon_dict, dict) and 'species' in pokemon_dict:
+            name = pokemon_dict['species'].replace(" ", "_")
+            if name in Pokemon.__members__:
+                species_ids.append(Pokemon[name].value)
+    badge_byte = 0
+    for badge in state.badges or ():
+        if badge in Badge.__members__:
+            badge_byte |= Badge[badge].value
+    location = (state.location or "").replace(" ", "_")
+    map_id = MapLocation[location].value if location in MapLocation.__members__ else None
+    return species_ids, badge_byte, map_id
+
+
+def verify_incremental(csv_file_path):
+    """
+    Check that evaluate_state and evaluate_ids produce the same result as evaluate_row on a CSV file
+    
+    evaluate_ids, the path the server scores with, is fed the raw IDs behind each
+    row's logged names (see ids_from_state).
+    
+    Args:
+        csv_file_path (str): Path to the CSV file to verify
+    
+    Returns:
+        bool: True if all evaluation paths agree, False otherwise
+    """
+    row_evaluator = PokemonEvaluator()
+    state_evaluator = PokemonEvaluator()
+    ids_evaluator = PokemonEvaluator()
+    last_map_id = None
+    
+    with open(csv_file_path, 'r', newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            row_evaluator.evaluate_row(row)
+            try:
+                state = SimpleNamespace(
+                    pokemons=ast.literal_eval(row.get('pokemons') or '[]'),
+                    badges=ast.literal_eval(row.get('badges') or '[]'),
+                    location=row.get('location'),
+                )
+            except Exception as e:
+                print(f"Skipping unparsable row {row.get('step_number')}: {e}")
+                continue
+            state_evaluator.evaluate_state(state)
+            species_ids, badge_byte, map_id = ids_from_state(state)
+            # An unknown location keeps the previous map, like a step that stays on it
+            last_map_id = map_id if map_id is not None else last_map_id
+            ids_evaluator.evaluate_ids(species_ids, badge_byte, last_map_id)
+    
+    matches = True
+    for name, evaluator in (("Incremental", state_evaluator), ("ID", ids_evaluator)):
+        if (
+            row_evaluator.total_score == evaluator.total_score
+            and row_evaluator.pokemon_seen == evaluator.pokemon_seen
+            and row_evaluator.badges_earned == evaluator.badges_earned
+            and row_evaluator.locations_visited == evaluator.locations_visited
+        ):
+            print(f"{name} evaluation matches CSV evaluation (score {row_evaluator.total_score:.2f})")
+        else:
+            print(f"Mismatch: CSV score {row_evaluator.total_score:.2f}, "
+                  f"{name} score {evaluator.total_score:.2f}")
+            matches = False
+    return matches
 
 
 if __name__ == "__main__":
@@ -151,8 +557,13 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Evaluate Pokemon gameplay CSV file")
     parser.add_argument("csv_file", help="Path to the gameplay CSV file to evaluate")
+    parser.add_argument("--verify-incremental", action="store_true",
+                        help="Check that the incremental state and raw ID evaluators agree with the CSV evaluator")
     
     args = parser.parse_args()
     
+    if args.verify_incremental:
+        raise SystemExit(0 if verify_incremental(args.csv_file) else 1)
+    
     evaluator = PokemonEvaluator()
     evaluator.evaluate_csv(args.csv_file)
@@ -0,0 +1,70 @@
+"""
+Milestone ratings precompiled into lookup tables keyed by raw game values.
+
+The rating dictionaries in milestones.py are keyed by names. Scoring from them
+means turning WRAM bytes into enum names and then into strings on every step.
+MilestoneIndex resolves those names once, into 256-entry tables indexed by
+species ID and map ID and an 8-entry table indexed by badge bit. Each category
+has its own tables, so a Pokemon and a location can never collide on a name.
+"""
+
+from .milestones import (
+    pokemon_difficulty_ratings_refined,
+    badge_difficulty_ratings,
+    location_scores_by_name,
+)
+
+BADGE_BITS = 8
+
+
+class MilestoneIndex:
+    """Milestone names and scores in arrays indexed by species ID, map ID and badge bit"""
+
+    def __init__(self, pokemon_ratings, badge_ratings, location_ratings):
+        """
+        Compile the rating dictionaries against the game's ID enums
+
+        Args:
+            pokemon_ratings (dict): Species name -> score
+            badge_ratings (dict): Badge name -> score
+            location_ratings (dict): Location name -> score
+        """
+        # Imported here so the evaluator package stays usable without the emulator installed
+        from pokemon_env.memory_reader import Badge, MapLocation, Pokemon
+
+        self.pokemon_names = [None] * 256
+        self.pokemon_scores = [0.0] * 256
+        for species in Pokemon:
+            if species.name in pokemon_ratings:
+                self.pokemon_names[species.value] = species.name
+                self.pokemon_scores[species.value] = pokemon_ratings[species.name]
+
+        self.location_names = [None] * 256
+        self.location_scores = [0.0] * 256
+        for location in MapLocation:
+            if location.name in location_ratings:
+                self.location_names[location.value] = location.name
+                self.location_scores[location.value] = location_ratings[location.name]
+
+        self.badge_names = [None] * BADGE_BITS
+        self.badge_scores = [0.0] * BADGE_BITS
+        for bit in range(BADGE_BITS):
+            name = Badge(1 << bit).name
+            if name in badge_ratings:
+                self.badge_names[bit] = name
+                self.badge_scores[bit] = badge_ratings[name]
+
+
+_MILESTONE_INDEX = None
+
+
+def get_milestone_index():
+    """Return the shared MilestoneIndex, compiling it on first use"""
+    global _MILESTONE_INDEX
+    if _MILESTONE_INDEX is None:
+        _MILESTONE_INDEX = MilestoneIndex(
+            pokemon_difficulty_ratings_refined,
+            badge_difficulty_ratings,
+            location_scores_by_name,
+        )
+    return _MILESTONE_INDEX
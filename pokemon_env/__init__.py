@@ -1,4 +1,4 @@
 from pokemon_env.environment import PokemonEnvironment
-from pokemon_env.action import Action, PressKey, Wait
+from pokemon_env.action import Action, PressKey, Wait, WaitUntil
 
-__all__ = ["PokemonEnvironment", "Action", "PressKey", "Wait"] 
\ No newline at end of file
+__all__ = ["PokemonEnvironment", "Action", "PressKey", "Wait", "WaitUntil"]
@@ -2,10 +2,13 @@ from abc import ABC, abstractmethod
 from enum import Enum
 from typing import List
 
+from pokemon_env.conditions import CONDITIONS
+
 
 class ActionType(Enum):
     PRESS_KEY = "press_key"
     WAIT = "wait"
+    WAIT_UNTIL = "wait_until"
 
 
 class Action(ABC):
@@ -59,27 +62,84 @@ class PressKey(Action):
 class Wait(Action):
     """Action to wait for a specified number of frames."""
     
-    def __init__(self, frames: int = 60):
+    def __init__(self, frames: int = 60, early_exit: bool = False, steady_frames: int = 16):
         """
         Initialize a wait action.
         
         Args:
-            frames: Number of frames to wait (default: 60)
+            frames: Number of frames to wait (default: 60), or at most with early_exit
+            early_exit: Stop once the game is steady or something significant happens
+                (a text box opens, a battle starts, the map changes)
+            steady_frames: Frames the screen, sprites and key WRAM fields must stay
+                unchanged to count as steady (default: 16)
         """
         if frames <= 0:
             raise ValueError("Frames must be a positive integer")
+        if steady_frames <= 0:
+            raise ValueError("Steady frames must be a positive integer")
         
         self.frames = frames
+        self.early_exit = early_exit
+        self.steady_frames = steady_frames
     
     @property
     def action_type(self) -> ActionType:
         return ActionType.WAIT
     
     def to_dict(self) -> dict:
+        if self.early_exit:
+            return {
+                "action_type": self.action_type.value,
+                "frames": self.frames,
+                "early_exit": True,
+                "steady_frames": self.steady_frames
+            }
         return {
             "action_type": self.action_type.value,
             "frames": self.frames
         }
     
     def __str__(self) -> str:
-        return f"Wait: {self.frames} frames" 
\ No newline at end of file
+        if self.early_exit:
+            return f"Wait: at most {self.frames} frames, until steady for {self.steady_frames}"
+        return f"Wait: {self.frames} frames"
+
+
+class WaitUntil(Action):
+    """Action to wait until a game condition holds, for at most a number of frames."""
+    
+    VALID_CONDITIONS = CONDITIONS
+    
+    def __init__(self, conditions: List[str], max_frames: int = 600):
+        """
+        Initialize a conditional wait action.
+        
+        Args:
+            conditions: Conditions to wait for (see pokemon_env/conditions.py); the
+                wait ends as soon as any of them holds
+            max_frames: Maximum number of frames to wait (default: 600)
+        """
+        if not conditions:
+            raise ValueError("At least one condition is required")
+        for condition in conditions:
+            if condition not in self.VALID_CONDITIONS:
+                raise ValueError(f"Invalid condition: {condition}. Valid conditions are: {self.VALID_CONDITIONS}")
+        if max_frames <= 0:
+            raise ValueError("Max frames must be a positive integer")
+        
+        self.conditions = conditions
+        self.max_frames = max_frames
+    
+    @property
+    def action_type(self) -> ActionType:
+        return ActionType.WAIT_UNTIL
+    
+    def to_dict(self) -> dict:
+        return {
+            "action_type": self.action_type.value,
+            "conditions": self.conditions,
+            "max_frames": self.max_frames
+        }
+    
+    def __str__(self) -> str:
+        return f"WaitUntil: {' or '.join(self.conditions)} (at most {self.max_frames} frames)"
@@ -0,0 +1,112 @@
+"""
+Game conditions a WaitUntil action can wait for, checked once per frame from WRAM.
+
+    condition        fires when
+    dialog_open      a text box is on screen and its text has finished printing
+    dialog_changed   the text box differs from when the wait started (it opened,
+                     closed or shows new text) and has finished printing
+    map_changed      the map ID differs from when the wait started
+    battle_started   a battle is in progress
+    battle_ended     no battle is in progress
+    screen_static    the tilemap and palettes have not changed for 16 frames
+    input_ready      the game can accept input again (see readiness.py)
+
+Text counts as finished printing once the text box has not changed for 8 frames,
+which is longer than the delay between letters at any text speed.
+"""
+
+from typing import List, Optional
+
+from pokemon_env.readiness import (
+    PROMPT_ARROW,
+    STABLE_FRAMES,
+    TEXT_BOX_CORNER,
+    InputReadyDetector,
+    screen_signature,
+    text_box_open,
+)
+
+MAP_ID = 0xD35E
+IN_BATTLE = 0xD057
+TEXT_BOX_START, TEXT_BOX_END = TEXT_BOX_CORNER, 0xC508  # Bottom six rows of the tilemap
+
+TEXT_STABLE_FRAMES = 8
+
+CONDITIONS = [
+    "dialog_open",
+    "dialog_changed",
+    "map_changed",
+    "battle_started",
+    "battle_ended",
+    "screen_static",
+    "input_ready",
+]
+
+
+def text_box_signature(memory) -> bytes:
+    """The bottom text box tiles, without the blinking ▼ prompt."""
+    text_box = bytearray(memory[TEXT_BOX_START:TEXT_BOX_END])
+    text_box[PROMPT_ARROW - TEXT_BOX_START] = 0
+    return bytes(text_box)
+
+
+class ConditionWatcher:
+    """Checks a set of conditions frame by frame, relative to when it was created"""
+
+    def __init__(self, memory, conditions: List[str]):
+        """
+        Args:
+            memory: PyBoy memory view
+            conditions: Names from CONDITIONS; the watcher fires when any of them holds
+        """
+        for condition in conditions:
+            if condition not in CONDITIONS:
+                raise ValueError(f"Invalid condition: {condition}. Valid conditions are: {CONDITIONS}")
+        self.memory = memory
+        self.conditions = conditions
+
+        self._start_map = memory[MAP_ID]
+        self._start_text = text_box_signature(memory)
+        self._text = None
+        self._text_stable = 0
+        self._screen = None
+        self._screen_stable = 0
+        self._ready = InputReadyDetector(memory) if "input_ready" in conditions else None
+
+    def check(self) -> Optional[str]:
+        """
+        Check the conditions against the current frame.
+
+        Returns:
+            The first condition that holds, or None
+        """
+        memory = self.memory
+        text = text_box_signature(memory)
+        self._text_stable = self._text_stable + 1 if text == self._text else 0
+        self._text = text
+        text_done = self._text_stable >= TEXT_STABLE_FRAMES
+
+        screen = screen_signature(memory)
+        self._screen_stable = self._screen_stable + 1 if screen == self._screen else 0
+        self._screen = screen
+
+        ready = self._ready.update() if self._ready else False
+
+        for condition in self.conditions:
+            if condition == "dialog_open":
+                fired = text_done and text_box_open(memory)
+            elif condition == "dialog_changed":
+                fired = text_done and text != self._start_text
+            elif condition == "map_changed":
+                fired = memory[MAP_ID] != self._start_map
+            elif condition == "battle_started":
+                fired = memory[IN_BATTLE] != 0
+            elif condition == "battle_ended":
+                fired = memory[IN_BATTLE] == 0
+            elif condition == "screen_static":
+                fired = self._screen_stable >= STABLE_FRAMES
+            else:
+                fired = ready
+            if fired:
+                return condition
+        return None
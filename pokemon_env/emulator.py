@@ -1,3 +1,4 @@
+import hashlib
 import io
 import logging
 import pickle
@@ -7,15 +8,50 @@ from typing import Dict, Any
 import time
 
 from .memory_reader import PokemonRedReader, StatusCondition
+from .conditions import IN_BATTLE, MAP_ID, TEXT_STABLE_FRAMES, ConditionWatcher, text_box_signature
+from .readiness import InputReadyDetector, menu_cursor_visible, steady_signature, text_box_open
+from .watch import MemoryWatcher
 from PIL import Image
 from pyboy import PyBoy
 
 logger = logging.getLogger(__name__)
 
+PRESS_FRAMES = 10  # Frames a button is held
+RELEASE_FRAMES = 120  # Frames run after releasing a button (the ceiling in adaptive mode)
+MAX_DIALOG_ADVANCES = 30  # Most text boxes advance_dialog clicks through after one action
+
+OPTIONS_ADDRESS = 0xD355  # Bits 0-3 text delay, bit 6 battle style SET, bit 7 animations off
+FAST_OPTIONS = 0xC1  # Fast text, battle animations off, SET battle style
+
+# WRAM range each decoded section of get_state_from_memory() is read from, end exclusive;
+# a section is only decoded again when the bytes of its range changed
+STATE_SECTIONS = {
+    "player_name": (0xD158, 0xD163),
+    "pokemons": (0xD163, 0xD2F7),  # Party count, species, structs and nicknames
+    "inventory": (0xD31D, 0xD347),  # Item count, then up to 20 (item, quantity) pairs
+    "rival_name": (0xD34A, 0xD351),
+    "badges": (0xD356, 0xD357),
+    "dialog": (0xC3A0, 0xC507),  # The tilemap bytes read_dialog() scans (all but the last)
+}
+
 
 class Emulator:
-    def __init__(self, rom_path, headless=True, sound=False):
-        if headless:
+    def __init__(self, rom_path, headless=True, sound=False, pyboy=None, adaptive_press=False):
+        """
+        Create the emulator.
+
+        Args:
+            rom_path: Path to the Pokemon ROM file
+            headless: Whether to run without display
+            sound: Whether to enable sound
+            pyboy: An existing PyBoy (or compatible) instance to wrap instead of
+                booting the ROM, e.g. a recorded fixture for benchmarks
+            adaptive_press: End the wait after each button press as soon as the
+                game can accept input again, instead of always waiting 120 frames
+        """
+        if pyboy is not None:
+            self.pyboy = pyboy
+        elif headless:
             self.pyboy = PyBoy(
                 rom_path,
                 window="null",
@@ -27,11 +63,172 @@ class Emulator:
                 cgb=True,
                 sound=sound,
             )
+        self.headless = headless
+        self.adaptive_press = adaptive_press
+        # Total number of frames emulated since the emulator was created
+        self.frame_count = 0
+        # Called with the frame number after every frame advanced by tick()
+        self.frame_hooks = []
+        # Watched WRAM ranges; the environment checks them after every step (see watch.py)
+        self.watcher = MemoryWatcher(self.pyboy.memory)
+        # Section name -> (bytes of its WRAM range, decoded value) for get_state_from_memory()
+        self._section_cache = {}
 
     def tick(self, frames):
         """Advance the emulator by the specified number of frames."""
+        if not self.frame_hooks:
+            for _ in range(frames):
+                self.pyboy.tick()
+            self.frame_count += frames
+            return
         for _ in range(frames):
             self.pyboy.tick()
+            self.frame_count += 1
+            for hook in self.frame_hooks:
+                hook(self.frame_count)
+
+    def run(self, frames, render=True):
+        """
+        Advance the emulator by the specified number of frames in a single call.
+
+        Unlike tick, only the last frame is rendered (or none when render is False),
+        which is much faster when the intermediate screens are not needed. Frame
+        hooks are not called.
+        """
+        if frames > 0:
+            self.pyboy.tick(frames, render)
+            self.frame_count += frames
+
+    def apply_fast_options(self):
+        """
+        Set the in-game options to the fastest values: fast text, no battle
+        animations and the SET battle style (no switch prompt after a faint).
+
+        Returns:
+            bool: Whether the options byte had to be changed
+        """
+        if self.pyboy.memory[OPTIONS_ADDRESS] == FAST_OPTIONS:
+            return False
+        self.pyboy.memory[OPTIONS_ADDRESS] = FAST_OPTIONS
+        return True
+
+    def wait_until_ready(self, max_frames):
+        """
+        Advance frame by frame until the game can accept input (see readiness.py).
+
+        Args:
+            max_frames: Maximum number of frames to run
+
+        Returns:
+            int: Frames run
+        """
+        detector = InputReadyDetector(self.pyboy.memory)
+        for frame in range(1, max_frames + 1):
+            self.tick(1)
+            if detector.update():
+                return frame
+        return max_frames
+
+    def wait_until(self, conditions, max_frames):
+        """
+        Advance frame by frame until any of the conditions holds (see conditions.py).
+
+        Args:
+            conditions: Condition names to wait for
+            max_frames: Maximum number of frames to run
+
+        Returns:
+            tuple[str | None, int]: The condition that fired (None if the budget ran out) and frames run
+        """
+        watcher = ConditionWatcher(self.pyboy.memory, conditions)
+        condition = watcher.check()
+        frames = 0
+        while condition is None and frames < max_frames:
+            self.tick(1)
+            frames += 1
+            condition = watcher.check()
+        return condition, frames
+
+    def wait_for_steady(self, max_frames, steady_frames):
+        """
+        Advance frame by frame until the game is steady or something significant happens.
+
+        Steady means the tilemap, palettes, sprites and key WRAM fields (map, player
+        coordinates, battle and input flags) have not changed for steady_frames frames.
+        Significant events end the wait sooner: a battle starting, the map changing, or
+        a text box opening (once its first text has finished printing).
+
+        Args:
+            max_frames: Maximum number of frames to run
+            steady_frames: Frames without changes that count as steady
+
+        Returns:
+            tuple[str | None, int]: What ended the wait ("steady", "dialog_opened",
+            "battle_started" or "map_changed"; None if it ran all frames) and frames run
+        """
+        memory = self.pyboy.memory
+        map_id = memory[MAP_ID]
+        in_battle = memory[IN_BATTLE] != 0
+        dialog_open = text_box_open(memory)
+        dialog_opened = False
+        text, text_stable = None, 0
+        signature, stable = None, 0
+        for frame in range(1, max_frames + 1):
+            self.tick(1)
+            if memory[MAP_ID] != map_id:
+                return "map_changed", frame
+            if memory[IN_BATTLE] and not in_battle:
+                return "battle_started", frame
+            in_battle = memory[IN_BATTLE] != 0
+
+            if text_box_open(memory) and not dialog_open:
+                dialog_opened = True
+            dialog_open = text_box_open(memory)
+            if dialog_opened and dialog_open:
+                current = text_box_signature(memory)
+                text_stable = text_stable + 1 if current == text else 0
+                text = current
+                if text_stable >= TEXT_STABLE_FRAMES:
+                    return "dialog_opened", frame
+
+            current = steady_signature(memory)
+            stable = stable + 1 if current == signature else 0
+            signature = current
+            if stable >= steady_frames:
+                return "steady", frame
+        return None, max_frames
+
+    def advance_dialog(self, max_presses=MAX_DIALOG_ADVANCES):
+        """
+        Press A through text boxes that only wait to be read, collecting their text.
+
+        A text box is advanced once the whole screen has settled (see readiness.py)
+        with no menu or choice cursor on it. It stops when the text box closes, a
+        cursor appears (a menu or yes/no choice), the screen does not settle within
+        RELEASE_FRAMES, pressing A did not change the text, or after max_presses presses.
+
+        Args:
+            max_presses: Maximum number of text boxes to advance
+
+        Returns:
+            tuple[list[str], int]: Text of every text box seen, in order, and the A presses made
+        """
+        memory = self.pyboy.memory
+        transcript = []
+        presses = 0
+        while text_box_open(memory):
+            if self.wait_until(["input_ready"], RELEASE_FRAMES)[0] is None or not text_box_open(memory):
+                break
+            text = self.get_active_dialog()
+            if presses and transcript and transcript[-1] == text:
+                break  # The text box is not waiting for A
+            if text:
+                transcript.append(text)
+            if menu_cursor_visible(memory) or presses >= max_presses:
+                break
+            self.press_buttons(["a"])
+            presses += 1
+        return transcript, presses
 
     def initialize(self):
         """Initialize the emulator."""
@@ -82,6 +279,16 @@ class Emulator:
             
         logger.info(f"Game state saved to {state_filename}")
 
+    def get_state_bytes(self):
+        """Save the emulator state in memory and return it as bytes."""
+        pyboy_state_io = io.BytesIO()
+        self.pyboy.save_state(pyboy_state_io)
+        return pyboy_state_io.getvalue()
+
+    def load_state_bytes(self, state_bytes):
+        """Load an emulator state returned by get_state_bytes."""
+        self.pyboy.load_state(io.BytesIO(state_bytes))
+
     def press_buttons(self, buttons, wait=True):
         """Press a sequence of buttons on the Game Boy.
         
@@ -100,11 +307,13 @@ class Emulator:
                 continue
                 
             self.pyboy.button_press(button)
-            self.tick(10)   # Press briefly
+            self.tick(PRESS_FRAMES)   # Press briefly
             self.pyboy.button_release(button)
             
-            if wait:
-                self.tick(120) # Wait longer after button release
+            if wait and self.adaptive_press:
+                self.wait_until_ready(RELEASE_FRAMES)  # Wait until the game is ready for the next input
+            elif wait:
+                self.tick(RELEASE_FRAMES) # Wait longer after button release
             else:
                 self.tick(10)   # Brief pause between button presses
                 
@@ -142,6 +351,32 @@ class Emulator:
         reader = PokemonRedReader(self.pyboy.memory)
         return reader.read_location()
 
+    def get_milestone_ids(self):
+        """
+        Returns the raw values the evaluator scores milestones from.
+        Returns:
+            tuple[list[int], int, int]: (party species IDs, badge bit field, map ID)
+        """
+        reader = PokemonRedReader(self.pyboy.memory)
+        return reader.read_party_species_ids(), reader.read_badge_byte(), reader.read_map_id()
+
+    def get_observation(self):
+        """
+        Returns the game state as a fixed-layout numeric vector, without decoding names.
+        Returns:
+            numpy.ndarray: int32 observation laid out as in pokemon_env/observation.py
+        """
+        reader = PokemonRedReader(self.pyboy.memory)
+        return reader.read_observation()
+
+    def get_state_hash(self):
+        """
+        Returns a fingerprint of the game state for checking that replays match.
+        Returns:
+            str: SHA-1 hex digest of work RAM (0xC000-0xDFFF)
+        """
+        return hashlib.sha1(bytes(self.pyboy.memory[0xC000:0xE000])).hexdigest()
+
     def _get_direction(self, array):
         """Determine the player's facing direction from the sprite pattern."""
         # Look through the array for any 2x2 grid containing numbers 0-3
@@ -514,16 +749,56 @@ class Emulator:
             [],
         )
 
+    def _decode_section(self, section, decode):
+        """
+        Decode a section of the game state, or reuse the last result if its WRAM range is unchanged.
+        Args:
+            section: Name in STATE_SECTIONS
+            decode: Called without arguments to decode the section
+        Returns:
+            The decoded value, shared with earlier calls; do not modify it
+        """
+        start, end = STATE_SECTIONS[section]
+        data = bytes(self.pyboy.memory[start:end])
+        cached = self._section_cache.get(section)
+        if cached is not None and cached[0] == data:
+            return cached[1]
+        value = decode()
+        self._section_cache[section] = (data, value)
+        return value
+
+    def _decode_party(self, reader):
+        pokemons = []
+        for pokemon in reader.read_party_pokemon():
+            pokemon_dict = {
+                "nickname": pokemon.nickname,
+                "species": pokemon.species_name,
+                "level": pokemon.level,
+                "hp": {
+                    "current": pokemon.current_hp,
+                    "max": pokemon.max_hp
+                },
+                "types": [pokemon.type1.name] + ([pokemon.type2.name] if pokemon.type2 else []),
+                "moves": [{"name": move, "pp": pp} for move, pp in zip(pokemon.moves, pokemon.move_pp, strict=True)],
+                "status": None if pokemon.status == StatusCondition.NONE else pokemon.status.get_status_name()
+            }
+            pokemons.append(pokemon_dict)
+        return pokemons
+
     def get_state_from_memory(self) -> Dict[str, Any]:
         """
         Reads the game state from memory and returns a dictionary representation of it.
+        The party, inventory, names, badges and dialog are only decoded again when their
+        WRAM bytes changed (see STATE_SECTIONS), so most steps decode little more than the
+        position. The returned dictionary is new, but the section values in it are shared
+        with earlier results and must not be modified.
         """
         reader = PokemonRedReader(self.pyboy.memory)
         
-        name = reader.read_player_name()
+        name = self._decode_section("player_name", reader.read_player_name)
         if name == "NINTEN":
             name = "Not yet set"
-        rival_name = reader.read_rival_name()
+        rival_name = self._decode_section("rival_name", reader.read_rival_name)
         if rival_name == "SONY":
             rival_name = "Not yet set"
 
@@ -538,29 +813,16 @@ class Emulator:
                 "money": reader.read_money(),
                 "location": reader.read_location(),
                 "coordinates": reader.read_coordinates(),
-                "badges": reader.read_badges()
+                "badges": self._decode_section("badges", reader.read_badges)
             },
             "valid_moves": valid_moves if valid_moves else [],
-            "inventory": [{"item": item, "quantity": qty} for item, qty in reader.read_items()],
-            "dialog": reader.read_dialog() or None,
-            "pokemons": []
+            "inventory": self._decode_section(
+                "inventory", lambda: [{"item": item, "quantity": qty} for item, qty in reader.read_items()]
+            ),
+            "dialog": self._decode_section("dialog", reader.read_dialog) or None,
+            # Add Pokemon party information
+            "pokemons": self._decode_section("pokemons", lambda: self._decode_party(reader))
         }
-        
-        # Add Pokemon party information
-        for pokemon in reader.read_party_pokemon():
-            pokemon_dict = {
-                "nickname": pokemon.nickname,
-                "species": pokemon.species_name,
-                "level": pokemon.level,
-                "hp": {
-                    "current": pokemon.current_hp,
-                    "max": pokemon.max_hp
-                },
-                "types": [pokemon.type1.name] + ([pokemon.type2.name] if pokemon.type2 else []),
-                "moves": [{"name": move, "pp": pp} for move, pp in zip(pokemon.moves, pokemon.move_pp, strict=True)],
-                "status": None if pokemon.status == StatusCondition.NONE else pokemon.status.get_status_name()
-            }
-            memory_dict["pokemons"].append(pokemon_dict)
             
         return memory_dict
 
@@ -5,10 +5,14 @@ import io
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 
+import numpy as np
 from PIL import Image
 
 from pokemon_env.emulator import Emulator
-from pokemon_env.action import Action, ActionType, PressKey, Wait
+from pokemon_env.events import EventRecorder
+from pokemon_env.action import Action, ActionType, PressKey, Wait, WaitUntil
+from pokemon_env.fork import EnvironmentFork, fork_environment
+from pokemon_env.wram_diff import WramDiffer, encode_wram_diff
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +53,10 @@ class GameState:
 class PokemonEnvironment:
     """Environment for Pokemon Red that provides a clean interface for agents."""
     
-    def __init__(self, rom_path: str, headless: bool = True, sound: bool = False):
+    def __init__(self, rom_path: str, headless: bool = True, sound: bool = False,
+                 emulator: Optional[Emulator] = None, adaptive_press: bool = False,
+                 auto_advance_dialog: bool = False, fast_options: bool = False,
+                 capture_events: bool = False, wram_diff: bool = False):
         """
         Initialize the Pokemon environment.
         
@@ -57,15 +64,44 @@ class PokemonEnvironment:
             rom_path: Path to the Pokemon ROM file
             headless: Whether to run without display
             sound: Whether to enable sound
+            emulator: An already constructed emulator to use instead of booting the ROM
+            adaptive_press: End each button press as soon as the game can accept input
+                again (at most the usual 120 frames)
+            auto_advance_dialog: After each action, press A through text boxes that
+                only wait to be read, until a choice, a menu or free movement
+            fast_options: Keep the in-game options at fast text, no battle animations
+                and SET battle style (the game resets them on new game or continue)
+            capture_events: Record map, battle, dialog and HP changes frame by frame
+                while each action runs (see events.py)
+            wram_diff: Report the work RAM bytes each step changed (see wram_diff.py)
         """
-        self.emulator = Emulator(rom_path, headless, sound)
+        self.emulator = emulator if emulator is not None else Emulator(rom_path, headless, sound)
+        self.emulator.adaptive_press = adaptive_press
+        self.auto_advance_dialog = auto_advance_dialog
+        self.fast_options = fast_options
+        self.event_recorder = None
+        if capture_events:
+            self.event_recorder = EventRecorder(self.emulator.pyboy.memory)
+            self.emulator.frame_hooks.append(self.event_recorder.sample)
         self.emulator.initialize()
+        # Booting overwrites WRAM, so the options can only be set once it is done
+        if fast_options:
+            self.emulator.apply_fast_options()
+        self.wram_differ = WramDiffer(self.emulator.pyboy.memory) if wram_diff else None
+        # WRAM ranges the most recent step changed, when wram_diff is on
+        self.last_wram_diff: List[Tuple[int, bytes]] = []
         logger.info("emulator initialized")
         # Store gameplay information
         self.steps_taken = 0
         self.game_history: Dict[int, Dict] = {}
         self.action_times: Dict[int, float] = {}
         
+        # Server-side cost of the most recent step: seconds per phase and frames emulated
+        self.last_step_timings: Dict[str, float] = {}
+        self.last_step_frames = 0
+        # What the most recent action reported, e.g. the condition that ended a WaitUntil
+        self.last_step_info: Dict[str, Any] = {}
+        
         # Store the current state
         self._current_state = self._get_current_state()
         logger.info("current state initialized")
@@ -82,17 +118,15 @@ class PokemonEnvironment:
         """
         # Record the start time for this action
         start_time = time.time()
+        start_frame = self.emulator.frame_count
+        self.last_step_timings = {}
         
         # Process the action based on its type
         logger.info(f"Processing action: {action}")
-        if action.action_type == ActionType.PRESS_KEY:
-            assert isinstance(action, PressKey)
-            self.emulator.press_buttons(action.keys)
-        elif action.action_type == ActionType.WAIT:
-            assert isinstance(action, Wait)
-            self.emulator.tick(action.frames)
-        else:
-            raise ValueError(f"Unknown action type: {action.action_type}")
+        emulation_start = time.perf_counter()
+        self.last_step_info = self._execute(action)
+        self.last_step_timings['emulation'] = time.perf_counter() - emulation_start
+        self.last_step_frames = self.emulator.frame_count - start_frame
         
         # Update the current state
         logger.info("updating current state")
@@ -100,6 +134,7 @@ class PokemonEnvironment:
         
         # Increment step counter
         self.steps_taken += 1
+        self._record_memory_changes()
         
         # Record action execution time
         end_time = time.time()
@@ -116,10 +151,158 @@ class PokemonEnvironment:
         
         return self._current_state
     
+    def _execute(self, action: Action) -> Dict[str, Any]:
+        """Run an action on the emulator and return what it reported."""
+        info = {}
+        if self.fast_options:
+            self.emulator.apply_fast_options()
+        if self.event_recorder:
+            self.event_recorder.start(self.emulator.frame_count)
+        if action.action_type == ActionType.PRESS_KEY:
+            assert isinstance(action, PressKey)
+            self.emulator.press_buttons(action.keys)
+        elif action.action_type == ActionType.WAIT:
+            assert isinstance(action, Wait)
+            if action.early_exit:
+                condition, frames = self.emulator.wait_for_steady(action.frames, action.steady_frames)
+                info.update(condition=condition, frames=frames)
+            else:
+                self.emulator.tick(action.frames)
+        elif action.action_type == ActionType.WAIT_UNTIL:
+            assert isinstance(action, WaitUntil)
+            condition, frames = self.emulator.wait_until(action.conditions, action.max_frames)
+            info.update(condition=condition, frames=frames)
+        else:
+            raise ValueError(f"Unknown action type: {action.action_type}")
+        
+        if self.auto_advance_dialog:
+            transcript, presses = self.emulator.advance_dialog()
+            if presses:
+                info.update(dialog_transcript=transcript, dialog_presses=presses)
+        
+        if self.event_recorder and self.event_recorder.events:
+            info['events'] = self.event_recorder.events
+        return info
+    
+    def _record_memory_changes(self) -> None:
+        """Notify subscribers of watched WRAM ranges that changed in the last step, and diff WRAM."""
+        watcher = self.emulator.watcher
+        changes = watcher.reported(watcher.check(self.emulator.frame_count))
+        if changes:
+            self.last_step_info['memory_changes'] = changes
+        else:
+            self.last_step_info.pop('memory_changes', None)
+        if self.wram_differ:
+            self.last_wram_diff = self.wram_differ.diff()
+            self.last_step_info['wram_diff'] = encode_wram_diff(self.last_wram_diff)
+    
+    def run_actions(self, actions: List[Action], include_state: bool = False) -> Dict[str, Any]:
+        """
+        Run a sequence of actions without building a full game state after each one.
+        
+        Meant for lookahead on forked environments: the steps count towards
+        steps_taken but are not recorded in the game history.
+        
+        Args:
+            actions: Actions to take in order
+            include_state: Also return the final game state (without the screenshot)
+            
+        Returns:
+            Dict with the starting step, steps and frames run, the milestone IDs after
+            every action, and the final observation vector and state hash
+        """
+        start_step = self.steps_taken
+        start_frame = self.emulator.frame_count
+        milestone_ids = []
+        for action in actions:
+            self._execute(action)
+            self.steps_taken += 1
+            milestone_ids.append(self.get_milestone_ids())
+        
+        result = {
+            'start_step': start_step,
+            'steps': len(actions),
+            'frames': self.emulator.frame_count - start_frame,
+            'milestone_ids': milestone_ids,
+            'observation': self.get_observation(),
+            'state_hash': self.get_state_hash(),
+        }
+        if include_state:
+            self._current_state = self._get_current_state()
+            result['state'] = {
+                name: value for name, value in self._current_state.__dict__.items() if name != 'screenshot'
+            }
+        return result
+    
+    def speculate(self, action: Action) -> Dict[str, Any]:
+        """
+        Take a step and package its outcome so another copy of the environment can adopt it.
+        
+        Runs in a speculative fork (see speculation.py). Everything the server
+        computes after a step is computed here too, off the critical path.
+        
+        Args:
+            action: The action to take
+            
+        Returns:
+            Dict with the new GameState, its encoded screenshot, the collision map,
+            the frames emulated, what the action reported and the emulator state after the step
+        """
+        state = self.step(action)
+        return {
+            'state': state,
+            'screenshot_base64': state.screenshot_base64,
+            'collision_map': self.get_collision_map(),
+            'frames': self.last_step_frames,
+            'info': self.last_step_info,
+            'emulator_state': self.emulator.get_state_bytes(),
+        }
+    
+    def commit_speculation(self, action: Action, outcome: Dict[str, Any]) -> GameState:
+        """
+        Take a step by adopting its outcome, precomputed by speculate() in a fork.
+        
+        The fork started from this environment's current state, so loading its
+        emulator state is equivalent to running the action here.
+        
+        Args:
+            action: The action that was speculated
+            outcome: Result of speculate(action)
+            
+        Returns:
+            The new state after the action
+        """
+        start_time = time.time()
+        commit_start = time.perf_counter()
+        self.emulator.load_state_bytes(outcome['emulator_state'])
+        self.emulator.frame_count += outcome['frames']
+        self._current_state = outcome['state']
+        self.last_step_timings = {'speculation_commit': time.perf_counter() - commit_start}
+        self.last_step_frames = outcome['frames']
+        self.last_step_info = dict(outcome['info'])
+        
+        self.steps_taken += 1
+        # The fork notified its own copy of the subscribers; notify ours
+        self._record_memory_changes()
+        self.action_times[self.steps_taken] = time.time() - start_time
+        self.game_history[self.steps_taken] = {
+            'action': action.to_dict(),
+            'state': {
+                **self._current_state.__dict__
+            },
+            'execution_time': self.action_times[self.steps_taken]
+        }
+        
+        return self._current_state
+    
     def _get_current_state(self) -> GameState:
         """Get the current state of the game."""
+        memory_start = time.perf_counter()
         memory_info = self.emulator.get_state_from_memory()
+        screenshot_start = time.perf_counter()
         screenshot = self.emulator.get_screenshot()
+        self.last_step_timings['memory_decode'] = screenshot_start - memory_start
+        self.last_step_timings['screenshot_capture'] = time.perf_counter() - screenshot_start
         
         return GameState(
             player_name=memory_info.get('player', {}).get('name', 'UNKNOWN'),
@@ -149,6 +332,18 @@ class PokemonEnvironment:
         """Get a list of valid movement directions."""
         return self.emulator.get_valid_moves()
     
+    def get_milestone_ids(self) -> Tuple[List[int], int, int]:
+        """Get the party species IDs, badge bit field and map ID for milestone scoring."""
+        return self.emulator.get_milestone_ids()
+    
+    def get_observation(self) -> np.ndarray:
+        """Get the game state as a fixed-layout numeric vector (see pokemon_env/observation.py)."""
+        return self.emulator.get_observation()
+    
+    def get_state_hash(self) -> str:
+        """Get a fingerprint of the current game state (a hash of work RAM)."""
+        return self.emulator.get_state_hash()
+    
     def get_game_history(self) -> Dict[int, Dict]:
         """Get the entire game history."""
         return self.game_history
@@ -159,6 +354,19 @@ class PokemonEnvironment:
             return 0.0
         return sum(self.action_times.values()) / len(self.action_times)
     
+    def fork(self) -> "EnvironmentFork":
+        """
+        Clone the running environment into a child process with os.fork().
+        
+        The child starts with this environment's exact emulator state, step counter
+        and history, sharing memory with this process copy-on-write. It is much
+        faster than saving a state file and booting a new emulator for each branch.
+        
+        Returns:
+            Handle to drive the copy; close it when the branch is no longer needed
+        """
+        return fork_environment(self)
+    
     def save_state(self, state_filename: str) -> None:
         """
         Save the current environment state to a file.
@@ -181,6 +389,12 @@ class PokemonEnvironment:
         """
         self.emulator.load_state(state_filename)
         logger.info(f"Environment state loaded from {state_filename}")
+        if self.fast_options:
+            self.emulator.apply_fast_options()
+        # Loading is not a change of the game; watch and diff from the loaded values
+        self.emulator.watcher.reset()
+        if self.wram_differ:
+            self.wram_differ.reset()
         
         # Update current state after loading
         self._current_state = self._get_current_state()
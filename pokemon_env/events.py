@@ -0,0 +1,129 @@
+"""
+Per-frame capture of game events that happen while an action runs.
+
+A step only looks at the game after all of its frames have run, so anything that
+came and went in between (a page of dialog, a battle that started and ended, a map
+flicker) is invisible to the agent. An EventRecorder runs as an emulator frame
+hook: after every frame it reads a handful of WRAM bytes and records what changed.
+
+    event            fields
+    map_changed      from, to (map IDs)
+    battle_started   battle_type (1 wild, 2 trainer)
+    battle_ended     -
+    dialog_opened    -
+    dialog           text (once a text box has finished printing)
+    dialog_closed    -
+    hp_changed       slot, from, to (consecutive changes of a slot are merged)
+
+Every event has "frame", the number of frames into the action it happened at.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pokemon_env.conditions import IN_BATTLE, MAP_ID, TEXT_STABLE_FRAMES, text_box_signature
+from pokemon_env.memory_reader import PokemonRedReader
+from pokemon_env.readiness import text_box_open
+
+PARTY_COUNT = 0xD163
+PARTY_HP = 0xD16C  # Current HP (big endian) of the first party struct
+PARTY_STRUCT_SIZE = 0x2C
+
+# Events kept per action; later ones are dropped
+MAX_EVENTS = 100
+
+
+class EventRecorder:
+    """Records changes of a few WRAM fields frame by frame"""
+
+    def __init__(self, memory):
+        """
+        Args:
+            memory: PyBoy memory view
+        """
+        self.memory = memory
+        self.reader = PokemonRedReader(memory)
+        self.events: List[Dict[str, Any]] = []
+        self.start(0)
+
+    def start(self, frame: int) -> None:
+        """Forget recorded events and take the current values as the baseline."""
+        memory = self.memory
+        self.events = []
+        self._start_frame = frame
+        self._map = memory[MAP_ID]
+        self._battle = memory[IN_BATTLE]
+        self._dialog_open = text_box_open(memory)
+        self._text: Optional[bytes] = None
+        self._text_stable = 0
+        # Text already on screen when the action starts is not an event
+        self._last_dialog: Optional[str] = self.reader.read_dialog() if self._dialog_open else None
+        self._hp = self._read_hp()
+
+    def _read_hp(self) -> List[int]:
+        memory = self.memory
+        hp = []
+        for slot in range(min(memory[PARTY_COUNT], 6)):
+            address = PARTY_HP + slot * PARTY_STRUCT_SIZE
+            hp.append((memory[address] << 8) | memory[address + 1])
+        return hp
+
+    def _record(self, frame: int, event: str, **fields) -> None:
+        if len(self.events) < MAX_EVENTS:
+            self.events.append({"frame": frame - self._start_frame, "event": event, **fields})
+
+    def sample(self, frame: int) -> None:
+        """Frame hook: compare the watched fields with the previous frame."""
+        memory = self.memory
+
+        map_id = memory[MAP_ID]
+        if map_id != self._map:
+            self._record(frame, "map_changed", **{"from": self._map, "to": map_id})
+            self._map = map_id
+
+        battle = memory[IN_BATTLE]
+        if battle != self._battle:
+            if battle and not self._battle:
+                self._record(frame, "battle_started", battle_type=battle)
+            elif not battle:
+                self._record(frame, "battle_ended")
+            self._battle = battle
+
+        dialog_open = text_box_open(memory)
+        if dialog_open != self._dialog_open:
+            self._record(frame, "dialog_opened" if dialog_open else "dialog_closed")
+            self._dialog_open = dialog_open
+            self._text = None
+            self._text_stable = 0
+            if not dialog_open:
+                self._last_dialog = None
+        if dialog_open:
+            self._sample_text(frame)
+
+        hp = self._read_hp()
+        if hp != self._hp:
+            for slot in range(min(len(hp), len(self._hp))):
+                if hp[slot] != self._hp[slot]:
+                    self._record_hp(frame, slot, self._hp[slot], hp[slot])
+            self._hp = hp
+
+    def _sample_text(self, frame: int) -> None:
+        """Record the text of a text box once it has finished printing."""
+        text = text_box_signature(self.memory)
+        if text != self._text:
+            self._text = text
+            self._text_stable = 0
+            return
+        self._text_stable += 1
+        if self._text_stable == TEXT_STABLE_FRAMES:
+            dialog = self.reader.read_dialog()
+            if dialog and dialog != self._last_dialog:
+                self._record(frame, "dialog", text=dialog)
+                self._last_dialog = dialog
+
+    def _record_hp(self, frame: int, slot: int, old: int, new: int) -> None:
+        # HP bars drain one point per frame; report a drain as a single change
+        last = self.events[-1] if self.events else None
+        if last and last["event"] == "hp_changed" and last["slot"] == slot:
+            last["to"] = new
+            return
+        self._record(frame, "hp_changed", slot=slot, **{"from": old, "to": new})
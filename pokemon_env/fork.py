@@ -0,0 +1,253 @@
+"""
+Process-level forking of a running environment.
+
+fork_environment() calls os.fork(), so the child process starts with an exact copy
+of the environment: emulator state, step counters and history, without saving a
+state file or booting another PyBoy. The ROM, the decoded tables and everything
+else loaded before the fork are shared with the parent copy-on-write, so a fork
+costs a few milliseconds and little memory until the branches diverge.
+
+The child serves its environment over a connection; the parent drives it through
+the returned EnvironmentFork. Forks can be forked again, which is what tree search
+needs: branch the root once per candidate, then branch the branches.
+
+Forking is only supported on platforms with os.fork() and with a headless
+emulator (a window cannot be shared with a child process).
+"""
+
+import logging
+import os
+import signal
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any
+
+from pokemon_env.action import Action
+
+logger = logging.getLogger(__name__)
+
+
+class ForkError(RuntimeError):
+    """Raised when an environment cannot be forked or a fork stopped responding."""
+
+
+def _serve(env, conn: Connection) -> None:
+    """Child process loop: answer commands about the forked environment until closed."""
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        command = message[0]
+        try:
+            if command == "step":
+                result = env.step(message[1])
+            elif command == "call":
+                _, name, args, kwargs = message
+                if name.startswith("_"):
+                    raise AttributeError(f"Cannot call private attribute {name} of a fork")
+                attribute = getattr(env, name)
+                result = attribute(*args, **kwargs) if callable(attribute) else attribute
+            elif command == "fork":
+                result = _fork_into(env, message[1])
+            elif command == "close":
+                conn.send(("ok", None))
+                return
+            else:
+                raise ValueError(f"Unknown fork command: {command}")
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", e))
+
+
+def _fork_into(env, address) -> int:
+    """Fork the current process; the child serves env to whoever listens at address."""
+    pid = os.fork()
+    if pid != 0:
+        return pid
+
+    # Child: never return into the caller's stack (e.g. the server's event loop)
+    exit_code = 0
+    try:
+        # Signal handlers installed by the parent (e.g. uvicorn's) belong to the parent
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # Reap forks of this fork automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        # Drop inherited sockets and files (client connections, the parent's own fork
+        # connections, open logs) so they close when the parent closes them
+        os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+        # Per-step environment logging from every fork would drown the parent's log
+        logging.disable(logging.INFO)
+        conn = Client(address)
+        _serve(env, conn)
+        conn.close()
+    except BaseException:
+        exit_code = 1
+    finally:
+        # Stop without saving: the cartridge RAM belongs to the original session
+        try:
+            env.emulator.pyboy.stop(save=False)
+        except Exception:
+            pass
+        os._exit(exit_code)
+
+
+class EnvironmentFork:
+    """Handle to an environment running in a forked child process"""
+
+    def __init__(self, conn: Connection, pid: int):
+        self._conn = conn
+        self.pid = pid
+        self.closed = False
+
+    def _request(self, *message) -> Any:
+        if self.closed:
+            raise ForkError("Fork is closed")
+        try:
+            self._conn.send(message)
+        except OSError as e:
+            self.closed = True
+            raise ForkError(f"Fork {self.pid} stopped responding") from e
+        return self.result()
+
+    def step(self, action: Action):
+        """Take a step in the forked environment and return its new GameState."""
+        return self._request("step", action)
+
+    @property
+    def connection(self) -> Connection:
+        """Connection to the child, e.g. for multiprocessing.connection.wait()."""
+        return self._conn
+
+    def submit(self, name: str, *args, **kwargs) -> None:
+        """Start a call like call() without waiting for it; collect it with result()."""
+        if self.closed:
+            raise ForkError("Fork is closed")
+        try:
+            self._conn.send(("call", name, args, kwargs))
+        except OSError as e:
+            self.closed = True
+            raise ForkError(f"Fork {self.pid} stopped responding") from e
+
+    def result(self) -> Any:
+        """Wait for the result of the call started with submit()."""
+        try:
+            status, result = self._conn.recv()
+        except (EOFError, OSError) as e:
+            self.closed = True
+            raise ForkError(f"Fork {self.pid} stopped responding") from e
+        if status == "error":
+            raise result
+        return result
+
+    def call(self, name: str, *args, **kwargs) -> Any:
+        """
+        Call a public method of the forked environment, or read a public attribute.
+
+        Args:
+            name: Method or attribute name, e.g. "get_observation" or "steps_taken"
+
+        Returns:
+            The return value (or attribute value), pickled back from the child
+        """
+        return self._request("call", name, args, kwargs)
+
+    @property
+    def state(self):
+        """The forked environment's current GameState."""
+        return self.call("state")
+
+    @property
+    def steps_taken(self) -> int:
+        return self.call("steps_taken")
+
+    def get_observation(self):
+        return self.call("get_observation")
+
+    def get_state_hash(self) -> str:
+        return self.call("get_state_hash")
+
+    def get_milestone_ids(self):
+        return self.call("get_milestone_ids")
+
+    def save_state(self, state_filename: str) -> None:
+        self.call("save_state", state_filename)
+
+    def fork(self) -> "EnvironmentFork":
+        """Fork this fork: the new child starts from this fork's current state."""
+        listener = Listener(family="AF_UNIX")
+        try:
+            pid = self._request("fork", listener.address)
+            return EnvironmentFork(listener.accept(), pid)
+        finally:
+            listener.close()
+
+    def close(self) -> None:
+        """Stop the child process and reap it."""
+        if self.closed:
+            return
+        try:
+            self._request("close")
+        except ForkError:
+            pass
+        self.closed = True
+        self._conn.close()
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            # Forks of forks are children of their parent fork, which reaps them on exit
+            pass
+
+    def kill(self) -> None:
+        """Stop the child process immediately, without waiting for a call it is running."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self._conn.close()
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def fork_environment(env) -> EnvironmentFork:
+    """
+    Fork a running environment into a child process.
+
+    Args:
+        env: PokemonEnvironment to clone
+
+    Returns:
+        Handle to the independent copy running in the child
+
+    Raises:
+        ForkError: If the platform cannot fork or the emulator has a window
+    """
+    if not hasattr(os, "fork"):
+        raise ForkError("Forking requires os.fork(), which this platform does not provide")
+    if not getattr(env.emulator, "headless", True):
+        raise ForkError("Only headless environments can be forked")
+
+    listener = Listener(family="AF_UNIX")
+    try:
+        pid = _fork_into(env, listener.address)
+        return EnvironmentFork(listener.accept(), pid)
+    finally:
+        listener.close()
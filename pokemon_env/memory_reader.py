@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from enum import IntEnum, IntFlag
 
+from .observation import build_observation
+
 
 class StatusCondition(IntFlag):
     NONE = 0
@@ -255,7 +257,7 @@ class Pokemon(IntEnum):
     NIDORINA = 0xA8
     GEODUDE = 0xA9
     PORYGON = 0xAA
-    AERODACTYL = 0xABAA
+    AERODACTYL = 0xAB
     MISSINGNO_AC = 0xAC
     MAGNEMITE = 0xAD
     MISSINGNO_AE = 0xAE
@@ -899,10 +901,20 @@ class PokemonRedReader:
 
         return badges
 
+    def read_badge_byte(self) -> int:
+        """Read the obtained badges bit field"""
+        return self.memory[0xD356]
+
     def read_party_size(self) -> int:
         """Read number of Pokemon in party"""
         return self.memory[0xD163]
 
+    def read_party_species_ids(self) -> list[int]:
+        """Read the species ID of each party Pokemon without decoding the rest of the data"""
+        base_addresses = [0xD16B, 0xD197, 0xD1C3, 0xD1EF, 0xD21B, 0xD247]
+        party_size = min(self.read_party_size(), len(base_addresses))
+        return [self.memory[base_addresses[i]] for i in range(party_size)]
+
     def read_party_pokemon(self) -> list[PokemonData]:
         """Read all Pokemon currently in the party with full data"""
         party = []
@@ -975,9 +987,13 @@ class PokemonRedReader:
         seconds = self.memory[0xDA44]
         return (hours, minutes, seconds)
 
+    def read_map_id(self) -> int:
+        """Read current map ID"""
+        return self.memory[0xD35E]
+
     def read_location(self) -> str:
         """Read current location name"""
-        map_id = self.memory[0xD35E]
+        map_id = self.read_map_id()
         return MapLocation(map_id).name.replace("_", " ")
 
     def read_tileset(self) -> str:
@@ -1192,6 +1208,10 @@ class PokemonRedReader:
 
         return text
 
+    def read_observation(self, out=None):
+        """Read the fixed-layout numeric observation vector (see observation.py for the schema)"""
+        return build_observation(self.memory, out)
+
     def read_pokedex_caught_count(self) -> int:
         """Read how many unique Pokemon species have been caught"""
         # Pokedex owned flags are stored in D2F7-D309
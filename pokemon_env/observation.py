@@ -0,0 +1,175 @@
+"""
+Fixed-layout numeric observation of the game state, read straight from WRAM.
+
+build_observation() packs the state agents and evaluators care about into a flat
+int32 vector without decoding names or building dicts, so it is cheap enough to
+compute every step. It can be fed to learned agents, compared across branches, or
+hashed (obs.tobytes()) to deduplicate states.
+
+The layout is OBSERVATION_FIELDS, in order. Party fields are grouped by field
+rather than by slot (party_level holds the levels of slots 0-5), and move and PP
+fields hold four entries per slot. Empty party and item slots are zero.
+
+    field              len  contents
+    map_id               1  Current map (MapLocation value)
+    x, y                 1  Player coordinates on the map
+    tileset              1  Current tileset (Tileset value)
+    money                1  Money, decoded from BCD
+    badges               8  1 per badge obtained, BOULDER first (Badge bit order)
+    party_size           1  Number of party Pokemon
+    party_species        6  Species IDs (Pokemon value)
+    party_level          6  Levels
+    party_hp             6  Current HP
+    party_max_hp         6  Maximum HP
+    party_status         6  Raw status byte (StatusCondition flags)
+    party_moves         24  Move IDs (Move value), 4 per slot
+    party_pp            24  Current PP (PP-up bits removed), 4 per slot
+    item_count           1  Number of bag items
+    item_ids            20  Item IDs
+    item_quantities     20  Item quantities
+    text_box_open        1  1 if the bottom text box is drawn
+    cursor_visible       1  1 if a menu cursor (▷ or ▶) is on screen
+    battle_type          1  0 no battle, 1 wild, 2 trainer, 255 battle lost
+    enemy_species        1  Species of the opponent's active Pokemon (in battle)
+    enemy_level          1  Level of the opponent's active Pokemon
+    enemy_hp             1  Current HP of the opponent's active Pokemon
+    enemy_max_hp         1  Maximum HP of the opponent's active Pokemon
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from pokemon_env.readiness import BORDER_TOP_LEFT, CURSOR_TILES, TEXT_BOX_CORNER, TILEMAP_END, TILEMAP_START
+
+PARTY_SLOTS = 6
+PARTY_STRUCT_SIZE = 0x2C
+MOVE_SLOTS = 4
+ITEM_SLOTS = 20
+
+# (name, length) in layout order
+OBSERVATION_FIELDS = [
+    ("map_id", 1),
+    ("x", 1),
+    ("y", 1),
+    ("tileset", 1),
+    ("money", 1),
+    ("badges", 8),
+    ("party_size", 1),
+    ("party_species", PARTY_SLOTS),
+    ("party_level", PARTY_SLOTS),
+    ("party_hp", PARTY_SLOTS),
+    ("party_max_hp", PARTY_SLOTS),
+    ("party_status", PARTY_SLOTS),
+    ("party_moves", PARTY_SLOTS * MOVE_SLOTS),
+    ("party_pp", PARTY_SLOTS * MOVE_SLOTS),
+    ("item_count", 1),
+    ("item_ids", ITEM_SLOTS),
+    ("item_quantities", ITEM_SLOTS),
+    ("text_box_open", 1),
+    ("cursor_visible", 1),
+    ("battle_type", 1),
+    ("enemy_species", 1),
+    ("enemy_level", 1),
+    ("enemy_hp", 1),
+    ("enemy_max_hp", 1),
+]
+
+# Name -> slice of the observation vector
+OBSERVATION_SLICES: Dict[str, slice] = {}
+_offset = 0
+for _name, _length in OBSERVATION_FIELDS:
+    OBSERVATION_SLICES[_name] = slice(_offset, _offset + _length)
+    _offset += _length
+OBSERVATION_SIZE = _offset
+del _offset, _name, _length
+
+OBSERVATION_DTYPE = np.int32
+
+# WRAM regions read in one slice each
+_PLAYER_START, _PLAYER_END = 0xD347, 0xD368  # Money .. tileset
+_PARTY_COUNT = 0xD163
+_PARTY_START = 0xD16B
+_ITEMS_START = 0xD31D
+_ENEMY_START, _ENEMY_END = 0xCFE5, 0xCFF6
+_IN_BATTLE = 0xD057
+
+_SLICE = OBSERVATION_SLICES
+
+
+def _bcd(byte: int) -> int:
+    return (byte >> 4) * 10 + (byte & 0xF)
+
+
+def build_observation(memory, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Build the observation vector from game memory.
+
+    Args:
+        memory: PyBoy memory view (or anything indexable the same way)
+        out: Optional int32 array of OBSERVATION_SIZE to write into
+
+    Returns:
+        The observation vector (out, if given)
+    """
+    if out is None:
+        out = np.zeros(OBSERVATION_SIZE, dtype=OBSERVATION_DTYPE)
+    else:
+        out[:] = 0
+
+    player = memory[_PLAYER_START:_PLAYER_END]
+    out[_SLICE["map_id"]] = player[0xD35E - _PLAYER_START]
+    out[_SLICE["x"]] = player[0xD362 - _PLAYER_START]
+    out[_SLICE["y"]] = player[0xD361 - _PLAYER_START]
+    out[_SLICE["tileset"]] = player[0xD367 - _PLAYER_START]
+    out[_SLICE["money"]] = _bcd(player[0]) * 10000 + _bcd(player[1]) * 100 + _bcd(player[2])
+    badge_byte = player[0xD356 - _PLAYER_START]
+    out[_SLICE["badges"]] = [(badge_byte >> bit) & 1 for bit in range(8)]
+
+    party_size = min(memory[_PARTY_COUNT], PARTY_SLOTS)
+    out[_SLICE["party_size"]] = party_size
+    if party_size:
+        party = np.array(memory[_PARTY_START:_PARTY_START + party_size * PARTY_STRUCT_SIZE],
+                         dtype=OBSERVATION_DTYPE).reshape(party_size, PARTY_STRUCT_SIZE)
+        out[_SLICE["party_species"].start:_SLICE["party_species"].start + party_size] = party[:, 0]
+        out[_SLICE["party_level"].start:_SLICE["party_level"].start + party_size] = party[:, 0x21]
+        out[_SLICE["party_hp"].start:_SLICE["party_hp"].start + party_size] = (party[:, 1] << 8) | party[:, 2]
+        out[_SLICE["party_max_hp"].start:_SLICE["party_max_hp"].start + party_size] = \
+            (party[:, 0x22] << 8) | party[:, 0x23]
+        out[_SLICE["party_status"].start:_SLICE["party_status"].start + party_size] = party[:, 4]
+        moves_end = _SLICE["party_moves"].start + party_size * MOVE_SLOTS
+        out[_SLICE["party_moves"].start:moves_end] = party[:, 8:12].ravel()
+        pp_end = _SLICE["party_pp"].start + party_size * MOVE_SLOTS
+        out[_SLICE["party_pp"].start:pp_end] = (party[:, 0x1D:0x21] & 0x3F).ravel()
+
+    items = memory[_ITEMS_START:_ITEMS_START + 1 + ITEM_SLOTS * 2]
+    item_count = min(items[0], ITEM_SLOTS)
+    out[_SLICE["item_count"]] = item_count
+    if item_count:
+        out[_SLICE["item_ids"].start:_SLICE["item_ids"].start + item_count] = items[1:1 + item_count * 2:2]
+        out[_SLICE["item_quantities"].start:_SLICE["item_quantities"].start + item_count] = \
+            items[2:2 + item_count * 2:2]
+
+    tilemap = memory[TILEMAP_START:TILEMAP_END]
+    out[_SLICE["text_box_open"]] = tilemap[TEXT_BOX_CORNER - TILEMAP_START] == BORDER_TOP_LEFT
+    out[_SLICE["cursor_visible"]] = any(tile in tilemap for tile in CURSOR_TILES)
+
+    battle_type = memory[_IN_BATTLE]
+    out[_SLICE["battle_type"]] = battle_type
+    if battle_type:
+        enemy = memory[_ENEMY_START:_ENEMY_END]
+        out[_SLICE["enemy_species"]] = enemy[0]
+        out[_SLICE["enemy_hp"]] = (enemy[1] << 8) | enemy[2]
+        out[_SLICE["enemy_level"]] = enemy[0xCFF3 - _ENEMY_START]
+        out[_SLICE["enemy_max_hp"]] = (enemy[0xCFF4 - _ENEMY_START] << 8) | enemy[0xCFF5 - _ENEMY_START]
+
+    return out
+
+
+def observation_to_dict(observation: np.ndarray) -> Dict[str, object]:
+    """Split an observation vector into its named fields, for debugging and logging."""
+    fields = {}
+    for name, length in OBSERVATION_FIELDS:
+        values = observation[OBSERVATION_SLICES[name]]
+        fields[name] = int(values[0]) if length == 1 else values.tolist()
+    return fields
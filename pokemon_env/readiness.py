@@ -0,0 +1,97 @@
+"""
+Detection of when the game can accept input again, read from WRAM.
+
+After a button press the game is busy for a variable number of frames: a step
+takes 16 frames, a menu opens in a few, a line of dialog prints letter by letter.
+InputReadyDetector is updated once per frame and reports the game as ready once
+all of the following hold:
+
+    - the player is not mid-step (walk counter at 0xCFC5 is 0)
+    - joypad input is not being ignored (0xCD6B is 0)
+    - no scripted movement or simulated input is running (bits 0, 5 and 7 of 0xD730)
+    - the tilemap and palettes have not changed for `stable_frames` frames, so text
+      has finished printing and transitions and animations are over
+
+The blinking ▼ prompt of a text box waiting for a button is ignored when
+comparing tilemaps. Sprites are not compared: NPCs wander on their own.
+"""
+
+WALK_COUNTER = 0xCFC5
+JOY_IGNORE = 0xCD6B
+STATUS_FLAGS = 0xD730
+BUSY_STATUS_FLAGS = 0xA1  # Scripted NPC movement, ignore input, simulated joypad
+
+TILEMAP_START, TILEMAP_END = 0xC3A0, 0xC508
+TEXT_BOX_CORNER = 0xC3A0 + 12 * 20  # Top-left tile of the bottom text box
+BORDER_TOP_LEFT = 0x79
+PROMPT_ARROW = 0xC3A0 + 16 * 20 + 18  # Where the ▼ of a text box blinks
+CURSOR_TILES = (0xEC, 0xED)  # ▷ and ▶ menu cursors
+PALETTES_START, PALETTES_END = 0xFF47, 0xFF4A  # BGP, OBP0, OBP1
+OAM_START, OAM_END = 0xFE00, 0xFEA0  # Sprite attributes
+# Map, player coordinates, battle flag and the input-blocking fields
+KEY_FIELDS = (0xD35E, 0xD361, 0xD362, 0xD057, WALK_COUNTER, JOY_IGNORE, STATUS_FLAGS)
+
+# Frames without screen changes after which the game counts as waiting for input
+STABLE_FRAMES = 16
+
+
+def input_blocked(memory) -> bool:
+    """Whether the game is ignoring input: walking, in a script or with input disabled."""
+    return bool(memory[WALK_COUNTER] or memory[JOY_IGNORE] or memory[STATUS_FLAGS] & BUSY_STATUS_FLAGS)
+
+
+def text_box_open(memory) -> bool:
+    """Whether the bottom text box is drawn."""
+    return memory[TEXT_BOX_CORNER] == BORDER_TOP_LEFT
+
+
+def menu_cursor_visible(memory) -> bool:
+    """Whether a menu or choice cursor is on screen."""
+    tilemap = memory[TILEMAP_START:TILEMAP_END]
+    return any(tile in tilemap for tile in CURSOR_TILES)
+
+
+def screen_signature(memory) -> bytes:
+    """Tilemap (without the ▼ prompt) and palettes, to compare screens between frames."""
+    tilemap = bytearray(memory[TILEMAP_START:TILEMAP_END])
+    tilemap[PROMPT_ARROW - TILEMAP_START] = 0
+    return bytes(tilemap) + bytes(memory[PALETTES_START:PALETTES_END])
+
+
+def steady_signature(memory) -> bytes:
+    """Screen, sprites and key WRAM fields, to tell when nothing in the game moves any more."""
+    return screen_signature(memory) + bytes(memory[OAM_START:OAM_END]) + bytes(memory[a] for a in KEY_FIELDS)
+
+
+class InputReadyDetector:
+    """Tracks, frame by frame, whether the game has settled and waits for input"""
+
+    def __init__(self, memory, stable_frames: int = STABLE_FRAMES):
+        """
+        Args:
+            memory: PyBoy memory view
+            stable_frames: Frames the screen must stay unchanged
+        """
+        self.memory = memory
+        self.stable_frames = stable_frames
+        self.reset()
+
+    def reset(self) -> None:
+        """Start over, e.g. after pressing a button."""
+        self._signature = None
+        self.stable = 0
+
+    def update(self) -> bool:
+        """
+        Sample the current frame.
+
+        Returns:
+            True if the game is ready for input
+        """
+        signature = screen_signature(self.memory)
+        if signature == self._signature and not input_blocked(self.memory):
+            self.stable += 1
+        else:
+            self.stable = 0
+        self._signature = signature
+        return self.stable >= self.stable_frames
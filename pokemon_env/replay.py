@@ -0,0 +1,361 @@
+"""
+Deterministic replay of recorded gameplay sessions.
+
+A session's gameplay_data.csv records every action the agent took. Each
+/initialize starts a new segment of the log, and the server saves the emulator
+state that segment started from (initial_state.state, initial_state_1.state,
+...). Replaying a segment loads that state and re-executes the logged actions
+headless at unlimited emulation speed. Button presses and waits advance a fixed
+number of frames, so the replay reaches exactly the states the agent saw.
+
+Each replayed step is checked against the log: against the work RAM hash in the
+state_hash column when the log has one, otherwise against the logged state fields.
+The replay regenerates the per-step states (replay_data.csv), optionally the
+screenshots, and the evaluator score, without re-running the agent.
+
+    python -m pokemon_env.replay gameplay_sessions/session_20250404_180209 --rom Pokemon_Red.gb
+    python -m pokemon_env.replay "gameplay_sessions/*" --workers 8 --screenshots
+"""
+
+import ast
+import csv
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from evaluator.evaluate import PokemonEvaluator
+from pokemon_env.action import PressKey, Wait, WaitUntil
+from pokemon_env.environment import GameState, PokemonEnvironment
+
+logger = logging.getLogger(__name__)
+
+SESSION_LOG_FILENAME = "gameplay_data.csv"
+REPLAY_DIRNAME = "replay"
+REPLAY_LOG_FILENAME = "replay_data.csv"
+REPLAY_RESULT_FILENAME = "replay_result.json"
+SESSION_METADATA_FILENAME = "session_metadata.json"  # Settings each segment ran with, written by the server
+
+# InitializeRequest flags that change how steps run, passed on to PokemonEnvironment
+SESSION_SETTINGS = ['adaptive_press', 'auto_advance_dialog', 'fast_options']
+
+# State fields written to the session log, compared when the log has no state_hash column
+LOGGED_STATE_FIELDS = ['badges', 'inventory', 'location', 'money', 'coordinates', 'pokemons', 'dialog']
+
+
+def initial_state_filename(segment: int) -> str:
+    """Name of the state file a session segment (one /initialize) starts from."""
+    return "initial_state.state" if segment == 0 else f"initial_state_{segment}.state"
+
+
+def load_segment_settings(session_dir: str) -> Dict[int, Dict[str, bool]]:
+    """
+    Read the settings each segment of a session ran with from its session_metadata.json.
+
+    Args:
+        session_dir: Session directory
+
+    Returns:
+        SESSION_SETTINGS values by segment number; empty if the session has no metadata
+    """
+    metadata_path = os.path.join(session_dir, SESSION_METADATA_FILENAME)
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    return {entry["segment"]: entry.get("settings", {}) for entry in metadata.get("segments", [])}
+
+
+def logged_state_fields(state: GameState) -> Dict[str, str]:
+    """Render a game state's fields the way the server writes them to the session log."""
+    return {
+        'badges': str(state.badges),
+        'inventory': str(state.inventory),
+        'location': state.location,
+        'money': str(state.money),
+        'coordinates': str(list(state.coordinates)),
+        'pokemons': str(state.pokemons),
+        'dialog': state.dialog or '',
+    }
+
+
+def fields_hash(fields: Dict[str, str]) -> str:
+    """Hash of the logged state fields, for logs recorded without a state_hash column."""
+    payload = json.dumps({name: fields.get(name) or '' for name in LOGGED_STATE_FIELDS}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def parse_action(row: Dict[str, str]):
+    """
+    Rebuild the action of a logged step.
+
+    Args:
+        row: Session log row with action_type and action_details
+
+    Returns:
+        PressKey, Wait or WaitUntil action
+    """
+    details = ast.literal_eval(row['action_details'])
+    if row['action_type'] == "press_key":
+        return PressKey(keys=details["keys"])
+    if row['action_type'] == "wait":
+        return Wait(frames=details["frames"], early_exit=details.get("early_exit", False),
+                    steady_frames=details.get("steady_frames", 16))
+    if row['action_type'] == "wait_until":
+        return WaitUntil(conditions=details["conditions"], max_frames=details["max_frames"])
+    raise ValueError(f"Cannot replay action type: {row['action_type']}")
+
+
+def split_segments(rows: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+    """Split log rows into segments, each starting at an initialize row."""
+    segments = []
+    for row in rows:
+        if row['action_type'] == "initialize" or not segments:
+            segments.append([])
+        segments[-1].append(row)
+    return segments
+
+
+class SessionReplayer:
+    """Re-executes a recorded session and checks every step against its log."""
+
+    def __init__(self, session_dir: str, rom_path: str, output_dir: Optional[str] = None,
+                 save_screenshots: bool = False, stop_on_divergence: bool = True):
+        """
+        Set up a replay.
+
+        Args:
+            session_dir: Session directory containing gameplay_data.csv and initial states
+            rom_path: Path to the Pokemon ROM file
+            output_dir: Where replay outputs go (default: <session_dir>/replay)
+            save_screenshots: Whether to regenerate a screenshot for every step
+            stop_on_divergence: Skip the rest of a segment once it diverges from the log
+        """
+        self.session_dir = session_dir
+        self.rom_path = rom_path
+        self.output_dir = output_dir or os.path.join(session_dir, REPLAY_DIRNAME)
+        self.save_screenshots = save_screenshots
+        self.stop_on_divergence = stop_on_divergence
+        self.segment_settings = load_segment_settings(session_dir)
+
+    def _start_segment(self, segment: int, first_row: Dict[str, str]) -> Optional[PokemonEnvironment]:
+        """Create an environment at the state a segment started from, or None if unknown."""
+        details = first_row['action_details']
+        # Steps only take the same frames if the session's input settings are the same.
+        # Sessions recorded before the settings existed have no metadata and ran without them.
+        recorded = self.segment_settings.get(segment, {})
+        settings = {name: bool(recorded.get(name, False)) for name in SESSION_SETTINGS}
+        state_path = os.path.join(self.session_dir, initial_state_filename(segment))
+        if os.path.exists(state_path):
+            env = PokemonEnvironment(self.rom_path, headless=True, **settings)
+            env.load_state(state_path)
+        elif segment == 0 and first_row['action_type'] == "initialize" \
+                and "load_state_file=None" in details \
+                and "load_autosave=False" in details \
+                and "session_id=None" in details:
+            # A fresh boot is deterministic: the server constructs the environment and initializes it again
+            env = PokemonEnvironment(self.rom_path, headless=True, **settings)
+            env.emulator.initialize()
+        else:
+            return None
+        env.emulator.pyboy.set_emulation_speed(0)
+        return env
+
+    def _check(self, env: PokemonEnvironment, row: Dict[str, str], fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Compare the replayed state with a log row, returning the divergence if any."""
+        if row.get('state_hash'):
+            actual = env.get_state_hash()
+            if actual == row['state_hash']:
+                return None
+            expected = row['state_hash']
+        else:
+            actual = fields_hash(fields)
+            expected = fields_hash(row)
+            if actual == expected:
+                return None
+        return {
+            "step": int(row['step_number']),
+            "expected_hash": expected,
+            "actual_hash": actual,
+            "fields": [name for name in LOGGED_STATE_FIELDS if (row.get(name) or '') != fields[name]],
+        }
+
+    def replay(self) -> Dict[str, Any]:
+        """
+        Replay every segment of the session.
+
+        Returns:
+            dict: Replay result with per-segment outcomes, divergences and the regenerated score
+        """
+        with open(os.path.join(self.session_dir, SESSION_LOG_FILENAME), 'r', newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        images_dir = os.path.join(self.output_dir, "images")
+        if self.save_screenshots:
+            os.makedirs(images_dir, exist_ok=True)
+
+        evaluator = PokemonEvaluator(verbose=False)
+        segments = []
+        divergences = []
+        steps_replayed = 0
+        frames = 0
+        start_time = time.perf_counter()
+
+        fieldnames = ['segment', 'step_number', 'action_type', 'action_details', *LOGGED_STATE_FIELDS,
+                      'score', 'frame_count', 'state_hash', 'matches_log']
+        with open(os.path.join(self.output_dir, REPLAY_LOG_FILENAME), 'w', newline='') as out:
+            writer = csv.DictWriter(out, fieldnames=fieldnames)
+            writer.writeheader()
+
+            for index, segment_rows in enumerate(split_segments(rows)):
+                outcome = {"segment": index, "rows": len(segment_rows), "replayed": 0, "status": "ok"}
+                segments.append(outcome)
+                env = self._start_segment(index, segment_rows[0])
+                if env is None:
+                    outcome["status"] = "missing_initial_state"
+                    logger.warning(f"{self.session_dir}: no initial state for segment {index}, skipping it")
+                    continue
+
+                try:
+                    for row in segment_rows:
+                        if row['action_type'] != "initialize":
+                            env.step(parse_action(row))
+                        state = env.state
+                        fields = logged_state_fields(state)
+                        score_before = evaluator.total_score
+                        evaluator.evaluate_ids(*env.get_milestone_ids(), step=int(row['step_number']),
+                                               frame=env.emulator.frame_count)
+                        divergence = self._check(env, row, fields)
+
+                        writer.writerow({
+                            'segment': index,
+                            'step_number': row['step_number'],
+                            'action_type': row['action_type'],
+                            'action_details': row['action_details'],
+                            **fields,
+                            'score': score_before,
+                            'frame_count': env.emulator.frame_count,
+                            'state_hash': env.get_state_hash(),
+                            'matches_log': divergence is None,
+                        })
+                        if self.save_screenshots:
+                            state.screenshot.save(os.path.join(images_dir, f"segment{index}_step_{row['step_number']}.png"))
+
+                        outcome["replayed"] += 1
+                        if divergence:
+                            divergence["segment"] = index
+                            divergences.append(divergence)
+                            outcome["status"] = "diverged"
+                            if self.stop_on_divergence:
+                                break
+                finally:
+                    steps_replayed += outcome["replayed"]
+                    frames += env.emulator.frame_count
+                    # Don't write the cartridge RAM next to the ROM from every worker
+                    env.emulator.pyboy.stop(save=False)
+
+        elapsed = time.perf_counter() - start_time
+        result = {
+            "session": os.path.basename(os.path.abspath(self.session_dir)),
+            "session_dir": self.session_dir,
+            "deterministic": not divergences and all(s["status"] == "ok" for s in segments),
+            "segments": segments,
+            "steps_replayed": steps_replayed,
+            "divergences": divergences,
+            "total_score": evaluator.total_score,
+            "pokemon": sorted(evaluator.pokemon_seen),
+            "badges": sorted(evaluator.badges_earned),
+            "locations": sorted(evaluator.locations_visited),
+            "elapsed_seconds": elapsed,
+            "frames_emulated": frames,
+            "frames_per_second": frames / elapsed if elapsed > 0 else 0.0,
+        }
+        with open(os.path.join(self.output_dir, REPLAY_RESULT_FILENAME), 'w') as f:
+            json.dump(result, f, indent=2)
+        return result
+
+
+def replay_session(session_dir: str, rom_path: str, save_screenshots: bool = False,
+                   stop_on_divergence: bool = True) -> Dict[str, Any]:
+    """Replay one session; runs inside a worker process."""
+    replayer = SessionReplayer(session_dir, rom_path, save_screenshots=save_screenshots,
+                               stop_on_divergence=stop_on_divergence)
+    return replayer.replay()
+
+
+def replay_sessions(session_dirs: List[str], rom_path: str, workers: Optional[int] = None,
+                    save_screenshots: bool = False, stop_on_divergence: bool = True) -> List[Dict[str, Any]]:
+    """
+    Replay many sessions in parallel, one emulator per worker process.
+
+    Args:
+        session_dirs: Session directories to replay
+        rom_path: Path to the Pokemon ROM file
+        workers: Number of worker processes (default: number of CPUs)
+        save_screenshots: Whether to regenerate a screenshot for every step
+        stop_on_divergence: Skip the rest of a segment once it diverges from the log
+
+    Returns:
+        Replay results in the order the sessions finished
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(replay_session, session_dir, rom_path, save_screenshots, stop_on_divergence): session_dir
+            for session_dir in session_dirs
+        }
+        for future in as_completed(futures):
+            session_dir = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Error replaying {session_dir}: {e}")
+                continue
+            results.append(result)
+            status = "deterministic" if result["deterministic"] else f"{len(result['divergences'])} divergence(s)"
+            logger.info(f"{result['session']}: {result['steps_replayed']} steps, score {result['total_score']:.2f}, "
+                        f"{result['frames_per_second']:.0f} frames/s, {status}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from evaluator.bulk import find_session_logs
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    # Per-step environment logging would dominate the replay output
+    logging.getLogger("pokemon_env.environment").setLevel(logging.WARNING)
+    logging.getLogger("pokemon_env.emulator").setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Replay recorded Pokemon gameplay sessions headless")
+    parser.add_argument("sessions", nargs="+",
+                        help="Session directories, a directory of sessions, or globs (quote them)")
+    parser.add_argument("--rom", default="Pokemon_Red.gb", help="Path to the Pokemon ROM file")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--screenshots", action="store_true", help="Regenerate a screenshot for every step")
+    parser.add_argument("--keep-going", action="store_true",
+                        help="Keep replaying a segment after it diverges from the log")
+    parser.add_argument("--summary", help="Write all replay results to this JSON file")
+
+    args = parser.parse_args()
+
+    session_dirs = sorted({os.path.dirname(path) for pattern in args.sessions for path in find_session_logs(pattern)})
+    if not session_dirs:
+        raise SystemExit("No session logs found")
+
+    results = replay_sessions(session_dirs, args.rom, workers=args.workers, save_screenshots=args.screenshots,
+                              stop_on_divergence=not args.keep_going)
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    diverged = [result for result in results if not result["deterministic"]]
+    print(f"Replayed {len(results)} session(s), {len(diverged)} not reproduced exactly")
+    if diverged or len(results) < len(session_dirs):
+        raise SystemExit(1)
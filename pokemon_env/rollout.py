@@ -0,0 +1,104 @@
+"""
+Parallel rollouts of candidate action sequences for lookahead agents.
+
+rollout() runs K action sequences from an environment's current state, each in its
+own fork (see fork.py), with up to `workers` forks running at the same time. The
+environment itself is never stepped. Each branch reports its final compact
+observation and state hash, the milestones it reached and its score delta,
+computed with a copy of the caller's evaluator so milestones already earned are
+not counted again.
+"""
+
+import copy
+import os
+import time
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from evaluator.evaluate import PokemonEvaluator
+from pokemon_env.action import Action
+
+
+def score_branch(trace: Dict[str, Any], evaluator: Optional[PokemonEvaluator] = None) -> Dict[str, Any]:
+    """
+    Score the milestones a branch reached against a copy of an evaluator.
+
+    Args:
+        trace: Result of PokemonEnvironment.run_actions
+        evaluator: Evaluator holding the milestones reached before the branch
+
+    Returns:
+        The milestones first reached in the branch and the score they add
+    """
+    branch = copy.deepcopy(evaluator) if evaluator else PokemonEvaluator(verbose=False)
+    branch.verbose = False
+    score_before = branch.total_score
+    timeline_before = len(branch.milestone_timeline)
+    for offset, ids in enumerate(trace['milestone_ids'], start=1):
+        branch.evaluate_ids(*ids, step=trace['start_step'] + offset)
+    return {
+        'milestones': [
+            {'category': entry['category'], 'name': entry['name'], 'score': entry['score'], 'step': entry['step']}
+            for entry in branch.milestone_timeline[timeline_before:]
+        ],
+        'score_delta': branch.total_score - score_before,
+    }
+
+
+def rollout(env, action_sequences: Sequence[Sequence[Action]], evaluator: Optional[PokemonEvaluator] = None,
+            workers: Optional[int] = None, include_state: bool = False) -> List[Dict[str, Any]]:
+    """
+    Run candidate action sequences in parallel from the environment's current state.
+
+    Args:
+        env: PokemonEnvironment (or EnvironmentFork) to branch from; it is not modified
+        action_sequences: K sequences of actions, one per branch
+        evaluator: Evaluator of the live session, used to score what each branch adds
+        workers: Maximum branches running at once (default: number of CPUs)
+        include_state: Also return each branch's final game state (without screenshot)
+
+    Returns:
+        One result per sequence, in input order, with the branch's steps, frames,
+        observation (list), state_hash, milestones, score_delta and elapsed_seconds,
+        plus state when requested. A branch that failed has an error instead.
+    """
+    workers = workers or os.cpu_count() or 1
+    results: List[Optional[Dict[str, Any]]] = [None] * len(action_sequences)
+    pending = list(enumerate(action_sequences))
+    running = {}
+
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                index, actions = pending.pop(0)
+                fork = env.fork()
+                fork.submit("run_actions", list(actions), include_state)
+                running[fork.connection] = (index, fork, time.perf_counter())
+
+            for conn in wait(list(running)):
+                index, fork, start = running.pop(conn)
+                try:
+                    trace = fork.result()
+                except Exception as e:
+                    results[index] = {'index': index, 'error': str(e)}
+                    continue
+                finally:
+                    fork.close()
+
+                result = {
+                    'index': index,
+                    'steps': trace['steps'],
+                    'frames': trace['frames'],
+                    'observation': trace['observation'].tolist(),
+                    'state_hash': trace['state_hash'],
+                    **score_branch(trace, evaluator),
+                    'elapsed_seconds': time.perf_counter() - start,
+                }
+                if include_state:
+                    result['state'] = trace['state']
+                results[index] = result
+    finally:
+        for _, fork, _ in running.values():
+            fork.close()
+
+    return results
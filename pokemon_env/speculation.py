@@ -0,0 +1,135 @@
+"""
+Speculative execution of likely next actions while the agent is deciding.
+
+An agent usually thinks for seconds between actions while the emulator sits idle.
+A Speculator uses that time: after every step it forks the environment once per
+likely next action (the 8 single-button presses, plus optional waits) and runs
+each in the background. When the real action arrives and one of the branches ran
+exactly that action from exactly the current state, the environment adopts the
+branch's result (emulator state, GameState, encoded screenshot and collision map)
+instead of emulating the step itself. Any other action is stepped as usual.
+
+Branches are forked from a single root fork in a background thread, so the
+caller only pays for one os.fork() per step.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+from pokemon_env.action import Action, ActionType, PressKey, Wait
+from pokemon_env.fork import EnvironmentFork, ForkError
+
+logger = logging.getLogger(__name__)
+
+
+def action_key(action: Action) -> Optional[Hashable]:
+    """Key identifying an action's effect, or None for unknown action types."""
+    if action.action_type == ActionType.PRESS_KEY:
+        return ("press_key", tuple(action.keys))
+    if action.action_type == ActionType.WAIT:
+        return ("wait", action.frames, action.early_exit, action.steady_frames)
+    return None
+
+
+class Speculator:
+    """Runs likely next actions on forks of an environment ahead of time"""
+
+    def __init__(self, env, waits: Sequence[int] = ()):
+        """
+        Create a speculator for an environment.
+
+        Args:
+            env: PokemonEnvironment to speculate on (must be forkable)
+            waits: Frame counts of Wait actions to speculate on, besides the 8 buttons
+        """
+        self.env = env
+        self.actions = [PressKey(keys=[key]) for key in PressKey.VALID_KEYS] + [Wait(frames=frames) for frames in waits]
+        self.hits = 0
+        self.misses = 0
+
+        self._branches: Dict[Hashable, EnvironmentFork] = {}
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._spawner: Optional[threading.Thread] = None
+        self._state_hash: Optional[str] = None
+
+    def start(self) -> None:
+        """Discard any running speculation and start speculating from the current state."""
+        self.cancel()
+        try:
+            root = self.env.fork()
+        except ForkError as e:
+            logger.warning(f"Cannot speculate: {e}")
+            return
+        self._state_hash = self.env.get_state_hash()
+        self._cancel.clear()
+        self._spawner = threading.Thread(target=self._spawn, args=(root,), daemon=True)
+        self._spawner.start()
+
+    def _spawn(self, root: EnvironmentFork) -> None:
+        """Fork one branch per action from the root fork and start each action."""
+        try:
+            for action in self.actions:
+                if self._cancel.is_set():
+                    break
+                branch = root.fork()
+                branch.submit("speculate", action)
+                with self._lock:
+                    self._branches[action_key(action)] = branch
+        except ForkError as e:
+            logger.warning(f"Speculation stopped: {e}")
+        finally:
+            # The branches keep running on their own once forked
+            root.close()
+
+    def take(self, action: Action) -> Optional[Dict[str, Any]]:
+        """
+        Get the precomputed outcome of an action and stop speculating.
+
+        Args:
+            action: The action about to be taken
+
+        Returns:
+            The result of PokemonEnvironment.speculate(action) for the current state,
+            to pass to commit_speculation(), or None if it was not speculated
+        """
+        key = action_key(action)
+        with self._lock:
+            branch = self._branches.pop(key, None)
+        if branch is None and self._spawner is not None:
+            # The branch may still be being forked; finish the one in progress
+            self._cancel.set()
+            self._spawner.join()
+            with self._lock:
+                branch = self._branches.pop(key, None)
+
+        outcome = None
+        # Only valid if nothing changed the environment since the branches were forked
+        if branch is not None and self._state_hash == self.env.get_state_hash():
+            try:
+                outcome = branch.result()
+            except Exception as e:
+                logger.warning(f"Speculative branch for {action} failed: {e}")
+        if branch is not None:
+            branch.kill()
+
+        if outcome is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.cancel()
+        return outcome
+
+    def cancel(self) -> None:
+        """Stop every running branch."""
+        self._cancel.set()
+        if self._spawner is not None:
+            self._spawner.join()
+            self._spawner = None
+        with self._lock:
+            branches = list(self._branches.values())
+            self._branches.clear()
+        for branch in branches:
+            branch.kill()
+        self._state_hash = None
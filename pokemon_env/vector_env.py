@@ -0,0 +1,434 @@
+"""
+Vectorized Pokemon Red environment for reinforcement learning.
+
+VectorPokemonEnv runs N emulators in worker processes and exposes them through a
+Gymnasium-style batched API: reset() returns (observations, infos) and
+step(actions) returns (observations, rewards, terminated, truncated, infos).
+Environments can be stepped in lockstep with step(), or asynchronously with
+send() and recv(), which return whichever environments finish first.
+
+Observations are dicts of NumPy arrays with a leading batch dimension:
+
+    screen  uint8  (N, 144, 160, 3)         RGB screen
+    tiles   uint16 (N, 18, 20)              background/sprite tile IDs of the game area
+    ram     int32  (N, OBSERVATION_SIZE)    numeric game state read from WRAM
+                                            (layout in pokemon_env/observation.py)
+
+Workers write observations straight into shared memory, so only actions, rewards
+and small info dicts cross the pipes. Actions are indices into ACTIONS: each press
+holds one button for press_frames and then lets the game run until action_frames
+have passed, rendering only the last frame.
+
+The reward for a step is the sum of the milestone ratings (evaluator/milestones.py)
+first reached in that episode: new party species, badges and locations.
+"""
+
+import io
+import logging
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evaluator.milestone_index import BADGE_BITS, get_milestone_index
+from pokemon_env.action import PressKey
+from pokemon_env.emulator import Emulator
+from pokemon_env.memory_reader import PokemonRedReader
+from pokemon_env.observation import OBSERVATION_DTYPE, OBSERVATION_SIZE, build_observation
+
+logger = logging.getLogger(__name__)
+
+# Discrete action space: action i presses ACTIONS[i]
+ACTIONS = list(PressKey.VALID_KEYS)
+
+SCREEN_SHAPE = (144, 160, 3)
+TILES_SHAPE = (18, 20)
+
+
+class _SharedObservations:
+    """Batched observation arrays backed by shared memory blocks."""
+
+    SPECS = {
+        "screen": (SCREEN_SHAPE, np.uint8),
+        "tiles": (TILES_SHAPE, np.uint16),
+        "ram": ((OBSERVATION_SIZE,), OBSERVATION_DTYPE),
+    }
+
+    def __init__(self, num_envs: int, names: Optional[Dict[str, str]] = None):
+        """Create the blocks, or attach to existing ones when their names are given."""
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for key, (shape, dtype) in self.SPECS.items():
+            full_shape = (num_envs,) + shape
+            if names is None:
+                size = int(np.prod(full_shape)) * np.dtype(dtype).itemsize
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = block
+            self.arrays[key] = np.ndarray(full_shape, dtype=dtype, buffer=block.buf)
+
+    @property
+    def names(self) -> Dict[str, str]:
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def close(self, unlink: bool = False) -> None:
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+class _MilestoneTracker:
+    """Per-episode milestone rewards computed from raw WRAM values."""
+
+    def __init__(self):
+        self.index = get_milestone_index()
+        self.reset()
+
+    def reset(self) -> None:
+        self.species = set()
+        self.badge_byte = 0
+        self.maps = set()
+
+    def update(self, reader: PokemonRedReader) -> Tuple[float, List[str]]:
+        """Return the reward and names of milestones first reached since the last update."""
+        reward = 0.0
+        reached = []
+        for species_id in reader.read_party_species_ids():
+            if species_id not in self.species:
+                self.species.add(species_id)
+                if self.index.pokemon_names[species_id]:
+                    reward += self.index.pokemon_scores[species_id]
+                    reached.append(self.index.pokemon_names[species_id])
+
+        badge_byte = reader.read_badge_byte()
+        new_badges = badge_byte & ~self.badge_byte
+        if new_badges:
+            self.badge_byte |= badge_byte
+            for bit in range(BADGE_BITS):
+                if new_badges & (1 << bit) and self.index.badge_names[bit]:
+                    reward += self.index.badge_scores[bit]
+                    reached.append(self.index.badge_names[bit])
+
+        map_id = reader.read_map_id()
+        if map_id not in self.maps:
+            self.maps.add(map_id)
+            if self.index.location_names[map_id]:
+                reward += self.index.location_scores[map_id]
+                reached.append(self.index.location_names[map_id])
+
+        return reward, reached
+
+
+def _worker(index: int, rom_path: str, initial_state: Optional[str], config: Dict[str, Any],
+            emulator_factory: Optional[Callable[[], Emulator]], conn, shm_names: Dict[str, str],
+            num_envs: int) -> None:
+    """
+    Worker process loop: owns one emulator and serves reset/step commands.
+
+    Every reply is (result, True); an exception is sent as ((exception, traceback), False)
+    and ends the worker.
+    """
+    observations = _SharedObservations(num_envs, shm_names)
+    screen = observations.arrays["screen"][index]
+    tiles = observations.arrays["tiles"][index]
+    ram = observations.arrays["ram"][index]
+    emulator = None
+
+    try:
+        emulator = emulator_factory() if emulator_factory else Emulator(rom_path, headless=True)
+        emulator.pyboy.set_emulation_speed(0)
+        if initial_state:
+            emulator.load_state(initial_state)
+        elif emulator_factory is None:
+            emulator.initialize()
+            emulator.pyboy.set_emulation_speed(0)
+
+        # Keep the starting point in memory so resets don't touch the disk
+        snapshot = io.BytesIO()
+        emulator.pyboy.save_state(snapshot)
+        snapshot = snapshot.getvalue()
+
+        reader = PokemonRedReader(emulator.pyboy.memory)
+        tracker = _MilestoneTracker()
+        press_frames = config["press_frames"]
+        release_frames = config["action_frames"] - press_frames
+        max_steps = config["max_steps"]
+        steps = 0
+        episode_return = 0.0
+
+        def observe() -> None:
+            screen[...] = emulator.pyboy.screen.ndarray[:, :, :3]
+            tiles[...] = emulator.pyboy.game_wrapper.game_area()
+            build_observation(emulator.pyboy.memory, ram)
+
+        def reset() -> Dict[str, Any]:
+            nonlocal steps, episode_return
+            emulator.pyboy.load_state(io.BytesIO(snapshot))
+            reader.memory = emulator.pyboy.memory
+            tracker.reset()
+            tracker.update(reader)  # The starting state's milestones are not rewarded
+            steps = 0
+            episode_return = 0.0
+            observe()
+            return {}
+
+        while True:
+            command, data = conn.recv()
+            if command == "step":
+                button = ACTIONS[data]
+                emulator.pyboy.button_press(button)
+                # The last frame of an action is rendered; with no release frames that is the last press frame
+                emulator.run(press_frames, render=release_frames == 0)
+                emulator.pyboy.button_release(button)
+                emulator.run(release_frames, render=True)
+                steps += 1
+
+                reward, reached = tracker.update(reader)
+                episode_return += reward
+                truncated = max_steps is not None and steps >= max_steps
+                info = {"milestones": reached} if reached else {}
+                if truncated:
+                    # Auto-reset: the observation written below is the first of the next episode
+                    info["episode"] = {"return": episode_return, "length": steps}
+                    reset()
+                else:
+                    observe()
+                conn.send(((reward, False, truncated, info), True))
+            elif command == "reset":
+                conn.send((reset(), True))
+            elif command == "close":
+                break
+            else:
+                raise ValueError(f"Unknown command: {command}")
+    except KeyboardInterrupt:
+        pass
+    except Exception as error:
+        trace = traceback.format_exc()
+        try:
+            conn.send(((error, trace), False))
+        except Exception:
+            # The exception itself could not be pickled
+            conn.send(((RuntimeError(repr(error)), trace), False))
+    finally:
+        if emulator is not None:
+            emulator.pyboy.stop(save=False)
+        observations.close()
+        conn.close()
+
+
+class VectorPokemonEnv:
+    """N Pokemon Red emulators in worker processes with batched NumPy observations"""
+
+    def __init__(self, num_envs: int, rom_path: str = "Pokemon_Red.gb", initial_state: Optional[str] = None,
+                 action_frames: int = 24, press_frames: int = 8, max_steps: Optional[int] = None,
+                 emulator_factory: Optional[Callable[[], Emulator]] = None, start_method: Optional[str] = None,
+                 copy: bool = True):
+        """
+        Start the worker processes.
+
+        Args:
+            num_envs: Number of emulators
+            rom_path: Path to the Pokemon ROM file
+            initial_state: State file (as written by the server) every episode starts from;
+                default is a freshly booted game
+            action_frames: Frames each action advances the game
+            press_frames: Frames the button is held within an action
+            max_steps: Episode length after which an environment is truncated and reset
+            emulator_factory: Picklable callable creating each worker's emulator instead of
+                booting rom_path, e.g. for fixtures
+            start_method: multiprocessing start method (default: platform default)
+            copy: Return copies of the observations; with False the returned arrays are
+                views that the next step overwrites
+        """
+        if not 0 < press_frames <= action_frames:
+            raise ValueError("press_frames must be between 1 and action_frames")
+
+        self.num_envs = num_envs
+        self.action_space_size = len(ACTIONS)
+        self.copy = copy
+        self.closed = False
+        self._observations = _SharedObservations(num_envs)
+        self._waiting = [False] * num_envs
+
+        config = {"action_frames": action_frames, "press_frames": press_frames, "max_steps": max_steps}
+        context = mp.get_context(start_method)
+        self._conns = []
+        self._processes = []
+        for index in range(num_envs):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(index, rom_path, initial_state, config, emulator_factory, child_conn,
+                      self._observations.names, num_envs),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+    def _batch(self, env_ids: Sequence[int]) -> Dict[str, np.ndarray]:
+        """Observations of the given environments."""
+        if len(env_ids) == self.num_envs:
+            arrays = self._observations.arrays
+            return {key: array.copy() if self.copy else array for key, array in arrays.items()}
+        return {key: array[list(env_ids)] for key, array in self._observations.arrays.items()}
+
+    def _send(self, env_id: int, command: str, data: Any = None) -> None:
+        """Send a command to a worker, raising the worker's error if it has died."""
+        try:
+            self._conns[env_id].send((command, data))
+        except (BrokenPipeError, ConnectionResetError):
+            self._receive(env_id)  # Raises the error the worker sent before exiting
+            raise
+
+    def _receive(self, env_id: int) -> Any:
+        """
+        Receive a worker's reply.
+
+        Raises:
+            Exception: The exception raised in the worker
+            RuntimeError: If the worker exited without replying
+        """
+        try:
+            result, success = self._conns[env_id].recv()
+        except EOFError:
+            raise RuntimeError(f"Worker of environment {env_id} exited unexpectedly") from None
+        if not success:
+            error, trace = result
+            logger.error(f"Worker of environment {env_id} failed:\n{trace}")
+            raise error
+        return result
+
+    def reset(self) -> Tuple[Dict[str, np.ndarray], List[Dict[str, Any]]]:
+        """Reset every environment to the initial state."""
+        for env_id in range(self.num_envs):
+            self._send(env_id, "reset")
+        infos = [self._receive(env_id) for env_id in range(self.num_envs)]
+        self._waiting = [False] * self.num_envs
+        return self._batch(range(self.num_envs)), infos
+
+    def send(self, actions: Sequence[int], env_ids: Optional[Sequence[int]] = None) -> None:
+        """
+        Start stepping environments without waiting for them.
+
+        Args:
+            actions: Action index per environment in env_ids
+            env_ids: Environments to step (default: all)
+        """
+        env_ids = range(self.num_envs) if env_ids is None else env_ids
+        for env_id, action in zip(env_ids, actions):
+            if self._waiting[env_id]:
+                raise RuntimeError(f"Environment {env_id} is still stepping; call recv() first")
+            self._send(env_id, "step", int(action))
+            self._waiting[env_id] = True
+
+    def recv(self, min_envs: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Collect results of environments that finished stepping.
+
+        Args:
+            min_envs: Return once at least this many pending environments finished
+                (default: all pending environments)
+            timeout: Maximum seconds to wait for min_envs
+
+        Returns:
+            (observations, rewards, terminated, truncated, infos, env_ids) for the
+            environments that finished, in env_ids order
+        """
+        pending = {self._conns[i]: i for i in range(self.num_envs) if self._waiting[i]}
+        min_envs = len(pending) if min_envs is None else min(min_envs, len(pending))
+        results = {}
+        while len(results) < min_envs:
+            ready = wait(list(pending), timeout)
+            if not ready:
+                break
+            for conn in ready:
+                env_id = pending.pop(conn)
+                self._waiting[env_id] = False
+                results[env_id] = self._receive(env_id)
+
+        env_ids = sorted(results)
+        rewards = np.array([results[i][0] for i in env_ids], dtype=np.float32)
+        terminated = np.array([results[i][1] for i in env_ids], dtype=bool)
+        truncated = np.array([results[i][2] for i in env_ids], dtype=bool)
+        infos = [results[i][3] for i in env_ids]
+        return self._batch(env_ids), rewards, terminated, truncated, infos, np.array(env_ids, dtype=np.int64)
+
+    def step(self, actions: Sequence[int]):
+        """
+        Step every environment in lockstep.
+
+        Args:
+            actions: One action index per environment
+
+        Returns:
+            (observations, rewards, terminated, truncated, infos)
+        """
+        self.send(actions)
+        observations, rewards, terminated, truncated, infos, _ = self.recv()
+        return observations, rewards, terminated, truncated, infos
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory."""
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._observations.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Measure VectorPokemonEnv throughput with a random policy")
+    parser.add_argument("--rom", default="Pokemon_Red.gb", help="Path to the Pokemon ROM file")
+    parser.add_argument("--state", help="State file episodes start from (default: fresh boot)")
+    parser.add_argument("--num-envs", type=int, default=mp.cpu_count(), help="Number of emulators")
+    parser.add_argument("--steps", type=int, default=1000, help="Batched steps to run")
+    parser.add_argument("--action-frames", type=int, default=24, help="Frames per action")
+
+    args = parser.parse_args()
+
+    with VectorPokemonEnv(args.num_envs, args.rom, args.state, action_frames=args.action_frames) as env:
+        env.reset()
+        rng = np.random.default_rng(0)
+        total_reward = 0.0
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            _, rewards, _, _, _ = env.step(rng.integers(env.action_space_size, size=env.num_envs))
+            total_reward += rewards.sum()
+        elapsed = time.perf_counter() - start
+
+    frames = args.steps * args.num_envs * args.action_frames
+    print(f"{args.num_envs} envs, {args.steps} steps: {args.steps * args.num_envs / elapsed:.0f} steps/s, "
+          f"{frames / elapsed:.0f} frames/s, total reward {total_reward:.1f}")
@@ -0,0 +1,122 @@
+"""
+Watchpoints on WRAM ranges, for reacting to changes instead of polling full state.
+
+A MemoryWatcher keeps the last seen bytes of every watched range. check() compares
+them with memory and reports each range that changed, with its old and new bytes,
+to the watch's callback and to the caller. Checking a few ranges costs far less
+than decoding the game state, so evaluators and agents can check after every step
+(or every frame, as a frame hook) and do real work only when something changed.
+
+WATCH_RANGES names the ranges most consumers care about; any other range can be
+watched by address.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# name -> (start, end) address range, end exclusive
+WATCH_RANGES: Dict[str, Tuple[int, int]] = {
+    "party_species": (0xD163, 0xD16A),  # Party count, then up to 6 species IDs
+    "badges": (0xD356, 0xD357),
+    "map_id": (0xD35E, 0xD35F),
+    "pokedex_owned": (0xD2F7, 0xD30A),  # 1 bit per species, in Pokedex order
+    "pokedex_seen": (0xD30A, 0xD31D),
+    "event_flags": (0xD747, 0xD887),  # Story and NPC event bits
+}
+
+# Ranges the evaluator's milestones are scored from
+MILESTONE_WATCHES = ("party_species", "badges", "map_id")
+
+
+class MemoryWatcher:
+    """Detects changes of watched WRAM ranges"""
+
+    def __init__(self, memory):
+        """
+        Args:
+            memory: PyBoy memory view
+        """
+        self.memory = memory
+        self._watches: Dict[str, Dict[str, Any]] = {}
+
+    def watch(self, name: str, start: Optional[int] = None, end: Optional[int] = None,
+              callback: Optional[Callable[[Dict[str, Any]], None]] = None, report: bool = True) -> None:
+        """
+        Start watching an address range; its current bytes are the baseline.
+
+        Args:
+            name: Name of the watch; a WATCH_RANGES name needs no addresses
+            start: First address of the range
+            end: Address after the last one (default: start + 1)
+            callback: Called with each change of this range
+            report: Whether reported() includes this watch's changes
+
+        Raises:
+            ValueError: If the name is taken, or unknown without addresses
+        """
+        if name in self._watches:
+            raise ValueError(f"Already watching {name}")
+        if start is None:
+            if name not in WATCH_RANGES:
+                raise ValueError(f"Unknown watch range: {name}. Known ranges are: {list(WATCH_RANGES)}")
+            start, end = WATCH_RANGES[name]
+        end = end if end is not None else start + 1
+        if not 0 <= start < end <= 0x10000:
+            raise ValueError(f"Invalid address range: {start:#06x}-{end:#06x}")
+        self._watches[name] = {
+            "start": start,
+            "end": end,
+            "value": bytes(self.memory[start:end]),
+            "callback": callback,
+            "report": report,
+        }
+
+    def unwatch(self, name: str) -> None:
+        """Stop watching a range."""
+        if name not in self._watches:
+            raise KeyError(f"Not watching {name}")
+        del self._watches[name]
+
+    def reset(self) -> None:
+        """Take the current bytes of every range as the baseline, e.g. after loading a state."""
+        for watch in self._watches.values():
+            watch["value"] = bytes(self.memory[watch["start"]:watch["end"]])
+
+    def watches(self) -> Dict[str, Tuple[int, int]]:
+        """Watched ranges by name."""
+        return {name: (watch["start"], watch["end"]) for name, watch in self._watches.items()}
+
+    def check(self, frame: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Compare every watched range with memory and notify the changed ones.
+
+        Args:
+            frame: Emulator frame number to stamp the changes with
+
+        Returns:
+            One change per changed range: watch name, start address, frame, old and
+            new bytes (as lists) and the addresses that changed
+        """
+        changes = []
+        for name, watch in self._watches.items():
+            value = bytes(self.memory[watch["start"]:watch["end"]])
+            old = watch["value"]
+            if value == old:
+                continue
+            watch["value"] = value
+            change = {
+                "watch": name,
+                "start": watch["start"],
+                "frame": frame,
+                "old": list(old),
+                "new": list(value),
+                "addresses": [watch["start"] + i for i, (a, b) in enumerate(zip(old, value)) if a != b],
+            }
+            changes.append(change)
+            if watch["callback"]:
+                watch["callback"](change)
+        return changes
+
+    def reported(self, changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The changes of watches registered with report=True, e.g. to show an agent."""
+        return [change for change in changes
+                if change["watch"] in self._watches and self._watches[change["watch"]]["report"]]
@@ -0,0 +1,195 @@
+"""
+Compact diffs of work RAM between steps, and a bounded on-disk log of them.
+
+Most steps change a few dozen of the 8 KiB of work RAM (0xC000-0xDFFF). A
+WramDiffer keeps the WRAM of the previous step and returns what changed since as
+(start address, new bytes) ranges. Changed bytes less than MERGE_GAP bytes apart
+are merged into one range, which is smaller than describing both ranges.
+
+A WramDiffLog appends diffs to a binary file that starts with a full, compressed
+copy of WRAM (a keyframe), so the WRAM after every logged step can be rebuilt
+with read_wram_log() without saving full states. The log is bounded: once the
+file reaches half of max_bytes it is moved to <path>.1 (replacing the older one)
+and a new file starts with a keyframe. Records are:
+
+    header      kind (B), step (I), frame (Q)
+    keyframe    length (I), zlib-compressed WRAM
+    diff        range count (H), then per range start (H), length (H), bytes
+
+all little endian. Rebuilt WRAM hashes to the state_hash column of the session log.
+"""
+
+import os
+import struct
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+WRAM_START, WRAM_END = 0xC000, 0xE000
+MERGE_GAP = 4  # Unchanged bytes between two changes that are sent anyway to merge the ranges
+
+MAGIC = b"WRAMDIFF\x01"
+KEYFRAME, DIFF = 0, 1
+HEADER = struct.Struct("<BIQ")
+KEYFRAME_LENGTH = struct.Struct("<I")
+RANGE_COUNT = struct.Struct("<H")
+RANGE = struct.Struct("<HH")
+
+# Default bound of a session's diff log (the current file and the rotated one together)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def read_wram(memory) -> bytes:
+    """The whole work RAM."""
+    return bytes(memory[WRAM_START:WRAM_END])
+
+
+def diff_wram(old: bytes, new: bytes, gap: int = MERGE_GAP) -> List[Tuple[int, bytes]]:
+    """
+    Ranges of WRAM that differ between two snapshots.
+
+    Args:
+        old: WRAM before
+        new: WRAM after
+        gap: Merge changes separated by at most this many unchanged bytes
+
+    Returns:
+        (start address, bytes in new) per changed range, in address order
+    """
+    changed = np.flatnonzero(np.frombuffer(old, dtype=np.uint8) != np.frombuffer(new, dtype=np.uint8))
+    if not len(changed):
+        return []
+    # A new range starts wherever the distance to the previous change exceeds the gap
+    breaks = np.flatnonzero(np.diff(changed) > gap + 1) + 1
+    starts = changed[np.concatenate(([0], breaks))]
+    ends = changed[np.concatenate((breaks - 1, [len(changed) - 1]))] + 1
+    return [(WRAM_START + int(start), new[start:end]) for start, end in zip(starts, ends)]
+
+
+def apply_wram_diff(wram: bytearray, ranges: List[Tuple[int, bytes]]) -> None:
+    """Write diff ranges into a WRAM snapshot in place."""
+    for start, data in ranges:
+        offset = start - WRAM_START
+        wram[offset:offset + len(data)] = data
+
+
+def encode_wram_diff(ranges: List[Tuple[int, bytes]]) -> List[List]:
+    """Diff ranges as JSON-friendly [start address, hex bytes] pairs."""
+    return [[start, data.hex()] for start, data in ranges]
+
+
+class WramDiffer:
+    """Diffs work RAM against the previous call"""
+
+    def __init__(self, memory):
+        """
+        Args:
+            memory: PyBoy memory view
+        """
+        self.memory = memory
+        self.reset()
+
+    def reset(self) -> None:
+        """Take the current WRAM as the baseline, e.g. after loading a state."""
+        self.wram = read_wram(self.memory)
+
+    def diff(self) -> List[Tuple[int, bytes]]:
+        """What changed since the last diff() or reset()."""
+        wram = read_wram(self.memory)
+        ranges = diff_wram(self.wram, wram)
+        self.wram = wram
+        return ranges
+
+
+class WramDiffLog:
+    """Bounded binary log of WRAM diffs, rotated at keyframes"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path: Log file; appended to if it exists
+            max_bytes: Maximum size of the log and its rotated file together
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = None
+        self._open()
+
+    def _open(self) -> None:
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, "ab")
+        if not exists:
+            self._file.write(MAGIC)
+
+    def write_keyframe(self, step: int, frame: int, wram: bytes) -> None:
+        """Record the full WRAM; diffs after it apply on top of it."""
+        data = zlib.compress(wram)
+        self._file.write(HEADER.pack(KEYFRAME, step, frame) + KEYFRAME_LENGTH.pack(len(data)) + data)
+        self._file.flush()
+
+    def write_diff(self, step: int, frame: int, ranges: List[Tuple[int, bytes]], wram: Optional[bytes] = None) -> None:
+        """
+        Record the diff of a step.
+
+        Args:
+            step: Step number
+            frame: Emulator frame count after the step
+            ranges: Result of diff_wram()
+            wram: The full WRAM after the step, to start a new file with if the log rotates
+        """
+        if wram is not None and self._file.tell() >= self.max_bytes // 2:
+            self._rotate()
+            self.write_keyframe(step, frame, wram)
+            return
+        parts = [HEADER.pack(DIFF, step, frame), RANGE_COUNT.pack(len(ranges))]
+        for start, data in ranges:
+            parts.append(RANGE.pack(start, len(data)))
+            parts.append(data)
+        self._file.write(b"".join(parts))
+        self._file.flush()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        os.replace(self.path, self.path + ".1")
+        self._open()
+
+    def close(self) -> None:
+        """Close the log file."""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def read_wram_log(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Rebuild the WRAM of every step recorded in a diff log.
+
+    Args:
+        path: Log file written by WramDiffLog (read <path>.1 first for older steps)
+
+    Yields:
+        (step, frame, WRAM after the step)
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a WRAM diff log: {path}")
+        wram = None
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            kind, step, frame = HEADER.unpack(header)
+            if kind == KEYFRAME:
+                (length,) = KEYFRAME_LENGTH.unpack(f.read(KEYFRAME_LENGTH.size))
+                wram = bytearray(zlib.decompress(f.read(length)))
+            else:
+                (count,) = RANGE_COUNT.unpack(f.read(RANGE_COUNT.size))
+                ranges = []
+                for _ in range(count):
+                    start, length = RANGE.unpack(f.read(RANGE.size))
+                    ranges.append((start, f.read(length)))
+                if wram is None:
+                    raise ValueError(f"WRAM diff log starts without a keyframe: {path}")
+                apply_wram_diff(wram, ranges)
+            yield step, frame, bytes(wram)
@@ -1,23 +1,37 @@
 import argparse
+import asyncio
 import base64
+import copy
 import io
+import json
 import logging
 import os
 import time
 import csv
 import datetime
+import uuid
 from typing import Dict, List, Any, Optional
 import threading  # For the timeout timer
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from PIL import Image
 
 from pokemon_env import PokemonEnvironment
-from pokemon_env.action import Action, PressKey, Wait, ActionType
-from evaluator.evaluate import PokemonEvaluator  # Import the evaluator class
+from pokemon_env.action import Action, PressKey, Wait, WaitUntil, ActionType
+from pokemon_env.emulator import Emulator
+from pokemon_env.fork import ForkError
+from pokemon_env.replay import SESSION_METADATA_FILENAME, SESSION_SETTINGS, initial_state_filename
+from pokemon_env.rollout import rollout
+from pokemon_env.speculation import Speculator
+from pokemon_env.watch import MILESTONE_WATCHES, WATCH_RANGES
+from pokemon_env.wram_diff import DEFAULT_MAX_BYTES, WramDiffLog
+from evaluator.evaluate import PokemonEvaluator, CHECKPOINT_SUFFIX  # Import the evaluator class
+from server.metrics import MetricsRegistry, PhaseTimer
+from server.profiler import SamplingProfiler
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -35,6 +49,34 @@ SESSION_TIMER = None  # Timer to track 30 minute limit
 MAX_SESSION_DURATION = 4 * 60 * 60  # 30 minutes in seconds
 AUTOSAVE_INTERVAL = 50  # Automatically save every 50 steps
 AUTOSAVE_FILENAME = "autosave.state"  # Filename for autosave
+SESSION_SETTINGS_IN_USE: Dict[str, bool] = {}  # Settings of the current segment
+LOG_TIMINGS = False  # Whether CSV rows include the server-side timing breakdown
+STUB_EMULATOR = False  # Serve a ROM-free emulator fixture instead of the game (load testing)
+STUB_FIXTURE = None  # Recorded fixture for the stub emulator (default: synthetic state)
+PROFILER = None  # Sampling profiler of the running /profile request, if any
+FORKS: Dict[str, Dict[str, Any]] = {}  # Forked copies of the session by fork ID
+MAX_FORKS = 64  # Maximum number of forks alive at once
+SPECULATIVE = False  # Pre-run likely next actions on forks while the agent decides
+SPECULATIVE_WAITS: List[int] = []  # Wait frame counts to speculate on besides the 8 buttons
+SPECULATOR = None  # Speculator of the current session, in speculative mode
+EVALUATOR_WATCH_PREFIX = "evaluator."  # Names of the WRAM watches the evaluator subscribes to
+MILESTONES_CHANGED = False  # Set by the evaluator's watches; milestones are rescored only then
+WRAM_DIFF_LOG_FILENAME = "wram_diff.bin"  # Per-step WRAM diffs of sessions initialized with wram_diff
+WRAM_DIFF_LOG_MAX_BYTES = DEFAULT_MAX_BYTES  # Bound of a session's WRAM diff log
+WRAM_DIFF_LOG = None  # WramDiffLog of the current session, if any
+
+# Metrics exposed at /metrics
+METRICS = MetricsRegistry()
+ACTION_PHASE_SECONDS = METRICS.histogram(
+    "pokemon_gym_action_phase_seconds", "Server time spent in each phase of /action", ["phase"])
+ACTION_SECONDS = METRICS.histogram(
+    "pokemon_gym_action_seconds", "Total server time spent handling /action")
+STEPS_TOTAL = METRICS.counter("pokemon_gym_steps_total", "Actions executed")
+FRAMES_TOTAL = METRICS.counter("pokemon_gym_frames_emulated_total", "Emulator frames advanced by actions")
+SESSIONS_TOTAL = METRICS.counter("pokemon_gym_sessions_total", "Sessions initialized")
+ERRORS_TOTAL = METRICS.counter("pokemon_gym_errors_total", "Errors by where they happened", ["endpoint"])
+SPECULATION_TOTAL = METRICS.counter(
+    "pokemon_gym_speculation_total", "Actions served from a speculative branch (hit) or stepped (miss)", ["result"])
 
 # Output directory structure
 OUTPUT_DIR = "gameplay_sessions"  # Base directory for all sessions
@@ -68,14 +110,26 @@ class InitializeRequest(BaseModel):
     load_state_file: Optional[str] = None  # Optional path to a saved state file
     load_autosave: bool = False  # Whether to load the latest autosave
     session_id: Optional[str] = None  # Optional session ID to continue an existing session
+    adaptive_press: bool = False  # End each button press once the game accepts input again
+    auto_advance_dialog: bool = False  # Press A through text boxes that offer no choice after each action
+    fast_options: bool = False  # Keep the game options at fast text, no battle animations, SET style
+    capture_events: bool = False  # Return map, battle, dialog and HP changes that happened during each action
+    wram_diff: bool = False  # Return the WRAM bytes each action changed, and log them in the session directory
 
 
 class ActionRequest(BaseModel):
-    action_type: str  # "press_key" or "wait"
+    action_type: str  # "press_key", "wait" or "wait_until"
     # For press_key
     keys: Optional[List[str]] = None
-    # For wait
+    # For wait (and the frame budget of wait_until)
     frames: Optional[int] = None
+    # For wait: stop once the game is steady for steady_frames frames or something significant happens
+    early_exit: bool = False
+    steady_frames: int = 16
+    # For wait_until: stop as soon as any of these conditions holds
+    conditions: Optional[List[str]] = None
+    # Include the server-side timing breakdown in the response
+    include_timings: bool = False
 
 
 class GameStateResponse(BaseModel):
@@ -94,6 +148,35 @@ class GameStateResponse(BaseModel):
     step_number: int
     execution_time: float
     score: float = 0.0  # Add a score field to the response
+    # Server-side seconds per phase of this step and frames emulated (when requested)
+    timings: Optional[Dict[str, float]] = None
+    frames_emulated: Optional[int] = None
+    # What the action reported, e.g. which wait_until condition fired and the frames it used
+    action_result: Optional[Dict[str, Any]] = None
+
+
+class ProfileRequest(BaseModel):
+    seconds: Optional[float] = None  # Profile for this many seconds...
+    steps: Optional[int] = None  # ...or until this many actions have been taken
+    interval_ms: float = 5.0  # Time between stack samples
+    include_idle: bool = False  # Keep samples taken while the server waits for requests
+    timeout: float = 600.0  # Maximum seconds to wait for the requested steps
+
+
+class ForkRequest(BaseModel):
+    from_fork: Optional[str] = None  # Fork an existing fork instead of the live session
+
+
+class RolloutRequest(BaseModel):
+    sequences: List[List[ActionRequest]]  # Candidate action sequences, one branch each
+    include_state: bool = False  # Return each branch's final game state (without screenshot)
+    workers: Optional[int] = None  # Branches run at once (default: number of CPUs)
+
+
+class WatchRequest(BaseModel):
+    name: str  # A known range (badges, map_id, party_species, pokedex_owned, pokedex_seen, event_flags) or any name
+    start: Optional[int] = None  # First address, required for names that are not known ranges
+    end: Optional[int] = None  # Address after the last one (default: start + 1)
 
 
 class SaveStateRequest(BaseModel):
@@ -177,12 +260,21 @@ def initialize_csv_logger(custom_filename=None, append_mode=False):
         file_exists = os.path.exists(filename)
         file_mode = 'a' if append_mode and file_exists else 'w'
         
-        CSV_FILE = open(filename, file_mode, newline='')
         fieldnames = ['timestamp', 'step_number', 'action_type', 'action_details', 'badges', 
                       'inventory', 'location', 'money', 'coordinates', 'pokemons', 'dialog', 
-                      'execution_time', 'score']
+                      'execution_time', 'score', 'frame_count', 'state_hash']
+        if LOG_TIMINGS:
+            fieldnames += ['frames_emulated', 'server_timings']
         
-        CSV_WRITER = csv.DictWriter(CSV_FILE, fieldnames=fieldnames)
+        # When appending, keep the columns of the existing log so older logs stay readable
+        if file_mode == 'a':
+            with open(filename, 'r', newline='') as existing_file:
+                existing_fieldnames = next(csv.reader(existing_file), None)
+            if existing_fieldnames:
+                fieldnames = existing_fieldnames
+        
+        CSV_FILE = open(filename, file_mode, newline='')
+        CSV_WRITER = csv.DictWriter(CSV_FILE, fieldnames=fieldnames, extrasaction='ignore')
         
         # Only write header if creating a new file or not in append mode
         if not (append_mode and file_exists):
@@ -197,12 +289,14 @@ def initialize_csv_logger(custom_filename=None, append_mode=False):
             CSV_FILE = None
 
 
-def log_response(response: GameStateResponse, action_type: str, action_details: Any):
-    """Log a response to the CSV file."""
-    global CSV_WRITER, EVALUATOR
+def log_response(response: GameStateResponse, action_type: str, action_details: Any,
+                 timer: Optional[PhaseTimer] = None):
+    """Log a response to the CSV file, update the evaluator and save the screenshot."""
+    global CSV_WRITER, EVALUATOR, MILESTONES_CHANGED
     
     if CSV_WRITER is None:
         return
+    timer = timer or PhaseTimer()
     try:
         row = {
             'timestamp': datetime.datetime.now().isoformat(),
@@ -217,15 +311,36 @@ def log_response(response: GameStateResponse, action_type: str, action_details:
             'pokemons': str(response.pokemons),  # Convert pokemons to string representation
             'dialog': response.dialog,
             'execution_time': response.execution_time,
-            'score': response.score  # Add score to CSV
+            'score': response.score,  # Add score to CSV
+            'frame_count': ENV.emulator.frame_count if ENV else '',
+            'state_hash': ENV.get_state_hash() if ENV else ''
         }
-        CSV_WRITER.writerow(row)
-        CSV_FILE.flush()  # Ensure data is written immediately
+        if LOG_TIMINGS:
+            # Persistence and evaluation happen after the row is written, so only earlier phases are included
+            row['frames_emulated'] = ENV.last_step_frames if ENV and response.step_number else 0
+            row['server_timings'] = json.dumps({phase: round(seconds, 6) for phase, seconds in timer.timings.items()})
+        with timer.phase("log_write"):
+            CSV_WRITER.writerow(row)
+            CSV_FILE.flush()  # Ensure data is written immediately
+            if WRAM_DIFF_LOG and ENV and ENV.wram_differ:
+                # Every segment starts from a full copy, so the log replays from any segment
+                if action_type == "initialize":
+                    WRAM_DIFF_LOG.write_keyframe(response.step_number, ENV.emulator.frame_count, ENV.wram_differ.wram)
+                else:
+                    WRAM_DIFF_LOG.write_diff(response.step_number, ENV.emulator.frame_count,
+                                             ENV.last_wram_diff, wram=ENV.wram_differ.wram)
         logger.info(f"Response data for step {response.step_number} logged to CSV")
         
-        # Update the evaluator with the latest state
-        if EVALUATOR:
-            EVALUATOR.evaluate_row(row)
+        # Update the evaluator straight from WRAM values, when its watched ranges changed
+        if EVALUATOR and ENV:
+            with timer.phase("evaluator"):
+                if action_type == "initialize" or MILESTONES_CHANGED:
+                    MILESTONES_CHANGED = False
+                    EVALUATOR.evaluate_ids(*ENV.get_milestone_ids(), step=response.step_number,
+                                           frame=ENV.emulator.frame_count)
+                else:
+                    # Nothing to score, but the progress stats still count this step
+                    EVALUATOR.advance(step=response.step_number, frame=ENV.emulator.frame_count)
         
         # Save screenshot with step number and action type
         action_name = action_type
@@ -233,13 +348,171 @@ def log_response(response: GameStateResponse, action_type: str, action_details:
             action_name = f"press_{'-'.join(action_details['keys'])}"
         elif action_type == "wait" and isinstance(action_details, dict) and "frames" in action_details:
             action_name = f"wait_{action_details['frames']}"
+        elif action_type == "wait_until" and isinstance(action_details, dict) and "conditions" in action_details:
+            action_name = f"wait_until_{'-'.join(action_details['conditions'])}"
         
-        save_screenshot(response.screenshot_base64, response.step_number, action_name)
+        with timer.phase("log_write"):
+            save_screenshot(response.screenshot_base64, response.step_number, action_name)
         
     except Exception as e:
+        ERRORS_TOTAL.inc(endpoint="log")
         logger.error(f"Error logging to CSV: {e}")
 
 
+def count_logged_segments() -> int:
+    """Count the /initialize rows already in the session log, i.e. the index of the next segment."""
+    if CSV_FILE is None or not os.path.exists(CSV_FILE.name):
+        return 0
+    CSV_FILE.flush()
+    with open(CSV_FILE.name, 'r', newline='') as f:
+        return sum(1 for row in csv.DictReader(f) if row.get('action_type') == "initialize")
+
+
+def save_session_metadata(settings: Dict[str, bool]) -> None:
+    """
+    Record the settings a session segment runs with, so scores are only compared
+    between sessions that played under the same rules.
+    
+    Args:
+        settings: The InitializeRequest flags that change how steps run
+    """
+    global SESSION_SETTINGS_IN_USE
+    SESSION_SETTINGS_IN_USE = dict(settings)
+    metadata_path = os.path.join(current_session_dir, SESSION_METADATA_FILENAME)
+    try:
+        metadata = {"segments": []}
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+        metadata["segments"].append({
+            "segment": count_logged_segments(),
+            "started": datetime.datetime.now().isoformat(),
+            "rom": "stub" if STUB_EMULATOR else os.path.basename(ROM_PATH),
+            "settings": settings,
+        })
+        with open(metadata_path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+    except Exception as e:
+        logger.error(f"Error saving session metadata: {e}")
+
+
+def save_evaluator_checkpoint(state_path: str) -> None:
+    """
+    Checkpoint the evaluator next to a saved state file so a resumed session
+    only has to replay the CSV rows written after it.
+    
+    Args:
+        state_path: Path of the state file the checkpoint belongs to
+    """
+    if EVALUATOR is None:
+        return
+    try:
+        checkpoint_path = os.path.splitext(state_path)[0] + CHECKPOINT_SUFFIX
+        csv_offset = CSV_FILE.tell() if CSV_FILE else None
+        step_number = ENV.steps_taken if ENV else None
+        EVALUATOR.save_checkpoint(checkpoint_path, csv_offset=csv_offset, step_number=step_number)
+        logger.info(f"Evaluator checkpoint saved to {checkpoint_path}")
+    except Exception as e:
+        logger.error(f"Error saving evaluator checkpoint: {e}")
+
+
+def create_action(request: ActionRequest):
+    """
+    Build the environment action for an action request.
+    
+    Returns:
+        The action and the details logged with it
+    
+    Raises:
+        HTTPException: If a parameter the action type needs is missing
+        ValueError: If the action's parameters are invalid; callers answer with a 400
+    """
+    if request.action_type == "press_key":
+        if not request.keys:
+            raise HTTPException(
+                status_code=400,
+                detail="Keys parameter is required for press_key action."
+            )
+        logger.info(f"Creating PressKey action with keys: {request.keys}")
+        return PressKey(keys=request.keys), {"keys": request.keys}
+    
+    if request.action_type == "wait":
+        if not request.frames:
+            raise HTTPException(
+                status_code=400,
+                detail="Frames parameter is required for wait action."
+            )
+        if request.early_exit:
+            action = Wait(frames=request.frames, early_exit=True, steady_frames=request.steady_frames)
+            return action, action.to_dict()
+        return Wait(frames=request.frames), {"frames": request.frames}
+    
+    if request.action_type == "wait_until":
+        if not request.conditions:
+            raise HTTPException(
+                status_code=400,
+                detail="Conditions parameter is required for wait_until action."
+            )
+        action = WaitUntil(conditions=request.conditions, max_frames=request.frames or 600)
+        return action, action.to_dict()
+    
+    raise HTTPException(
+        status_code=400,
+        detail=f"Unknown action type: {request.action_type}"
+    )
+
+
+def milestone_ranges_changed(change: Dict[str, Any]) -> None:
+    """Watch callback: a WRAM range the evaluator scores milestones from changed."""
+    global MILESTONES_CHANGED
+    MILESTONES_CHANGED = True
+
+
+def watch_milestones() -> None:
+    """Subscribe the evaluator to the WRAM ranges of its milestones, instead of polling them."""
+    for name in MILESTONE_WATCHES:
+        start, end = WATCH_RANGES[name]
+        ENV.emulator.watcher.watch(EVALUATOR_WATCH_PREFIX + name, start, end,
+                                   callback=milestone_ranges_changed, report=False)
+
+
+def close_wram_diff_log() -> None:
+    """Close the WRAM diff log of the session, if any."""
+    global WRAM_DIFF_LOG
+    if WRAM_DIFF_LOG:
+        WRAM_DIFF_LOG.close()
+        WRAM_DIFF_LOG = None
+
+
+def close_forks() -> None:
+    """Stop every forked copy of the session, including speculative branches."""
+    global SPECULATOR
+    if SPECULATOR:
+        SPECULATOR.cancel()
+        SPECULATOR = None
+    for fork_id, entry in list(FORKS.items()):
+        try:
+            entry["fork"].close()
+        except Exception as e:
+            logger.error(f"Error closing fork {fork_id}: {e}")
+    FORKS.clear()
+
+
+async def start_speculation() -> None:
+    """Start speculating on the next action; runs once the response has been sent."""
+    if SPECULATOR and SPECULATOR.env is ENV:
+        SPECULATOR.start()
+
+
+def create_stub_emulator() -> Emulator:
+    """Create an emulator backed by a recorded or synthetic fixture instead of the ROM."""
+    # Imported here so the benchmark fixtures are only needed when the stub is used
+    from benchmarks.fixtures import load_fixture, synthetic_fixture
+
+    pyboy = load_fixture(STUB_FIXTURE) if STUB_FIXTURE else synthetic_fixture()
+    return Emulator(None, pyboy=pyboy)
+
+
 def force_stop_session():
     """Force stop the current session after timeout."""
     global ENV, CSV_FILE, CSV_WRITER, EVALUATOR, SESSION_START_TIME, SESSION_TIMER
@@ -252,15 +525,18 @@ def force_stop_session():
             try:
                 timeout_save_path = os.path.join(current_session_dir, "timeout_state.state")
                 ENV.save_state(timeout_save_path)
+                save_evaluator_checkpoint(timeout_save_path)
                 logger.info(f"Saved game state at timeout to {timeout_save_path}")
                 
                 # Also update the autosave file
                 autosave_path = os.path.join(current_session_dir, AUTOSAVE_FILENAME)
                 ENV.save_state(autosave_path)
+                save_evaluator_checkpoint(autosave_path)
                 logger.info(f"Updated autosave at timeout")
             except Exception as e:
                 logger.error(f"Error saving game state at timeout: {e}")
                 
+            close_forks()
             ENV.stop()
             ENV = None
         
@@ -270,6 +546,7 @@ def force_stop_session():
             CSV_FILE.close()
             CSV_FILE = None
             CSV_WRITER = None
+        close_wram_diff_log()
         
         EVALUATOR = None  # Reset evaluator
         SESSION_START_TIME = None
@@ -285,7 +562,7 @@ def force_stop_session():
 
 # API Endpoints
 @app.post("/initialize", response_model=GameStateResponse)
-async def initialize(request: InitializeRequest):
+async def initialize(request: InitializeRequest, background_tasks: BackgroundTasks):
     """
     Initialize the Pokemon environment and return the initial state.
     
@@ -295,7 +572,7 @@ async def initialize(request: InitializeRequest):
     Returns:
         The initial game state
     """
-    global ENV, LAST_RESPONSE_TIME, EVALUATOR, SESSION_START_TIME, SESSION_TIMER
+    global ENV, LAST_RESPONSE_TIME, EVALUATOR, SESSION_START_TIME, SESSION_TIMER, SPECULATOR, WRAM_DIFF_LOG
     
     # Cancel any existing timer
     if SESSION_TIMER:
@@ -304,6 +581,7 @@ async def initialize(request: InitializeRequest):
     
     # First, ensure any existing session is stopped
     if ENV:
+        close_forks()
         try:
             ENV.stop()
         except Exception as e:
@@ -354,20 +632,36 @@ async def initialize(request: InitializeRequest):
     SESSION_START_TIME = time.time()
     
     # Check if ROM file exists
-    if not os.path.exists(ROM_PATH):
+    if not STUB_EMULATOR and not os.path.exists(ROM_PATH):
         raise HTTPException(
             status_code=500, 
             detail=f"ROM file not found: {ROM_PATH}"
         )
     
     # Initialize environment
+    settings = {name: getattr(request, name) for name in SESSION_SETTINGS}
     try:
-        logger.info(f"Initializing environment with ROM: {ROM_PATH}")
-        ENV = PokemonEnvironment(
-            rom_path=ROM_PATH,
-            headless=request.headless,
-            sound=request.sound
-        )
+        if STUB_EMULATOR:
+            logger.info(f"Initializing environment with stub emulator ({STUB_FIXTURE or 'synthetic fixture'})")
+            ENV = PokemonEnvironment(
+                rom_path=ROM_PATH,
+                headless=request.headless,
+                sound=request.sound,
+                emulator=create_stub_emulator(),
+                capture_events=request.capture_events,
+                wram_diff=request.wram_diff,
+                **settings
+            )
+        else:
+            logger.info(f"Initializing environment with ROM: {ROM_PATH}")
+            ENV = PokemonEnvironment(
+                rom_path=ROM_PATH,
+                headless=request.headless,
+                sound=request.sound,
+                capture_events=request.capture_events,
+                wram_diff=request.wram_diff,
+                **settings
+            )
         logger.info("env initialized")
         
         # If we have a state file to load, load it
@@ -400,6 +694,20 @@ async def initialize(request: InitializeRequest):
             ENV.emulator.initialize()
             logger.info("Initialized fresh game state")
         
+        # Booting or loading may have reset the options byte
+        if ENV.fast_options:
+            ENV.emulator.apply_fast_options()
+        
+        # The initial state is scored below; later steps only when the milestone ranges change
+        watch_milestones()
+        
+        close_wram_diff_log()
+        if ENV.wram_differ:
+            # Diff from the state the segment starts in, which may have been loaded
+            ENV.wram_differ.reset()
+            WRAM_DIFF_LOG = WramDiffLog(os.path.join(current_session_dir, WRAM_DIFF_LOG_FILENAME),
+                                        max_bytes=WRAM_DIFF_LOG_MAX_BYTES)
+        
         # Get initial state
         state = ENV.state
         logger.info("state initialized")
@@ -424,7 +732,12 @@ async def initialize(request: InitializeRequest):
             score=0.0  # Initial score
         )
         
+        # Keep the state this segment of the log starts from, so the session can be replayed
+        segment_state_path = os.path.join(current_session_dir, initial_state_filename(count_logged_segments()))
+        ENV.save_state(segment_state_path)
+        
         # Log initial state
+        save_session_metadata(settings)
         log_response(response, "initialize", request)
         
         # Update score after evaluating initial state
@@ -440,9 +753,14 @@ async def initialize(request: InitializeRequest):
         SESSION_TIMER.start()
         logger.info(f"Session will automatically terminate in {MAX_SESSION_DURATION/60} minutes")
         
+        SESSIONS_TOTAL.inc()
+        if SPECULATIVE:
+            SPECULATOR = Speculator(ENV, waits=SPECULATIVE_WAITS)
+            background_tasks.add_task(start_speculation)
         return response
     
     except Exception as e:
+        ERRORS_TOTAL.inc(endpoint="initialize")
         logger.error(f"Error initializing environment: {e}")
         raise HTTPException(
             status_code=500,
@@ -451,7 +769,7 @@ async def initialize(request: InitializeRequest):
 
 
 @app.post("/action", response_model=GameStateResponse)
-async def take_action(request: ActionRequest):
+async def take_action(request: ActionRequest, background_tasks: BackgroundTasks):
     """
     Take an action in the environment and return the new state.
     
@@ -505,40 +823,35 @@ async def take_action(request: ActionRequest):
     logger.info(f"Keys: {request.keys}")
     logger.info(f"Frames: {request.frames}")
     
-    # Create action based on request
+    # Create action based on request; invalid requests are the client's error
     try:
-        if request.action_type == "press_key":
-            if not request.keys:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Keys parameter is required for press_key action."
-                )
-            logger.info(f"Creating PressKey action with keys: {request.keys}")
-            action = PressKey(keys=request.keys)
-            action_details = {"keys": request.keys}
-        
-        elif request.action_type == "wait":
-            if not request.frames:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Frames parameter is required for wait action."
-                )
-            
-            action = Wait(frames=request.frames)
-            action_details = {"frames": request.frames}
-        
+        action, action_details = create_action(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Execute action, or adopt its outcome if it was run speculatively
+        request_start = time.perf_counter()
+        outcome = SPECULATOR.take(action) if SPECULATOR else None
+        if outcome is not None:
+            state = ENV.commit_speculation(action, outcome)
+            timer = PhaseTimer(ENV.last_step_timings)
+            collision_map = outcome['collision_map']
+            screenshot_base64 = outcome['screenshot_base64']
+            SPECULATION_TOTAL.inc(result="hit")
         else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unknown action type: {request.action_type}"
-            )
-        
-        # Execute action
-        state = ENV.step(action)
-        
-        # Get collision map and valid moves
-        collision_map = ENV.get_collision_map()
-        valid_moves = ENV.get_valid_moves()
+            if SPECULATOR:
+                SPECULATION_TOTAL.inc(result="miss")
+            state = ENV.step(action)
+            timer = PhaseTimer(ENV.last_step_timings)
+            
+            # Get collision map and valid moves
+            with timer.phase("collision_map"):
+                collision_map = ENV.get_collision_map()
+                valid_moves = ENV.get_valid_moves()
+            
+            with timer.phase("screenshot_encode"):
+                screenshot_base64 = state.screenshot_base64
         
         # Prepare response
         response = GameStateResponse(
@@ -552,15 +865,16 @@ async def take_action(request: ActionRequest):
             inventory=state.inventory,
             dialog=state.dialog,
             pokemons=state.pokemons,
-            screenshot_base64=state.screenshot_base64,
+            screenshot_base64=screenshot_base64,
             collision_map=collision_map,
             step_number=ENV.steps_taken,
             execution_time=execution_time,  # Use the calculated time
-            score=EVALUATOR.total_score if EVALUATOR else 0.0  # Add current score
+            score=EVALUATOR.total_score if EVALUATOR else 0.0,  # Add current score
+            action_result=ENV.last_step_info or None
         )
         
         # Log the action and response
-        log_response(response, request.action_type, action_details)
+        log_response(response, request.action_type, action_details, timer)
         
         # Update the response score after evaluation
         if EVALUATOR:
@@ -572,12 +886,29 @@ async def take_action(request: ActionRequest):
         # Auto-save every AUTOSAVE_INTERVAL steps
         if ENV.steps_taken % AUTOSAVE_INTERVAL == 0:
             try:
-                autosave_path = os.path.join(current_session_dir, AUTOSAVE_FILENAME)
-                ENV.save_state(autosave_path)
+                with timer.phase("autosave"):
+                    autosave_path = os.path.join(current_session_dir, AUTOSAVE_FILENAME)
+                    ENV.save_state(autosave_path)
+                    save_evaluator_checkpoint(autosave_path)
                 logger.info(f"Auto-saved game state at step {ENV.steps_taken} to {autosave_path}")
             except Exception as e:
+                ERRORS_TOTAL.inc(endpoint="autosave")
                 logger.error(f"Error during auto-save: {e}")
         
+        # Record where the server time for this step went
+        for phase, seconds in timer.timings.items():
+            ACTION_PHASE_SECONDS.observe(seconds, phase=phase)
+        ACTION_SECONDS.observe(time.perf_counter() - request_start)
+        STEPS_TOTAL.inc()
+        FRAMES_TOTAL.inc(ENV.last_step_frames)
+        
+        if request.include_timings:
+            response.timings = dict(timer.timings)
+            response.frames_emulated = ENV.last_step_frames
+        
+        if SPECULATOR:
+            background_tasks.add_task(start_speculation)
+        
         # Check remaining time and log it
         remaining_time = MAX_SESSION_DURATION - (time.time() - SESSION_START_TIME)
         logger.info(f"Remaining session time: {remaining_time/60:.1f} minutes")
@@ -585,6 +916,7 @@ async def take_action(request: ActionRequest):
         return response
     
     except Exception as e:
+        ERRORS_TOTAL.inc(endpoint="action")
         logger.error(f"Error taking action: {e}")
         raise HTTPException(
             status_code=500,
@@ -592,6 +924,263 @@ async def take_action(request: ActionRequest):
         )
 
 
+@app.post("/fork")
+async def fork_session(request: ForkRequest):
+    """
+    Fork the live session (or an existing fork) into an independent copy.
+    
+    The copy runs in a child process created with os.fork(), so it starts from
+    the exact emulator state, step counter and score without saving or loading a
+    state file. Actions sent to a fork do not affect the live session and are not
+    logged.
+    
+    Args:
+        request: Optionally the ID of a fork to fork instead of the live session
+    
+    Returns:
+        The new fork's ID, process ID and step number
+    """
+    if ENV is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Environment not initialized. Call /initialize first."
+        )
+    if len(FORKS) >= MAX_FORKS:
+        raise HTTPException(status_code=429, detail=f"Too many forks (maximum {MAX_FORKS}); delete some first")
+    
+    try:
+        if request.from_fork:
+            parent = FORKS.get(request.from_fork)
+            if parent is None:
+                raise HTTPException(status_code=404, detail=f"Fork not found: {request.from_fork}")
+            fork = parent["fork"].fork()
+            evaluator = copy.deepcopy(parent["evaluator"])
+        else:
+            fork = ENV.fork()
+            evaluator = copy.deepcopy(EVALUATOR) if EVALUATOR else PokemonEvaluator(verbose=False)
+    except ForkError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fork session: {str(e)}")
+    
+    evaluator.verbose = False
+    fork_id = uuid.uuid4().hex[:12]
+    step_number = fork.steps_taken
+    FORKS[fork_id] = {
+        "fork": fork,
+        "evaluator": evaluator,
+        "parent": request.from_fork,
+        "forked_at_step": step_number,
+        "created": time.time(),
+    }
+    logger.info(f"Forked session into {fork_id} (pid {fork.pid}) at step {step_number}")
+    return {"fork_id": fork_id, "pid": fork.pid, "step_number": step_number}
+
+
+@app.get("/forks")
+async def list_forks():
+    """List the forks of the current session."""
+    return {
+        "forks": [
+            {
+                "fork_id": fork_id,
+                "pid": entry["fork"].pid,
+                "parent": entry["parent"],
+                "forked_at_step": entry["forked_at_step"],
+                "age_seconds": time.time() - entry["created"],
+            }
+            for fork_id, entry in FORKS.items()
+        ]
+    }
+
+
+@app.post("/fork/{fork_id}/action", response_model=GameStateResponse)
+async def fork_action(fork_id: str, request: ActionRequest):
+    """
+    Take an action in a fork and return its new state.
+    
+    Args:
+        fork_id: ID returned by /fork
+        request: Action parameters, as for /action
+    
+    Returns:
+        The fork's game state after the action, scored by the fork's own copy of the evaluator
+    """
+    entry = FORKS.get(fork_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Fork not found: {fork_id}")
+    try:
+        action, _ = create_action(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        start_time = time.time()
+        fork = entry["fork"]
+        state = fork.step(action)
+        collision_map = fork.call("get_collision_map")
+        step_number = fork.steps_taken
+        evaluator = entry["evaluator"]
+        evaluator.evaluate_ids(*fork.get_milestone_ids(), step=step_number)
+        
+        return GameStateResponse(
+            player_name=state.player_name,
+            rival_name=state.rival_name,
+            money=state.money,
+            location=state.location,
+            coordinates=list(state.coordinates),
+            badges=state.badges,
+            valid_moves=state.valid_moves,
+            inventory=state.inventory,
+            dialog=state.dialog,
+            pokemons=state.pokemons,
+            screenshot_base64=state.screenshot_base64,
+            collision_map=collision_map,
+            step_number=step_number,
+            execution_time=time.time() - start_time,
+            score=evaluator.total_score,
+            action_result=fork.call("last_step_info") or None
+        )
+    except ForkError as e:
+        FORKS.pop(fork_id, None)
+        raise HTTPException(status_code=500, detail=f"Fork {fork_id} failed: {str(e)}")
+    except Exception as e:
+        ERRORS_TOTAL.inc(endpoint="fork_action")
+        logger.error(f"Error taking action in fork {fork_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to take action in fork {fork_id}: {str(e)}"
+        )
+
+
+@app.delete("/fork/{fork_id}")
+async def delete_fork(fork_id: str):
+    """Stop a fork and free its process."""
+    entry = FORKS.pop(fork_id, None)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Fork not found: {fork_id}")
+    entry["fork"].close()
+    return {"status": "deleted", "fork_id": fork_id}
+
+
+@app.post("/rollout")
+async def rollout_sequences(request: RolloutRequest):
+    """
+    Run K candidate action sequences from the current state in parallel.
+    
+    Each sequence runs in its own fork of the live session, so the session itself
+    is not stepped or logged. Branches are scored against a copy of the session's
+    evaluator: only milestones not yet reached count towards a branch's score_delta.
+    
+    Args:
+        request: The action sequences and rollout options
+    
+    Returns:
+        One result per sequence, in order, with its final observation vector,
+        state hash, milestones and score delta
+    """
+    if ENV is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Environment not initialized. Call /initialize first."
+        )
+    if not request.sequences:
+        raise HTTPException(status_code=400, detail="At least one action sequence is required")
+    if request.workers is not None and request.workers < 1:
+        raise HTTPException(status_code=400, detail="workers must be at least 1")
+    
+    try:
+        sequences = [[create_action(action)[0] for action in sequence] for sequence in request.sequences]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    workers = min(request.workers or os.cpu_count() or 1, MAX_FORKS)
+    
+    start_time = time.time()
+    try:
+        results = rollout(ENV, sequences, evaluator=EVALUATOR, workers=workers,
+                          include_state=request.include_state)
+    except ForkError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fork session: {str(e)}")
+    
+    return {
+        "step_number": ENV.steps_taken,
+        "results": results,
+        "elapsed_seconds": time.time() - start_time,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose server metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/profile", response_class=PlainTextResponse)
+async def profile(request: ProfileRequest):
+    """
+    Profile the server for the next N seconds or steps with a sampling profiler.
+    
+    The request blocks until profiling finishes while other requests keep being
+    served. Stacks of the request-handling thread (handlers, environment steps and
+    emulator calls) are sampled every interval_ms; nothing runs when no profile is
+    requested.
+    
+    Args:
+        request: Either seconds or steps, plus sampling options
+        
+    Returns:
+        Samples in the collapsed-stack format used by flamegraph.pl and speedscope
+    """
+    global PROFILER
+    
+    if (request.seconds is None) == (request.steps is None):
+        raise HTTPException(status_code=400, detail="Specify exactly one of seconds or steps")
+    if request.interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="interval_ms must be positive")
+    if PROFILER is not None and PROFILER.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    
+    env = ENV
+    if request.steps is not None and env is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Environment not initialized. Call /initialize first."
+        )
+    
+    PROFILER = SamplingProfiler(threading.get_ident(), request.interval_ms / 1000, request.include_idle)
+    start_steps = env.steps_taken if env else 0
+    PROFILER.start()
+    try:
+        if request.seconds is not None:
+            await asyncio.sleep(request.seconds)
+        else:
+            deadline = time.time() + request.timeout
+            # Stop early if the session is stopped or replaced
+            while (ENV is env and env.steps_taken - start_steps < request.steps
+                   and time.time() < deadline):
+                await asyncio.sleep(0.05)
+    finally:
+        PROFILER.stop()
+    
+    steps_profiled = (env.steps_taken - start_steps) if env else 0
+    summary = PROFILER.summary()
+    collapsed = PROFILER.collapsed()
+    logger.info(f"Profiled {summary['duration']:.1f}s, {steps_profiled} steps, {summary['samples']} samples")
+    
+    # Keep a copy with the session so it can be looked at later
+    if current_session_dir:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        profile_path = os.path.join(current_session_dir, f"profile_{timestamp}.folded")
+        with open(profile_path, "w") as f:
+            f.write(collapsed)
+        logger.info(f"Profile saved to {profile_path}")
+    
+    return PlainTextResponse(collapsed, headers={
+        "X-Profile-Samples": str(summary["samples"]),
+        "X-Profile-Idle-Samples": str(summary["idle_samples"]),
+        "X-Profile-Duration": f"{summary['duration']:.3f}",
+        "X-Profile-Steps": str(steps_profiled),
+    })
+
+
 @app.get("/status")
 async def get_status():
     """Get the current status of the environment."""
@@ -621,6 +1210,7 @@ async def get_status():
         "session_dir": current_session_dir,
         "remaining_time_seconds": remaining_time,
         "remaining_time_minutes": remaining_time / 60,
+        "settings": SESSION_SETTINGS_IN_USE,
         **score_info  # Include score information
     }
 
@@ -645,11 +1235,13 @@ async def stop_environment():
     try:
         final_save_path = os.path.join(current_session_dir, "final_state.state")
         ENV.save_state(final_save_path)
+        save_evaluator_checkpoint(final_save_path)
         logger.info(f"Final game state saved to {final_save_path}")
         
         # Also update the autosave file
         autosave_path = os.path.join(current_session_dir, AUTOSAVE_FILENAME)
         ENV.save_state(autosave_path)
+        save_evaluator_checkpoint(autosave_path)
         logger.info(f"Updated autosave at session end")
     except Exception as e:
         logger.error(f"Error saving final game state: {e}")
@@ -663,7 +1255,8 @@ async def stop_environment():
             "locations_visited": list(EVALUATOR.locations_visited),
             "pokemon_count": len(EVALUATOR.pokemon_seen),
             "badges_count": len(EVALUATOR.badges_earned),
-            "locations_count": len(EVALUATOR.locations_visited)
+            "locations_count": len(EVALUATOR.locations_visited),
+            "progress": EVALUATOR.get_progress_stats()
         }
         
         # Generate a summary file
@@ -676,6 +1269,17 @@ async def stop_environment():
                 f.write(f"Badges Earned: {len(EVALUATOR.badges_earned)}\n")
                 f.write(f"Locations Visited: {len(EVALUATOR.locations_visited)}\n\n")
                 
+                progress = EVALUATOR.get_progress_stats()
+                f.write("--- Progress ---\n")
+                f.write(f"Milestones: {progress['milestones']}\n")
+                f.write(f"Steps: {progress['steps']}\n")
+                f.write(f"Frames: {progress['frames']}\n")
+                f.write(f"Active Time: {progress['elapsed_seconds'] / 60:.1f} minutes\n")
+                f.write(f"Score per Hour: {progress['score_per_hour']:.2f}\n")
+                if progress['milestones']:
+                    f.write(f"Steps per Milestone: {progress['steps_per_milestone']:.1f}\n")
+                f.write("\n")
+                
                 f.write("--- Pokemon Details ---\n")
                 for pokemon in sorted(EVALUATOR.pokemon_seen):
                     f.write(f"- {pokemon}\n")
@@ -687,10 +1291,17 @@ async def stop_environment():
                 f.write("\n--- Location Details ---\n")
                 for location in sorted(EVALUATOR.locations_visited):
                     f.write(f"- {location}\n")
+                
+                f.write("\n--- Milestone Timeline ---\n")
+                for milestone in EVALUATOR.milestone_timeline:
+                    f.write(f"- step {milestone['step']}, frame {milestone['frame']}: "
+                            f"{milestone['category']} {milestone['name']} "
+                            f"(+{milestone['score']}, total {milestone['total_score']:.2f})\n")
         except Exception as e:
             logger.error(f"Error writing evaluation summary: {e}")
     
     try:
+        close_forks()
         ENV.stop()
         ENV = None
         
@@ -700,6 +1311,7 @@ async def stop_environment():
             CSV_FILE.close()
             CSV_FILE = None
             CSV_WRITER = None
+        close_wram_diff_log()
         
         EVALUATOR = None  # Reset evaluator
             
@@ -744,10 +1356,57 @@ async def get_evaluation():
         "locations": {
             "count": len(EVALUATOR.locations_visited),
             "items": list(EVALUATOR.locations_visited)
-        }
+        },
+        "timeline": EVALUATOR.milestone_timeline,
+        "progress": EVALUATOR.get_progress_stats()
     }
 
 
+@app.get("/watches")
+async def list_watches():
+    """List the watched WRAM ranges of the session, with the known range names."""
+    if ENV is None:
+        raise HTTPException(status_code=400, detail="Environment not initialized. Call /initialize first.")
+    return {
+        "watches": {name: {"start": start, "end": end} for name, (start, end) in ENV.emulator.watcher.watches().items()},
+        "known_ranges": {name: {"start": start, "end": end} for name, (start, end) in WATCH_RANGES.items()},
+    }
+
+
+@app.post("/watch")
+async def add_watch(request: WatchRequest):
+    """
+    Watch a WRAM range; its changes are returned in action_result.memory_changes of each action.
+    
+    Args:
+        request: Name and address range of the watch
+    """
+    if ENV is None:
+        raise HTTPException(status_code=400, detail="Environment not initialized. Call /initialize first.")
+    if request.name.startswith(EVALUATOR_WATCH_PREFIX):
+        raise HTTPException(status_code=400, detail=f"Watch names starting with {EVALUATOR_WATCH_PREFIX} are reserved")
+    try:
+        ENV.emulator.watcher.watch(request.name, request.start, request.end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    start, end = ENV.emulator.watcher.watches()[request.name]
+    return {"name": request.name, "start": start, "end": end}
+
+
+@app.delete("/watch/{name}")
+async def remove_watch(name: str):
+    """Stop watching a WRAM range."""
+    if ENV is None:
+        raise HTTPException(status_code=400, detail="Environment not initialized. Call /initialize first.")
+    if name.startswith(EVALUATOR_WATCH_PREFIX):
+        raise HTTPException(status_code=400, detail=f"Watch names starting with {EVALUATOR_WATCH_PREFIX} are reserved")
+    try:
+        ENV.emulator.watcher.unwatch(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Not watching {name}")
+    return {"name": name, "removed": True}
+
+
 @app.post("/save_state")
 async def save_state(request: SaveStateRequest):
     """
@@ -784,6 +1443,7 @@ async def save_state(request: SaveStateRequest):
         
         # Save the state
         ENV.save_state(state_path)
+        save_evaluator_checkpoint(state_path)
         
         return {"status": "success", "state_file": state_path}
     
@@ -801,11 +1461,29 @@ if __name__ == "__main__":
     parser.add_argument("--port", type=int, default=8080, help="Port to run the server on")
     parser.add_argument("--rom", type=str, default="Pokemon_Red.gb", help="Path to the Pokemon ROM file")
     parser.add_argument("--log-file", type=str, help="Custom CSV filename (optional)")
+    parser.add_argument("--log-timings", action="store_true",
+                        help="Record frames emulated and the server-side timing breakdown in the CSV log")
+    parser.add_argument("--stub", action="store_true",
+                        help="Run without the ROM using a stub emulator (for load testing)")
+    parser.add_argument("--stub-fixture", type=str,
+                        help="Recorded fixture (.npz) for the stub emulator (default: synthetic state)")
+    parser.add_argument("--speculative", action="store_true",
+                        help="Pre-run the 8 single-button actions on forks while the agent decides")
+    parser.add_argument("--speculative-waits", type=int, nargs="*", default=[],
+                        help="Also speculate on Wait actions with these frame counts (implies --speculative)")
+    parser.add_argument("--wram-diff-log-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20,
+                        help="Maximum size in MiB of a session's WRAM diff log (sessions initialized with wram_diff)")
     
     args = parser.parse_args()
     
     # Set ROM path
     ROM_PATH = args.rom
+    LOG_TIMINGS = args.log_timings
+    STUB_EMULATOR = args.stub or bool(args.stub_fixture)
+    STUB_FIXTURE = args.stub_fixture
+    SPECULATIVE = args.speculative or bool(args.speculative_waits)
+    SPECULATIVE_WAITS = args.speculative_waits
+    WRAM_DIFF_LOG_MAX_BYTES = int(args.wram_diff_log_mb * 2**20)
     
     # Run the server
     uvicorn.run(app, host=args.host, port=args.port) 
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+On-demand sampling profiler for the evaluator server.
+
+A background thread periodically captures the Python stack of the thread that
+serves requests (via sys._current_frames) and aggregates the samples into the
+collapsed-stack format ("frame;frame;frame count" per line) read by
+flamegraph.pl, speedscope and inferno. Nothing is installed on the profiled
+thread, so when no profile is running there is no overhead at all.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Leaf functions of an event loop thread that is waiting for work (selectors.*Selector.select)
+IDLE_FUNCTIONS = {"select", "poll"}
+
+
+def _frame_label(code) -> str:
+    """Label a stack frame as function (file:first line), stable across samples."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005, include_idle: bool = False):
+        """
+        Create a profiler for a thread.
+
+        Args:
+            thread_id: Identifier of the thread to sample (threading.get_ident())
+            interval: Seconds between samples
+            include_idle: Keep samples taken while the thread waits in the event loop
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def duration(self) -> float:
+        """Seconds the profiler has been (or was) sampling."""
+        if self.started_at is None:
+            return 0.0
+        return (self.stopped_at or time.perf_counter()) - self.started_at
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._record(frame)
+
+    def _record(self, frame) -> None:
+        """Add one sample of the stack ending at frame."""
+        if not self.include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+            self.idle_samples += 1
+            return
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        self.stacks[";".join(labels)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Render the samples in the collapsed-stack format, one stack per line."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, float]:
+        """Sampling statistics for the profile."""
+        return {
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "duration": self.duration,
+            "interval": self.interval,
+        }
+
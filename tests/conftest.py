@@ -0,0 +1,115 @@
+"""
+Shared fixtures. Nothing here needs the ROM: emulators wrap the synthetic
+fixture from benchmarks/fixtures.py, whose memory only changes when a test
+writes to it.
+"""
+
+import csv
+
+import pytest
+
+from benchmarks.fixtures import FixturePyBoy, synthetic_fixture
+from pokemon_env.emulator import Emulator
+from pokemon_env.environment import PokemonEnvironment
+from pokemon_env.memory_reader import MapLocation
+
+# Columns the server logs that the evaluator reads
+LOG_FIELDS = ['timestamp', 'step_number', 'action_type', 'pokemons', 'badges', 'location', 'frame_count']
+
+
+class MovingPyBoy(FixturePyBoy):
+    """The synthetic fixture, except that direction buttons move the player and START walks onto Route 1."""
+
+    MOVES = {"up": (0xD361, -1), "down": (0xD361, 1), "left": (0xD362, -1), "right": (0xD362, 1)}
+
+    def button_press(self, button: str) -> None:
+        if button in self.MOVES:
+            address, delta = self.MOVES[button]
+            self.memory[address] = (self.memory[address] + delta) % 256
+        elif button == "start":
+            self.memory[0xD35E] = MapLocation.ROUTE_1.value
+
+
+@pytest.fixture
+def pyboy():
+    """Synthetic overworld fixture: Viridian City, Boulder badge, three party Pokemon."""
+    return synthetic_fixture()
+
+
+@pytest.fixture
+def emulator(pyboy):
+    return Emulator(None, pyboy=pyboy)
+
+
+@pytest.fixture
+def schedule():
+    """Make memory writes happen at given frames: schedule(emulator, {frame: {address: value}})."""
+    def add(emulator, writes):
+        start = emulator.frame_count
+
+        def apply(frame_count):
+            for address, value in writes.get(frame_count - start, {}).items():
+                emulator.pyboy.memory[address] = value
+        emulator.frame_hooks.insert(0, apply)
+    return add
+
+
+@pytest.fixture
+def environment():
+    """PokemonEnvironment on a MovingPyBoy, so actions change the game state."""
+    pyboy = synthetic_fixture()
+    pyboy.__class__ = MovingPyBoy
+    env = PokemonEnvironment(None, emulator=Emulator(None, pyboy=pyboy))
+    yield env
+    env.stop()
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """The evaluator server module, serving the stub emulator with sessions in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    # Imported here: the server creates its session directory in the working directory on import
+    from server import evaluator_server
+    monkeypatch.setattr(evaluator_server, "STUB_EMULATOR", True)
+    yield evaluator_server
+    if evaluator_server.ENV is not None:
+        evaluator_server.force_stop_session()
+
+
+@pytest.fixture
+def client(server):
+    """HTTP client of the server, with a session already initialized."""
+    from fastapi.testclient import TestClient
+    with TestClient(server.app) as client:
+        assert client.post("/initialize", json={}).status_code == 200
+        yield client
+
+
+@pytest.fixture
+def write_log():
+    """Write gameplay_data.csv rows (dicts with LOG_FIELDS keys) to a path."""
+    def write(path, rows, append=False):
+        with open(path, 'a' if append else 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
+            if not append:
+                writer.writeheader()
+            writer.writerows(rows)
+        return path
+    return write
+
+
+@pytest.fixture
+def log_row():
+    """Build one logged step, formatted the way the server writes it."""
+    def row(step, pokemons=(), badges=(), location="PALLET TOWN", seconds=None):
+        seconds = step if seconds is None else seconds
+        return {
+            'timestamp': f"2025-01-01T{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+            'step_number': str(step),
+            'action_type': 'initialize' if step == 0 else 'press_key',
+            'pokemons': repr([{'species': species, 'level': 5} for species in pokemons]),
+            'badges': repr(list(badges)),
+            'location': location,
+            'frame_count': str(step * 130),
+        }
+    return row
@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+
+from benchmarks.fixtures import load_fixture, record_fixture, synthetic_fixture
+from benchmarks.run_benchmarks import build_benchmarks, compare_to_baseline, time_benchmark
+from pokemon_env.emulator import Emulator
+
+
+def test_fixture_round_trip(tmp_path, pyboy):
+    path = str(tmp_path / "fixture.npz")
+    record_fixture(pyboy, path)
+    loaded = load_fixture(path)
+    assert loaded.memory.tobytes() == pyboy.memory.tobytes()
+    assert np.array_equal(loaded.game_wrapper.game_area(), pyboy.game_wrapper.game_area())
+    assert np.array_equal(loaded.screen.ndarray, pyboy.screen.ndarray)
+    assert Emulator(None, pyboy=loaded).get_state_from_memory() == Emulator(None, pyboy=pyboy).get_state_from_memory()
+
+
+def test_fixture_state_loads_into_the_same_memory(pyboy):
+    memory = pyboy.memory
+    state = io.BytesIO()
+    pyboy.save_state(state)
+    memory[0xD356] = 0xFF
+    pyboy.load_state(io.BytesIO(state.getvalue()))
+    assert pyboy.memory is memory
+    assert memory[0xD356] == synthetic_fixture().memory[0xD356]
+
+
+def test_every_benchmark_runs(pyboy):
+    for name, func in build_benchmarks(pyboy).items():
+        func()
+
+
+def test_time_benchmark_summary():
+    result = time_benchmark(lambda: sum(range(100)), samples=5)
+    assert result["samples"] == 5
+    assert result["p50"] <= result["p90"] <= result["p99"]
+    assert result["ops_per_sec"] > 0
+
+
+def test_compare_to_baseline_flags_slowdowns():
+    baseline = {"results": {"fast": {"p50": 1.0}, "slow": {"p50": 1.0}}}
+    results = {"fast": {"p50": 1.1}, "slow": {"p50": 1.5}, "new": {"p50": 1.0}}
+    assert compare_to_baseline(results, baseline, threshold=0.2) == ["slow"]
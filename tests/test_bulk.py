@@ -0,0 +1,77 @@
+import csv
+import json
+
+import pytest
+
+from evaluator import bulk
+from evaluator.bulk import RESULT_FILENAME, evaluate_session, evaluate_sessions, find_session_logs, write_leaderboard
+
+
+@pytest.fixture
+def sessions(tmp_path, write_log, log_row):
+    """Two sessions; the second was resumed once, so its step numbers restart at 0."""
+    first = tmp_path / "session_a"
+    first.mkdir()
+    write_log(str(first / "gameplay_data.csv"), [log_row(0), log_row(1, ["PIDGEY"])])
+    second = tmp_path / "session_b"
+    second.mkdir()
+    write_log(str(second / "gameplay_data.csv"), [
+        log_row(0), log_row(1, ["CHARMANDER"]), log_row(2, ["CHARMANDER"], location="ROUTE 1"),
+        log_row(0, ["CHARMANDER"], location="ROUTE 1"), log_row(1, ["CHARMANDER"], location="VIRIDIAN CITY"),
+    ])
+    (tmp_path / "leaderboard.csv").write_text("rank,session\n")
+    return tmp_path
+
+
+def test_find_session_logs_skips_stray_csvs(sessions):
+    assert find_session_logs(str(sessions)) == [
+        str(sessions / "session_a" / "gameplay_data.csv"),
+        str(sessions / "session_b" / "gameplay_data.csv"),
+    ]
+    assert find_session_logs(str(sessions / "session_a")) == [str(sessions / "session_a" / "gameplay_data.csv")]
+
+
+def test_steps_count_action_rows_of_all_segments(sessions):
+    result = evaluate_session(str(sessions / "session_b" / "gameplay_data.csv"))
+    assert result["session"] == "session_b"
+    assert result["steps"] == 3
+    assert result["locations"] == ["PALLET_TOWN", "ROUTE_1", "VIRIDIAN_CITY"]
+
+
+def test_results_are_ranked_and_written(sessions):
+    results = evaluate_sessions(find_session_logs(str(sessions)), workers=1)
+    assert [result["session"] for result in results] == ["session_b", "session_a"]
+    written = json.loads((sessions / "session_b" / RESULT_FILENAME).read_text())
+    assert written == results[0]
+
+    output = str(sessions / "leaderboard.csv")
+    write_leaderboard(results, output)
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["rank"], row["session"]) for row in rows] == [("1", "session_b"), ("2", "session_a")]
+
+
+def test_cache_reuses_unchanged_logs_only(sessions, monkeypatch, write_log, log_row):
+    csv_paths = find_session_logs(str(sessions))
+    cache_path = str(sessions / "cache.json")
+    evaluate_sessions(csv_paths, workers=1, cache_path=cache_path, write_results=False)
+
+    # Mark the cached results; they are only returned while the signatures still match
+    cache = json.loads(open(cache_path).read())
+    for entry in cache.values():
+        entry["result"]["total_score"] = -1.0
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f)
+    results = evaluate_sessions(csv_paths, workers=1, cache_path=cache_path, write_results=False)
+    assert [result["total_score"] for result in results] == [-1.0, -1.0]
+
+    write_log(csv_paths[0], [log_row(2, ["PIDGEY"], location="ROUTE 1")], append=True)
+    scores = {r["session"]: r["total_score"]
+              for r in evaluate_sessions(csv_paths, workers=1, cache_path=cache_path, write_results=False)}
+    assert scores["session_a"] > 0
+    assert scores["session_b"] == -1.0
+
+    # A new scoring version invalidates every cached result
+    monkeypatch.setattr(bulk, "SCORING_VERSION", bulk.SCORING_VERSION + 1)
+    results = evaluate_sessions(csv_paths, workers=1, cache_path=cache_path, write_results=False)
+    assert all(result["total_score"] > 0 for result in results)
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from evaluator.evaluate import CHECKPOINT_SUFFIX, PokemonEvaluator
+
+
+@pytest.fixture
+def session(tmp_path, write_log, log_row):
+    """A session directory whose log has a checkpoint after step 2 and two more rows after it."""
+    csv_path = str(tmp_path / "gameplay_data.csv")
+    write_log(csv_path, [log_row(0), log_row(1, ["CHARMANDER"]), log_row(2, ["CHARMANDER"], location="ROUTE 1")])
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.evaluate_csv(csv_path)
+    evaluator.save_checkpoint(str(tmp_path / ("autosave" + CHECKPOINT_SUFFIX)),
+                              csv_offset=os.path.getsize(csv_path), step_number=2)
+    write_log(csv_path, [log_row(3, ["CHARMANDER", "PIDGEY"], location="ROUTE 1"),
+                         log_row(4, ["CHARMANDER", "PIDGEY"], location="VIRIDIAN CITY")], append=True)
+    return tmp_path
+
+
+def full_replay(session):
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.evaluate_csv(str(session / "gameplay_data.csv"))
+    return evaluator
+
+
+def test_checkpoint_round_trip(tmp_path):
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.evaluate_ids([0xB0], 0b1, 0x00, step=3, frame=400, timestamp=100.0)
+    path = str(tmp_path / "state.eval.json")
+    evaluator.save_checkpoint(path, csv_offset=123, step_number=3)
+
+    restored = PokemonEvaluator(verbose=False)
+    checkpoint = restored.load_checkpoint(path)
+    assert checkpoint["csv_offset"] == 123
+    assert restored.total_score == evaluator.total_score
+    assert restored.pokemon_seen == evaluator.pokemon_seen == {"CHARMANDER"}
+    assert restored.badges_earned == evaluator.badges_earned
+    assert restored.locations_visited == evaluator.locations_visited
+    assert restored.milestone_timeline == evaluator.milestone_timeline
+    assert (restored.current_step, restored.current_frame) == (3, 400)
+
+
+def test_resume_replays_only_rows_after_checkpoint(session):
+    checkpoint_path = session / ("autosave" + CHECKPOINT_SUFFIX)
+    checkpoint = json.loads(checkpoint_path.read_text())
+    # A marker score that only survives if the resume starts from the checkpoint
+    checkpoint["total_score"] += 100
+    checkpoint_path.write_text(json.dumps(checkpoint))
+
+    evaluator = PokemonEvaluator(verbose=False)
+    assert evaluator.load_state_from_session(str(session))
+    expected = full_replay(session)
+    assert evaluator.total_score == pytest.approx(expected.total_score + 100)
+    assert evaluator.pokemon_seen == expected.pokemon_seen
+    assert evaluator.locations_visited == expected.locations_visited
+
+
+def test_resume_ignores_checkpoint_past_end_of_log(session):
+    checkpoint_path = session / ("autosave" + CHECKPOINT_SUFFIX)
+    checkpoint = json.loads(checkpoint_path.read_text())
+    checkpoint["csv_offset"] = os.path.getsize(session / "gameplay_data.csv") + 1
+    checkpoint["total_score"] += 100
+    checkpoint_path.write_text(json.dumps(checkpoint))
+
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.load_state_from_session(str(session))
+    assert evaluator.total_score == full_replay(session).total_score
+
+
+def test_checkpoint_of_other_version_is_ignored(session):
+    checkpoint_path = session / ("autosave" + CHECKPOINT_SUFFIX)
+    checkpoint = json.loads(checkpoint_path.read_text())
+    checkpoint["version"] = -1
+    checkpoint_path.write_text(json.dumps(checkpoint))
+
+    evaluator = PokemonEvaluator(verbose=False)
+    assert evaluator.load_checkpoint(str(checkpoint_path)) is None
+    evaluator.load_state_from_session(str(session))
+    assert evaluator.total_score == full_replay(session).total_score
@@ -0,0 +1,80 @@
+import pytest
+
+from pokemon_env.action import WaitUntil
+from pokemon_env.conditions import IN_BATTLE, MAP_ID, TEXT_STABLE_FRAMES, ConditionWatcher
+from pokemon_env.readiness import BORDER_TOP_LEFT, STABLE_FRAMES, TEXT_BOX_CORNER
+
+
+def checks_until_fired(watcher, limit=100):
+    for count in range(1, limit + 1):
+        condition = watcher.check()
+        if condition is not None:
+            return condition, count
+    return None, limit
+
+
+def test_memory_conditions_fire_at_once():
+    memory = bytearray(0x10000)
+    watcher = ConditionWatcher(memory, ["map_changed", "battle_started"])
+    assert watcher.check() is None
+    memory[IN_BATTLE] = 1
+    assert watcher.check() == "battle_started"
+    memory[MAP_ID] = 12
+    # The first listed condition that holds wins
+    assert watcher.check() == "map_changed"
+    assert ConditionWatcher(memory, ["battle_ended", "battle_started"]).check() == "battle_started"
+
+
+def test_dialog_conditions_wait_for_the_text_to_finish():
+    memory = bytearray(0x10000)
+    memory[TEXT_BOX_CORNER] = BORDER_TOP_LEFT
+    assert checks_until_fired(ConditionWatcher(memory, ["dialog_open"])) == ("dialog_open", TEXT_STABLE_FRAMES + 1)
+
+    watcher = ConditionWatcher(memory, ["dialog_changed"])
+    assert checks_until_fired(watcher, 20) == (None, 20)
+    memory[TEXT_BOX_CORNER + 21] = 0x80  # A letter of new text
+    assert checks_until_fired(watcher) == ("dialog_changed", TEXT_STABLE_FRAMES + 1)
+
+
+def test_screen_static_and_input_ready():
+    memory = bytearray(0x10000)
+    assert checks_until_fired(ConditionWatcher(memory, ["screen_static"])) == ("screen_static", STABLE_FRAMES + 1)
+    assert checks_until_fired(ConditionWatcher(memory, ["input_ready"])) == ("input_ready", STABLE_FRAMES + 1)
+
+
+def test_wait_until_action_validation():
+    assert str(WaitUntil(["map_changed", "battle_started"], 50)) == \
+        "WaitUntil: map_changed or battle_started (at most 50 frames)"
+    with pytest.raises(ValueError):
+        ConditionWatcher(bytearray(0x10000), ["dialog_open", "sunrise"])
+    with pytest.raises(ValueError):
+        WaitUntil(conditions=[])
+    with pytest.raises(ValueError):
+        WaitUntil(conditions=["sunrise"])
+    with pytest.raises(ValueError):
+        WaitUntil(conditions=["map_changed"], max_frames=0)
+
+
+def test_emulator_wait_until(emulator, schedule):
+    # Already true before any frame runs
+    assert emulator.wait_until(["battle_ended"], 100) == ("battle_ended", 0)
+
+    schedule(emulator, {25: {MAP_ID: emulator.pyboy.memory[MAP_ID] + 1}})
+    start = emulator.frame_count
+    assert emulator.wait_until(["battle_started", "map_changed"], 100) == ("map_changed", 25)
+    assert emulator.frame_count - start == 25
+
+    assert emulator.wait_until(["battle_started"], 40) == (None, 40)
+
+
+def test_wait_until_action(client, server):
+    response = client.post("/action", json={"action_type": "wait_until", "conditions": ["map_changed"], "frames": 50})
+    assert response.status_code == 200
+    assert response.json()["action_result"] == {"condition": None, "frames": 50}
+
+    response = client.post("/action", json={"action_type": "wait_until", "conditions": ["screen_static"]})
+    assert response.json()["action_result"]["condition"] == "screen_static"
+
+    for conditions in (["sunrise"], [], None):
+        response = client.post("/action", json={"action_type": "wait_until", "conditions": conditions})
+        assert response.status_code == 400
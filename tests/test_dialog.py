@@ -0,0 +1,87 @@
+from benchmarks.fixtures import FixturePyBoy, synthetic_fixture
+from pokemon_env.action import PressKey
+from pokemon_env.emulator import Emulator
+from pokemon_env.environment import PokemonEnvironment
+from pokemon_env.readiness import BORDER_TOP_LEFT, TEXT_BOX_CORNER, TILEMAP_END
+
+TEXT_LINE = TEXT_BOX_CORNER + 2 * 20 + 1  # Where the first line of text starts
+CURSOR = 0xED
+
+
+def encode(text):
+    return bytes(0x7F if char == " " else 0x80 + ord(char) - ord("A") for char in text)
+
+
+class DialogPyBoy(FixturePyBoy):
+    """The synthetic fixture showing a text box; A shows the next page and closes the box after the last one."""
+
+    def show(self, pages):
+        self.pages = list(pages)
+        self.presses = 0
+        self._draw()
+
+    def _draw(self):
+        self.memory[TEXT_BOX_CORNER:TILEMAP_END] = bytes(TILEMAP_END - TEXT_BOX_CORNER)
+        if self.pages:
+            text = self.pages[0]
+            self.memory[TEXT_BOX_CORNER] = BORDER_TOP_LEFT
+            self.memory[TEXT_LINE:TEXT_LINE + len(text)] = encode(text.rstrip(">"))
+            if text.endswith(">"):  # A choice: the cursor is on screen
+                self.memory[TEXT_LINE + len(text)] = CURSOR
+
+    def button_press(self, button):
+        if button == "a" and self.pages:
+            self.presses += 1
+            self.pages.pop(0)
+            self._draw()
+
+
+def dialog_emulator(pages):
+    pyboy = synthetic_fixture()
+    pyboy.__class__ = DialogPyBoy
+    pyboy.show(pages)
+    return Emulator(None, pyboy=pyboy)
+
+
+def test_advance_dialog_reads_every_page_until_the_box_closes():
+    emulator = dialog_emulator(["HELLO", "WELCOME TO KANTO"])
+    transcript, presses = emulator.advance_dialog()
+    assert transcript == ["HELLO", "WELCOME TO KANTO"]
+    assert presses == 2
+    assert emulator.get_active_dialog() is None
+
+
+def test_advance_dialog_stops_at_a_choice_and_the_press_limit():
+    emulator = dialog_emulator(["OAK", "ARE YOU A BOY>", "GOOD"])
+    transcript, presses = emulator.advance_dialog()
+    assert transcript == ["OAK", "ARE YOU A BOY►"]
+    assert presses == 1
+    assert emulator.pyboy.pages[0] == "ARE YOU A BOY>"
+
+    emulator = dialog_emulator(["ONE", "TWO", "THREE"])
+    assert emulator.advance_dialog(max_presses=2) == (["ONE", "TWO", "THREE"], 2)
+
+
+def test_advance_dialog_stops_when_a_does_nothing():
+    emulator = dialog_emulator(["SIGN"])
+    emulator.pyboy.__class__ = FixturePyBoy  # A no longer advances the text
+    assert emulator.advance_dialog() == (["SIGN"], 1)
+    assert dialog_emulator([]).advance_dialog() == ([], 0)
+
+
+def test_environment_auto_advance_dialog():
+    env = PokemonEnvironment(None, emulator=dialog_emulator(["HI", "BYE"]), auto_advance_dialog=True)
+    try:
+        env.step(PressKey(keys=["b"]))
+        assert env.last_step_info["dialog_transcript"] == ["HI", "BYE"]
+        assert env.last_step_info["dialog_presses"] == 2
+        env.step(PressKey(keys=["b"]))
+        assert "dialog_transcript" not in env.last_step_info
+    finally:
+        env.stop()
+
+
+def test_auto_advance_dialog_session_setting(client, server):
+    client.post("/stop")
+    assert client.post("/initialize", json={"auto_advance_dialog": True}).status_code == 200
+    assert server.ENV.auto_advance_dialog
@@ -0,0 +1,101 @@
+import ast
+from types import SimpleNamespace
+
+import pytest
+
+from evaluator.evaluate import PokemonEvaluator
+from evaluator.milestones import badge_difficulty_ratings, location_scores_by_name, pokemon_difficulty_ratings_refined
+
+
+@pytest.fixture
+def rows(log_row):
+    """A short session: start in Pallet Town, get a starter, reach Viridian City, win a badge."""
+    return [
+        log_row(0),
+        log_row(1, ["CHARMANDER"]),
+        log_row(2, ["CHARMANDER"], location="ROUTE 1"),
+        log_row(3, ["CHARMANDER", "PIDGEY"], location="ROUTE 1"),
+        log_row(4, ["CHARMANDER", "PIDGEY"], location="VIRIDIAN CITY"),
+        log_row(5, ["CHARMANDER", "PIDGEY"], ["BOULDER"], location="VIRIDIAN CITY"),
+    ]
+
+
+def as_state(row):
+    return SimpleNamespace(pokemons=ast.literal_eval(row["pokemons"]), badges=ast.literal_eval(row["badges"]),
+                           location=row["location"])
+
+
+def test_evaluate_state_matches_csv(tmp_path, write_log, rows):
+    csv_evaluator = PokemonEvaluator(verbose=False)
+    csv_evaluator.evaluate_csv(write_log(str(tmp_path / "gameplay_data.csv"), rows))
+    state_evaluator = PokemonEvaluator(verbose=False)
+    for row in rows:
+        state_evaluator.evaluate_state(as_state(row))
+
+    expected = (
+        pokemon_difficulty_ratings_refined["CHARMANDER"] + pokemon_difficulty_ratings_refined["PIDGEY"]
+        + location_scores_by_name["PALLET_TOWN"] + location_scores_by_name["ROUTE_1"]
+        + location_scores_by_name["VIRIDIAN_CITY"] + badge_difficulty_ratings["BOULDER"]
+    )
+    assert csv_evaluator.total_score == pytest.approx(expected)
+    assert state_evaluator.total_score == csv_evaluator.total_score
+    assert state_evaluator.pokemon_seen == csv_evaluator.pokemon_seen == {"CHARMANDER", "PIDGEY"}
+    assert state_evaluator.badges_earned == csv_evaluator.badges_earned == {"BOULDER"}
+    assert state_evaluator.locations_visited == csv_evaluator.locations_visited
+
+
+def test_evaluate_state_scores_each_milestone_once(rows):
+    evaluator = PokemonEvaluator(verbose=False)
+    state = as_state(rows[-1])
+    evaluator.evaluate_state(state)
+    score = evaluator.total_score
+    evaluator.evaluate_state(state)
+    state.pokemons = state.pokemons[:1]  # A smaller party scores nothing new
+    evaluator.evaluate_state(state)
+    assert evaluator.total_score == score
+    assert len(evaluator.milestone_timeline) == 4
+
+
+def test_evaluate_state_skips_unknown_names():
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.evaluate_state(SimpleNamespace(pokemons=[{'species': 'MISSINGNO'}, {'level': 3}],
+                                             badges=['NOT_A_BADGE'], location=None))
+    assert evaluator.total_score == 0
+    assert not evaluator.milestone_timeline
+
+
+def test_timeline_stamps_milestones_with_progress(tmp_path, write_log, log_row):
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.evaluate_csv(write_log(str(tmp_path / "gameplay_data.csv"),
+                                     [log_row(0), log_row(1), log_row(2, ["CHARMANDER"])]))
+    first, second = evaluator.milestone_timeline
+    assert (first["name"], first["step"], first["frame"]) == ("PALLET_TOWN", 0, 0)
+    assert (second["name"], second["step"], second["frame"]) == ("CHARMANDER", 2, 260)
+    assert second["timestamp"] - first["timestamp"] == 2
+    assert second["total_score"] == evaluator.total_score
+
+
+def test_resumed_segments_add_steps_but_not_the_gap_between_them(tmp_path, write_log, log_row):
+    rows = [log_row(0), log_row(1), log_row(2, ["CHARMANDER"]),
+            # Resumed an hour later; step numbers start over
+            log_row(0, ["CHARMANDER"], seconds=3602), log_row(1, ["CHARMANDER", "PIDGEY"], seconds=3604)]
+    csv_path = write_log(str(tmp_path / "gameplay_data.csv"), rows)
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.evaluate_csv(csv_path)
+
+    stats = evaluator.get_progress_stats()
+    assert stats["steps"] == 3
+    assert stats["elapsed_seconds"] == 4
+    assert evaluator.milestone_timeline[-1]["step"] == 3
+    assert stats["steps_per_milestone"] == 1.0
+
+    # The same totals when the second segment is scored after restoring a checkpoint
+    first = PokemonEvaluator(verbose=False)
+    for row in rows[:3]:
+        first.evaluate_row(row)
+    first.save_checkpoint(str(tmp_path / "autosave.eval.json"))
+    resumed = PokemonEvaluator(verbose=False)
+    resumed.load_checkpoint(str(tmp_path / "autosave.eval.json"))
+    for row in rows[3:]:
+        resumed.evaluate_row(row)
+    assert resumed.get_progress_stats() == stats
@@ -0,0 +1,73 @@
+from benchmarks.fixtures import synthetic_fixture
+from pokemon_env.action import Wait
+from pokemon_env.conditions import IN_BATTLE, MAP_ID
+from pokemon_env.emulator import Emulator
+from pokemon_env.environment import PokemonEnvironment
+from pokemon_env.events import MAX_EVENTS, PARTY_HP, EventRecorder
+from pokemon_env.memory_reader import MapLocation
+from pokemon_env.readiness import BORDER_TOP_LEFT, TEXT_BOX_CORNER, TILEMAP_END
+
+TEXT_LINE = TEXT_BOX_CORNER + 2 * 20 + 1
+HI = [0x87, 0x88]  # "HI"
+
+
+def test_events_recorded_during_an_action(schedule):
+    emulator = Emulator(None, pyboy=synthetic_fixture())
+    env = PokemonEnvironment(None, emulator=emulator, capture_events=True)
+    try:
+        memory = emulator.pyboy.memory
+        memory[TEXT_BOX_CORNER:TILEMAP_END] = bytes(TILEMAP_END - TEXT_BOX_CORNER)  # Close the fixture's text box
+        start_map, hp = memory[MAP_ID], memory[PARTY_HP + 1]
+        schedule(emulator, {
+            10: {MAP_ID: MapLocation.ROUTE_1.value},
+            20: {IN_BATTLE: 2},
+            # The HP bar drains one point per frame
+            30: {PARTY_HP + 1: hp - 1}, 31: {PARTY_HP + 1: hp - 2}, 32: {PARTY_HP + 1: hp - 3},
+            50: {IN_BATTLE: 0},
+            60: {TEXT_BOX_CORNER: BORDER_TOP_LEFT, TEXT_LINE: HI[0], TEXT_LINE + 1: HI[1]},
+            90: {TEXT_BOX_CORNER: 0},
+        })
+        env.step(Wait(frames=100))
+        assert env.last_step_info["events"] == [
+            {"frame": 10, "event": "map_changed", "from": start_map, "to": MapLocation.ROUTE_1.value},
+            {"frame": 20, "event": "battle_started", "battle_type": 2},
+            {"frame": 30, "event": "hp_changed", "slot": 0, "from": hp, "to": hp - 3},
+            {"frame": 50, "event": "battle_ended"},
+            {"frame": 60, "event": "dialog_opened"},
+            {"frame": 68, "event": "dialog", "text": "HI"},
+            {"frame": 90, "event": "dialog_closed"},
+        ]
+
+        # Events start over with every action
+        env.step(Wait(frames=10))
+        assert "events" not in env.last_step_info
+    finally:
+        env.stop()
+
+
+def test_text_on_screen_when_the_action_starts_is_not_an_event():
+    memory = bytearray(0x10000)
+    memory[TEXT_BOX_CORNER] = BORDER_TOP_LEFT
+    memory[TEXT_LINE:TEXT_LINE + 2] = bytes(HI)
+    recorder = EventRecorder(memory)
+    for frame in range(1, 20):
+        recorder.sample(frame)
+    assert recorder.events == []
+
+
+def test_events_are_capped():
+    memory = bytearray(0x10000)
+    recorder = EventRecorder(memory)
+    for frame in range(1, 2 * MAX_EVENTS):
+        memory[MAP_ID] = frame % 2
+        recorder.sample(frame)
+    assert len(recorder.events) == MAX_EVENTS
+    recorder.start(500)
+    assert recorder.events == []
+
+
+def test_capture_events_session_setting(client, server):
+    client.post("/stop")
+    assert client.post("/initialize", json={"capture_events": True}).status_code == 200
+    assert server.ENV.event_recorder.sample in server.ENV.emulator.frame_hooks
+    assert client.post("/action", json={"action_type": "wait", "frames": 5}).status_code == 200
@@ -0,0 +1,57 @@
+from pokemon_env.action import Wait
+from pokemon_env.emulator import FAST_OPTIONS, OPTIONS_ADDRESS, Emulator
+from pokemon_env.environment import PokemonEnvironment
+
+SLOW_OPTIONS = 0x03  # Medium text, animations on, SHIFT style
+
+
+def test_apply_fast_options(emulator):
+    emulator.pyboy.memory[OPTIONS_ADDRESS] = SLOW_OPTIONS
+    assert emulator.apply_fast_options()
+    assert emulator.pyboy.memory[OPTIONS_ADDRESS] == FAST_OPTIONS
+    assert not emulator.apply_fast_options()
+
+
+def test_environment_keeps_fast_options(emulator, tmp_path):
+    emulator.pyboy.memory[OPTIONS_ADDRESS] = SLOW_OPTIONS
+    env = PokemonEnvironment(None, emulator=emulator, fast_options=True)
+    try:
+        assert emulator.pyboy.memory[OPTIONS_ADDRESS] == FAST_OPTIONS
+        emulator.pyboy.memory[OPTIONS_ADDRESS] = SLOW_OPTIONS  # The player changed the options
+        env.step(Wait(frames=1))
+        assert emulator.pyboy.memory[OPTIONS_ADDRESS] == FAST_OPTIONS
+
+        state = str(tmp_path / "slow.state")
+        emulator.pyboy.memory[OPTIONS_ADDRESS] = SLOW_OPTIONS
+        emulator.save_state(state)
+        env.load_state(state)
+        assert emulator.pyboy.memory[OPTIONS_ADDRESS] == FAST_OPTIONS
+    finally:
+        env.stop()
+
+
+def test_options_untouched_by_default(emulator):
+    emulator.pyboy.memory[OPTIONS_ADDRESS] = SLOW_OPTIONS
+    env = PokemonEnvironment(None, emulator=emulator)
+    try:
+        env.step(Wait(frames=1))
+        assert emulator.pyboy.memory[OPTIONS_ADDRESS] == SLOW_OPTIONS
+    finally:
+        env.stop()
+
+
+def test_fast_options_applied_after_boot(client, server, monkeypatch):
+    boot = Emulator.initialize
+
+    def initialize(self):
+        boot(self)
+        self.pyboy.memory[OPTIONS_ADDRESS] = SLOW_OPTIONS  # The game loads its saved options while booting
+    monkeypatch.setattr(Emulator, "initialize", initialize)
+
+    client.post("/stop")
+    assert client.post("/initialize", json={"fast_options": True}).status_code == 200
+    assert server.ENV.emulator.pyboy.memory[OPTIONS_ADDRESS] == FAST_OPTIONS
+
+    client.post("/stop")
+    assert client.post("/initialize", json={}).status_code == 200
+    assert server.ENV.emulator.pyboy.memory[OPTIONS_ADDRESS] == SLOW_OPTIONS
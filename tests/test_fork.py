@@ -0,0 +1,56 @@
+import pytest
+
+from pokemon_env.action import PressKey
+from pokemon_env.fork import ForkError
+
+
+def test_fork_starts_from_the_same_state_and_diverges(environment):
+    environment.step(PressKey(keys=["right"]))
+    with environment.fork() as fork:
+        assert fork.get_state_hash() == environment.get_state_hash()
+        assert fork.steps_taken == environment.steps_taken == 1
+
+        state = fork.step(PressKey(keys=["down", "down"]))
+        assert state.coordinates == (13, 12)
+        assert fork.steps_taken == 2
+        # The original is untouched
+        assert environment.state.coordinates == (13, 10)
+        assert environment.steps_taken == 1
+        assert fork.get_state_hash() != environment.get_state_hash()
+
+
+def test_fork_of_a_fork(environment):
+    with environment.fork() as fork:
+        fork.step(PressKey(keys=["left"]))
+        with fork.fork() as grandchild:
+            assert grandchild.state.coordinates == (11, 10)
+            grandchild.step(PressKey(keys=["left"]))
+            assert grandchild.state.coordinates == (10, 10)
+            assert fork.state.coordinates == (11, 10)
+
+
+def test_fork_errors(environment):
+    fork = environment.fork()
+    with pytest.raises(AttributeError):
+        fork.call("_execute", PressKey(keys=["a"]))
+    assert fork.call("steps_taken") == 0  # The fork keeps serving after an error
+    fork.close()
+    with pytest.raises(ForkError):
+        fork.step(PressKey(keys=["a"]))
+
+
+def test_fork_endpoints(client):
+    client.post("/action", json={"action_type": "press_key", "keys": ["a"]})
+    fork_id = client.post("/fork", json={}).json()["fork_id"]
+    child_id = client.post("/fork", json={"from_fork": fork_id}).json()["fork_id"]
+    assert {fork["fork_id"] for fork in client.get("/forks").json()["forks"]} == {fork_id, child_id}
+
+    response = client.post(f"/fork/{child_id}/action", json={"action_type": "wait", "frames": 10})
+    assert response.status_code == 200
+    assert response.json()["step_number"] == 2
+    assert client.get("/status").json()["steps_taken"] == 1
+
+    assert client.post(f"/fork/{fork_id}/action", json={"action_type": "press_key", "keys": ["z"]}).status_code == 400
+    assert client.post("/fork/missing/action", json={"action_type": "wait", "frames": 1}).status_code == 404
+    assert client.delete(f"/fork/{fork_id}").status_code == 200
+    assert client.delete(f"/fork/{fork_id}").status_code == 404
@@ -0,0 +1,39 @@
+import pytest
+
+from benchmarks.load_generator import READ_ENDPOINTS, EndpointStats, SyntheticAgent, percentile
+
+
+@pytest.mark.parametrize("policy", ["random", "scripted"])
+def test_agent_requests_are_accepted_by_the_stub_server(client, policy):
+    agent = SyntheticAgent(policy, read_ratio=0.3, seed=1, include_timings=True)
+    for _ in range(20):
+        method, endpoint, body = agent.next_request()
+        response = client.request(method, endpoint, json=body)
+        assert response.status_code == 200, (endpoint, body, response.text)
+        if endpoint == "/action":
+            assert response.json()["timings"]
+
+
+def test_agents_are_reproducible_per_seed():
+    first, second = SyntheticAgent("random", 0.2, seed=7), SyntheticAgent("random", 0.2, seed=7)
+    assert [first.next_request() for _ in range(50)] == [second.next_request() for _ in range(50)]
+
+
+def test_read_ratio():
+    agent = SyntheticAgent("scripted", read_ratio=1.0, seed=0)
+    assert all(agent.next_request()[1] in READ_ENDPOINTS for _ in range(20))
+    with pytest.raises(ValueError):
+        SyntheticAgent("greedy", 0.0, seed=0)
+
+
+def test_endpoint_stats_summary():
+    stats = EndpointStats()
+    for latency in [0.4, 0.1, 0.3, 0.2]:
+        stats.record(latency, ok=latency < 0.4)
+    summary = stats.summary(duration=2.0)
+    assert summary["requests"] == 4
+    assert summary["requests_per_sec"] == 2.0
+    assert summary["p50"] == 0.3
+    assert summary["max"] == 0.4
+    assert summary["error_rate"] == 0.25
+    assert percentile([], 0.5) == 0.0
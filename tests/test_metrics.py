@@ -0,0 +1,53 @@
+from server.metrics import MetricsRegistry, PhaseTimer
+
+
+def sample(text, line_start):
+    """Value of the first exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"No sample {line_start} in:\n{text}")
+
+
+def test_counter_and_histogram_exposition():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ["endpoint"])
+    steps = registry.counter("steps_total", "Steps")
+    latency = registry.histogram("latency_seconds", "Latency", ["phase"], buckets=(0.1, 1.0))
+    errors.inc(endpoint="action")
+    errors.inc(2, endpoint="action")
+    latency.observe(0.05, phase="emulation")
+    latency.observe(0.5, phase="emulation")
+    latency.observe(5.0, phase="emulation")
+
+    text = registry.render()
+    assert "# TYPE errors_total counter" in text
+    assert 'errors_total{endpoint="action"} 3' in text
+    assert "steps_total 0" in text  # Unlabelled counters are exported before their first increment
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{phase="emulation",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{phase="emulation",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{phase="emulation",le="+Inf"} 3' in text
+    assert sample(text, 'latency_seconds_sum{phase="emulation"}') == 5.55
+    assert 'latency_seconds_count{phase="emulation"} 3' in text
+
+
+def test_phase_timer_accumulates():
+    timer = PhaseTimer({"emulation": 1.0})
+    timer.add("emulation", 0.5)
+    with timer.phase("encode"):
+        pass
+    assert timer.timings["emulation"] == 1.5
+    assert timer.timings["encode"] >= 0
+
+
+def test_metrics_endpoint_counts_actions(client):
+    before = client.get("/metrics").text
+    assert client.post("/action", json={"action_type": "wait", "frames": 30}).status_code == 200
+    after = client.get("/metrics").text
+
+    assert sample(after, "pokemon_gym_steps_total") == sample(before, "pokemon_gym_steps_total") + 1
+    assert sample(after, "pokemon_gym_frames_emulated_total") == \
+        sample(before, "pokemon_gym_frames_emulated_total") + 30
+    assert sample(after, 'pokemon_gym_action_phase_seconds_count{phase="emulation"}') >= 1
+    assert sample(after, "pokemon_gym_action_seconds_count") >= 1
@@ -0,0 +1,51 @@
+import ast
+from types import SimpleNamespace
+
+from evaluator.evaluate import PokemonEvaluator, ids_from_state, verify_incremental
+from evaluator.milestone_index import get_milestone_index
+from evaluator.milestones import badge_difficulty_ratings, location_scores_by_name, pokemon_difficulty_ratings_refined
+from pokemon_env.memory_reader import Badge, MapLocation, Pokemon
+
+
+def test_index_matches_ratings():
+    index = get_milestone_index()
+    assert index.pokemon_names[Pokemon.CHARMANDER.value] == "CHARMANDER"
+    assert index.pokemon_scores[Pokemon.CHARMANDER.value] == pokemon_difficulty_ratings_refined["CHARMANDER"]
+    assert index.location_scores[MapLocation.VIRIDIAN_CITY.value] == location_scores_by_name["VIRIDIAN_CITY"]
+    assert index.badge_names[0] == "BOULDER"
+    assert index.badge_scores[7] == badge_difficulty_ratings[Badge(1 << 7).name]
+    assert sum(name is not None for name in index.pokemon_names) == sum(
+        name in pokemon_difficulty_ratings_refined for name in Pokemon.__members__)
+
+
+def test_ids_from_state():
+    state = SimpleNamespace(pokemons=[{'species': 'CHARMANDER'}, {'species': 'MR MIME'}, {'species': 'UNKNOWN'}],
+                            badges=['BOULDER', 'CASCADE'], location='VIRIDIAN CITY')
+    species_ids, badge_byte, map_id = ids_from_state(state)
+    assert species_ids == [Pokemon.CHARMANDER.value, Pokemon.MR_MIME.value]
+    assert badge_byte == 0b11
+    assert map_id == MapLocation.VIRIDIAN_CITY.value
+
+
+def test_evaluate_ids_matches_evaluate_row(tmp_path, write_log, log_row):
+    rows = [
+        log_row(0),
+        log_row(1, ["SQUIRTLE"]),
+        log_row(2, ["SQUIRTLE", "PIDGEY"], location="ROUTE 1"),
+        log_row(3, ["SQUIRTLE", "PIDGEY"], ["BOULDER", "CASCADE"], location="CERULEAN CITY"),
+    ]
+    row_evaluator = PokemonEvaluator(verbose=False)
+    ids_evaluator = PokemonEvaluator(verbose=False)
+    for row in rows:
+        row_evaluator.evaluate_row(row)
+        state = SimpleNamespace(pokemons=ast.literal_eval(row['pokemons']), badges=ast.literal_eval(row['badges']),
+                                location=row['location'])
+        ids_evaluator.evaluate_ids(*ids_from_state(state), step=int(row['step_number']))
+
+    assert ids_evaluator.total_score == row_evaluator.total_score > 0
+    assert ids_evaluator.pokemon_seen == row_evaluator.pokemon_seen
+    assert ids_evaluator.badges_earned == row_evaluator.badges_earned == {"BOULDER", "CASCADE"}
+    assert ids_evaluator.locations_visited == row_evaluator.locations_visited
+    assert [m["name"] for m in ids_evaluator.milestone_timeline] == [m["name"] for m in row_evaluator.milestone_timeline]
+
+    assert verify_incremental(write_log(str(tmp_path / "gameplay_data.csv"), rows))
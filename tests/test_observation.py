@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from pokemon_env.memory_reader import Move, PokemonRedReader
+from pokemon_env.observation import (OBSERVATION_DTYPE, OBSERVATION_SIZE, OBSERVATION_SLICES, build_observation,
+                                     observation_to_dict)
+
+
+def test_layout(pyboy):
+    assert OBSERVATION_SIZE == 140
+    slices = list(OBSERVATION_SLICES.values())
+    assert slices[0].start == 0 and slices[-1].stop == OBSERVATION_SIZE
+    assert all(a.stop == b.start for a, b in zip(slices, slices[1:]))
+    observation = build_observation(pyboy.memory)
+    assert observation.shape == (OBSERVATION_SIZE,) and observation.dtype == OBSERVATION_DTYPE
+
+
+def test_observation_matches_memory_reader(pyboy):
+    reader = PokemonRedReader(pyboy.memory)
+    fields = observation_to_dict(build_observation(pyboy.memory))
+    party = reader.read_party_pokemon()
+
+    assert fields["map_id"] == reader.read_map_id()
+    assert (fields["x"], fields["y"]) == reader.read_coordinates()
+    assert fields["money"] == reader.read_money() == 3000
+    assert fields["badges"] == [1, 0, 0, 0, 0, 0, 0, 0]
+    assert fields["party_size"] == len(party) == 3
+    assert fields["party_species"] == [p.species_id for p in party] + [0, 0, 0]
+    assert fields["party_level"][:3] == [p.level for p in party]
+    assert fields["party_hp"][:3] == [p.current_hp for p in party]
+    assert fields["party_max_hp"][:3] == [p.max_hp for p in party]
+    assert fields["party_moves"][:4] == [Move.SCRATCH.value, Move.GROWL.value, Move.EMBER.value, 0]
+    assert fields["party_pp"][:3] == party[0].move_pp[:3]
+    assert not any(fields["party_moves"][12:])
+    assert fields["item_count"] == reader.read_item_count() == 4
+    assert fields["item_quantities"][:4] == [quantity for _, quantity in reader.read_items()]
+    assert fields["text_box_open"] == 1
+    assert fields["battle_type"] == 0 and fields["enemy_hp"] == 0
+
+
+@pytest.mark.parametrize("tile", [0xEC, 0xED])
+def test_cursor_visible(pyboy, tile):
+    assert observation_to_dict(build_observation(pyboy.memory))["cursor_visible"] == 0
+    pyboy.memory[0xC3A0 + 14 * 20 + 1] = tile
+    assert observation_to_dict(build_observation(pyboy.memory))["cursor_visible"] == 1
+
+
+def test_battle_fields_and_reused_buffer(pyboy):
+    out = np.full(OBSERVATION_SIZE, -1, dtype=OBSERVATION_DTYPE)
+    memory = pyboy.memory
+    memory[0xD057] = 1  # Wild battle
+    memory[0xCFE5] = 0x24  # Pidgey
+    memory[0xCFE6:0xCFE8] = [0x01, 0x02]
+    memory[0xCFF3] = 5
+    memory[0xCFF4:0xCFF6] = [0x01, 0x10]
+    assert build_observation(memory, out) is out
+    fields = observation_to_dict(out)
+    assert (fields["battle_type"], fields["enemy_species"], fields["enemy_level"]) == (1, 0x24, 5)
+    assert (fields["enemy_hp"], fields["enemy_max_hp"]) == (0x102, 0x110)
+    # Slots and fields that were filled before are cleared
+    assert fields["party_species"][3:] == [0, 0, 0]
+    assert fields["item_ids"][4:] == [0] * 16
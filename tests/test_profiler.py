@@ -0,0 +1,42 @@
+import glob
+import os
+import threading
+import time
+
+from server.profiler import SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_samples_the_target_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,))
+    thread.start()
+    profiler = SamplingProfiler(thread.ident, interval=0.001)
+    profiler.start()
+    time.sleep(0.2)
+    profiler.stop()
+    stop.set()
+    thread.join()
+
+    assert not profiler.running
+    assert profiler.samples > 0
+    lines = profiler.collapsed().splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+    assert any("busy_loop (test_profiler.py:" in line for line in lines)
+    assert profiler.summary()["duration"] >= 0.2
+
+
+def test_profile_endpoint(client, server):
+    assert client.post("/profile", json={}).status_code == 400
+    assert client.post("/profile", json={"seconds": 1, "steps": 1}).status_code == 400
+    assert client.post("/profile", json={"seconds": 1, "interval_ms": 0}).status_code == 400
+
+    response = client.post("/profile", json={"seconds": 0.1, "interval_ms": 1, "include_idle": True})
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    saved, = glob.glob(os.path.join(server.current_session_dir, "profile_*.folded"))
+    assert open(saved).read() == response.text
@@ -0,0 +1,85 @@
+from pokemon_env.emulator import PRESS_FRAMES, RELEASE_FRAMES
+from pokemon_env.readiness import (
+    BUSY_STATUS_FLAGS,
+    JOY_IGNORE,
+    PROMPT_ARROW,
+    STABLE_FRAMES,
+    STATUS_FLAGS,
+    TILEMAP_START,
+    WALK_COUNTER,
+    InputReadyDetector,
+    input_blocked,
+    screen_signature,
+)
+
+
+def test_input_blocked():
+    memory = bytearray(0x10000)
+    assert not input_blocked(memory)
+    for address, value in ((WALK_COUNTER, 8), (JOY_IGNORE, 0xFF), (STATUS_FLAGS, 0x80)):
+        memory[address] = value
+        assert input_blocked(memory)
+        memory[address] = 0
+    memory[STATUS_FLAGS] = 0xFF & ~BUSY_STATUS_FLAGS
+    assert not input_blocked(memory)
+
+
+def test_screen_signature_ignores_the_prompt_arrow():
+    memory = bytearray(0x10000)
+    signature = screen_signature(memory)
+    memory[PROMPT_ARROW] = 0xEE
+    assert screen_signature(memory) == signature
+    memory[TILEMAP_START] = 1
+    assert screen_signature(memory) != signature
+
+
+def test_detector_waits_for_a_stable_unblocked_screen():
+    memory = bytearray(0x10000)
+    detector = InputReadyDetector(memory)
+    assert [detector.update() for _ in range(STABLE_FRAMES + 1)] == [False] * STABLE_FRAMES + [True]
+
+    memory[TILEMAP_START] = 1  # A letter printed
+    assert not detector.update()
+    memory[WALK_COUNTER] = 1  # Stable screen, but still walking
+    assert not any(detector.update() for _ in range(2 * STABLE_FRAMES))
+    memory[WALK_COUNTER] = 0
+    assert [detector.update() for _ in range(STABLE_FRAMES)][-1]
+
+    detector.reset()
+    assert not detector.update()
+
+
+def test_adaptive_press_ends_once_the_game_is_ready(emulator, schedule):
+    emulator.adaptive_press = True
+    start = emulator.frame_count
+    emulator.press_buttons(["a"])
+    # A still game is ready as soon as the screen has been stable long enough
+    assert emulator.frame_count - start == PRESS_FRAMES + STABLE_FRAMES + 1
+
+    start = emulator.frame_count
+    schedule(emulator, {1: {WALK_COUNTER: 8}, 40: {WALK_COUNTER: 0}})
+    emulator.press_buttons(["a"])
+    # The screen was already stable while walking, so frame 40 is the first stable unblocked one
+    assert emulator.frame_count - start == 40 + STABLE_FRAMES - 1
+
+
+def test_adaptive_press_is_capped_and_off_by_default(emulator, schedule):
+    schedule(emulator, {1: {JOY_IGNORE: 0xFF}})
+    emulator.adaptive_press = True
+    start = emulator.frame_count
+    emulator.press_buttons(["a"])
+    assert emulator.frame_count - start == PRESS_FRAMES + RELEASE_FRAMES
+
+    emulator.adaptive_press = False
+    emulator.pyboy.memory[JOY_IGNORE] = 0
+    start = emulator.frame_count
+    emulator.press_buttons(["a"])
+    assert emulator.frame_count - start == PRESS_FRAMES + RELEASE_FRAMES
+
+
+def test_adaptive_press_session_setting(client, server):
+    client.post("/stop")
+    assert client.post("/initialize", json={"adaptive_press": True}).status_code == 200
+    assert server.ENV.emulator.adaptive_press
+    response = client.post("/action", json={"action_type": "press_key", "keys": ["a"]})
+    assert response.status_code == 200
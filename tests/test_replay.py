@@ -0,0 +1,92 @@
+import csv
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.fixtures import synthetic_fixture
+from pokemon_env import replay
+from pokemon_env.emulator import Emulator
+from pokemon_env.environment import PokemonEnvironment
+from pokemon_env.replay import SessionReplayer, load_segment_settings, parse_action, split_segments
+
+ACTIONS = [
+    {"action_type": "press_key", "keys": ["up", "a"]},
+    {"action_type": "wait", "frames": 20, "early_exit": True, "steady_frames": 4},
+    {"action_type": "wait_until", "conditions": ["dialog_open"], "frames": 30},
+]
+
+
+@pytest.fixture
+def recorded_session(server, monkeypatch):
+    """A stub session of two segments, the second resumed with fast_options, and replays that use stub emulators."""
+    with TestClient(server.app) as client:
+        client.post("/initialize", json={})
+        for action in ACTIONS:
+            assert client.post("/action", json=action).status_code == 200
+        session_id = os.path.basename(server.current_session_dir)
+        client.post("/stop")
+        client.post("/initialize", json={"session_id": session_id, "fast_options": True})
+        assert client.post("/action", json=ACTIONS[0]).status_code == 200
+        session_dir = server.current_session_dir
+        client.post("/stop")
+
+    created = []
+
+    def stub_environment(rom_path, headless=True, **settings):
+        created.append(settings)
+        return PokemonEnvironment(rom_path, headless, emulator=Emulator(None, pyboy=synthetic_fixture()), **settings)
+    monkeypatch.setattr(replay, "PokemonEnvironment", stub_environment)
+    return session_dir, created
+
+
+def test_replay_reproduces_the_session(recorded_session):
+    session_dir, created = recorded_session
+    result = SessionReplayer(session_dir, rom_path=None).replay()
+    assert result["deterministic"], result["divergences"]
+    assert [segment["replayed"] for segment in result["segments"]] == [4, 2]
+    with open(os.path.join(session_dir, "gameplay_data.csv"), newline='') as f:
+        logged_score = float(list(csv.DictReader(f))[-1]["score"])
+    assert result["total_score"] == logged_score > 0
+    # Each segment runs with the settings recorded for it
+    assert [settings["fast_options"] for settings in created] == [False, True]
+
+
+def test_replay_reports_divergence(recorded_session):
+    session_dir, _ = recorded_session
+    log_path = os.path.join(session_dir, "gameplay_data.csv")
+    with open(log_path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    rows[2]["state_hash"] = "0" * 40
+    with open(log_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    result = SessionReplayer(session_dir, rom_path=None).replay()
+    assert not result["deterministic"]
+    divergence, = result["divergences"]
+    assert (divergence["segment"], divergence["step"]) == (0, 2)
+    assert result["segments"][0]["status"] == "diverged"
+    assert result["segments"][1]["status"] == "ok"
+
+
+def test_load_segment_settings(tmp_path):
+    assert load_segment_settings(str(tmp_path)) == {}
+    (tmp_path / "session_metadata.json").write_text(json.dumps({"segments": [
+        {"segment": 0, "settings": {"adaptive_press": True}},
+        {"segment": 1, "settings": {"fast_options": True}},
+    ]}))
+    assert load_segment_settings(str(tmp_path)) == {0: {"adaptive_press": True}, 1: {"fast_options": True}}
+
+
+def test_parse_action_and_split_segments():
+    action = parse_action({"action_type": "wait", "action_details": "{'frames': 30, 'early_exit': True}"})
+    assert (action.frames, action.early_exit, action.steady_frames) == (30, True, 16)
+    assert parse_action({"action_type": "press_key", "action_details": "{'keys': ['a']}"}).keys == ["a"]
+    with pytest.raises(ValueError):
+        parse_action({"action_type": "teleport", "action_details": "{}"})
+
+    rows = [{"action_type": t} for t in ["initialize", "press_key", "initialize", "wait"]]
+    assert [len(segment) for segment in split_segments(rows)] == [2, 2]
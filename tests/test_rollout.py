@@ -0,0 +1,44 @@
+from evaluator.evaluate import PokemonEvaluator
+from evaluator.milestones import location_scores_by_name
+from pokemon_env.action import PressKey, Wait
+from pokemon_env.rollout import rollout
+
+
+def test_rollout_branches_from_the_current_state(environment):
+    evaluator = PokemonEvaluator(verbose=False)
+    evaluator.evaluate_ids(*environment.get_milestone_ids(), step=0)
+    start_hash = environment.get_state_hash()
+    sequences = [
+        [PressKey(keys=["right"]), PressKey(keys=["right"])],
+        [PressKey(keys=["start"])],
+        [Wait(frames=10)],
+    ]
+    results = rollout(environment, sequences, evaluator=evaluator, workers=2)
+
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert [result["steps"] for result in results] == [2, 1, 1]
+    assert results[2]["frames"] == 10
+    assert results[2]["state_hash"] == start_hash
+    assert results[0]["state_hash"] != start_hash
+    # Only the branch that reached Route 1 scores, and only for the new location
+    assert [result["score_delta"] for result in results] == [0, location_scores_by_name["ROUTE_1"], 0]
+    assert results[1]["milestones"] == [{"category": "Location", "name": "ROUTE_1",
+                                         "score": location_scores_by_name["ROUTE_1"], "step": 1}]
+    # Neither the environment nor the evaluator moved
+    assert environment.get_state_hash() == start_hash and environment.steps_taken == 0
+    assert "ROUTE_1" not in evaluator.locations_visited
+
+
+def test_rollout_endpoint(client):
+    response = client.post("/rollout", json={"sequences": [
+        [{"action_type": "press_key", "keys": ["a"]}],
+        [{"action_type": "wait", "frames": 5}, {"action_type": "wait", "frames": 5}],
+    ], "include_state": True})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["steps"] for result in results] == [1, 2]
+    assert len(results[0]["observation"]) == 140
+    assert "screenshot" not in results[0]["state"] and results[0]["state"]["location"]
+
+    assert client.post("/rollout", json={"sequences": []}).status_code == 400
+    assert client.post("/rollout", json={"sequences": [[{"action_type": "press_key", "keys": ["z"]}]]}).status_code == 400
@@ -0,0 +1,31 @@
+import csv
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+
+def session_log(server):
+    with open(os.path.join(server.current_session_dir, "gameplay_data.csv"), newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_action_timings_on_request(client):
+    response = client.post("/action", json={"action_type": "wait", "frames": 30, "include_timings": True}).json()
+    assert response["frames_emulated"] == 30
+    assert {"emulation", "memory_decode", "screenshot_capture", "collision_map", "screenshot_encode"} <= set(response["timings"])
+    assert all(seconds >= 0 for seconds in response["timings"].values())
+
+    response = client.post("/action", json={"action_type": "wait", "frames": 30}).json()
+    assert response["timings"] is None and response["frames_emulated"] is None
+
+
+def test_timings_logged_with_log_timings(server, monkeypatch):
+    monkeypatch.setattr(server, "LOG_TIMINGS", True)
+    with TestClient(server.app) as client:
+        client.post("/initialize", json={})
+        client.post("/action", json={"action_type": "press_key", "keys": ["a"]})
+    initialize, action = session_log(server)
+    assert initialize["frames_emulated"] == "0"
+    assert action["frames_emulated"] == "130"
+    assert "emulation" in json.loads(action["server_timings"])
@@ -0,0 +1,60 @@
+from fastapi.testclient import TestClient
+
+from pokemon_env.action import PressKey, Wait, WaitUntil
+from pokemon_env.speculation import Speculator, action_key
+
+
+def think(speculator):
+    """Wait like an agent deciding its next action, long enough for every branch to start."""
+    if speculator._spawner is not None:
+        speculator._spawner.join()
+
+
+def test_speculated_step_matches_a_real_step(environment):
+    with environment.fork() as reference:
+        expected = reference.step(PressKey(keys=["right"]))
+        expected_hash = reference.get_state_hash()
+
+    speculator = Speculator(environment, waits=[30])
+    speculator.start()
+    think(speculator)
+    outcome = speculator.take(PressKey(keys=["right"]))
+    assert outcome is not None and speculator.hits == 1
+    state = environment.commit_speculation(PressKey(keys=["right"]), outcome)
+
+    assert state.coordinates == expected.coordinates == (13, 10)
+    assert environment.get_state_hash() == expected_hash
+    assert environment.steps_taken == 1
+    assert environment.emulator.frame_count == outcome["frames"] + 3600  # After the 3600 frames of initialize()
+
+
+def test_unspeculated_or_stale_actions_miss(environment):
+    speculator = Speculator(environment)
+    speculator.start()
+    assert speculator.take(PressKey(keys=["a", "b"])) is None
+
+    speculator.start()
+    think(speculator)
+    environment.step(PressKey(keys=["up"]))  # The branches started from an older state
+    assert speculator.take(PressKey(keys=["up"])) is None
+    assert (speculator.hits, speculator.misses) == (0, 2)
+
+
+def test_action_key():
+    assert action_key(PressKey(keys=["a"])) == action_key(PressKey(keys=["a"]))
+    assert action_key(Wait(frames=30)) != action_key(Wait(frames=30, early_exit=True))
+    assert action_key(WaitUntil(conditions=["map_changed"], max_frames=60)) is None
+
+
+def test_speculative_server(server, monkeypatch):
+    monkeypatch.setattr(server, "SPECULATIVE", True)
+    hits = server.SPECULATION_TOTAL._values.get(("hit",), 0)
+    with TestClient(server.app) as client:
+        client.post("/initialize", json={})
+        for _ in range(2):
+            think(server.SPECULATOR)
+            response = client.post("/action", json={"action_type": "press_key", "keys": ["a"]})
+            assert response.status_code == 200
+        assert response.json()["step_number"] == 2
+    assert server.SPECULATION_TOTAL._values.get(("hit",), 0) == hits + 2
+    server.SPECULATOR.cancel()
@@ -0,0 +1,53 @@
+from pokemon_env.emulator import Emulator
+
+BADGES = 0xD356
+FIRST_ITEM_QUANTITY = 0xD31F
+FIRST_POKEMON_LEVEL = 0xD18C
+DIALOG_TILE = 0xC3A0 + 14 * 20 + 2
+
+
+def uncached(emulator):
+    """The state decoded by an emulator with an empty section cache."""
+    return Emulator(None, pyboy=emulator.pyboy).get_state_from_memory()
+
+
+def test_unchanged_sections_are_reused(emulator):
+    first = emulator.get_state_from_memory()
+    second = emulator.get_state_from_memory()
+    assert second == first and second is not first
+    for section in ("inventory", "pokemons"):
+        assert second[section] is first[section]
+    assert second["player"]["badges"] is first["player"]["badges"]
+
+
+def test_changed_sections_are_decoded_again(emulator):
+    memory = emulator.pyboy.memory
+    first = emulator.get_state_from_memory()
+    memory[BADGES] |= 0x02
+    second = emulator.get_state_from_memory()
+    assert len(second["player"]["badges"]) == len(first["player"]["badges"]) + 1
+    assert second["pokemons"] is first["pokemons"]
+
+    memory[FIRST_POKEMON_LEVEL] += 1
+    third = emulator.get_state_from_memory()
+    assert third["pokemons"][0]["level"] == first["pokemons"][0]["level"] + 1
+    assert third["player"]["badges"] is second["player"]["badges"]
+
+
+def test_cached_state_matches_an_uncached_decode(emulator):
+    memory = emulator.pyboy.memory
+    changes = [
+        (BADGES, 0x03),
+        (FIRST_ITEM_QUANTITY, 9),
+        (FIRST_POKEMON_LEVEL, 12),
+        (DIALOG_TILE, 0x80),
+        (0xD158, 0x81),  # First letter of the player's name
+        (0xD362, 3),  # Coordinates are never cached
+    ]
+    assert emulator.get_state_from_memory() == uncached(emulator)
+    for address, value in changes:
+        original = memory[address]
+        memory[address] = value
+        assert emulator.get_state_from_memory() == uncached(emulator)
+        memory[address] = original
+        assert emulator.get_state_from_memory() == uncached(emulator)
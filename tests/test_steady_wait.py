@@ -0,0 +1,61 @@
+import pytest
+
+from pokemon_env.action import Wait
+from pokemon_env.conditions import IN_BATTLE, MAP_ID, TEXT_STABLE_FRAMES
+from pokemon_env.readiness import BORDER_TOP_LEFT, OAM_START, TEXT_BOX_CORNER, TILEMAP_END
+
+
+def moving_sprite(frames):
+    """Writes that move a sprite on every frame up to the given one."""
+    return {frame: {OAM_START: frame % 256} for frame in range(1, frames + 1)}
+
+
+def test_wait_ends_once_nothing_moves(emulator, schedule):
+    assert emulator.wait_for_steady(100, 16) == ("steady", 17)
+
+    schedule(emulator, moving_sprite(30))
+    start = emulator.frame_count
+    assert emulator.wait_for_steady(100, 8) == ("steady", 38)
+    assert emulator.frame_count - start == 38
+
+
+def test_wait_runs_out_while_the_game_keeps_moving(emulator, schedule):
+    schedule(emulator, moving_sprite(200))
+    assert emulator.wait_for_steady(50, 16) == (None, 50)
+
+
+@pytest.mark.parametrize("address,value,event", [(MAP_ID, 0x0C, "map_changed"), (IN_BATTLE, 1, "battle_started")])
+def test_significant_changes_end_the_wait(emulator, schedule, address, value, event):
+    schedule(emulator, {**moving_sprite(100), 12: {address: value, OAM_START: 12}})
+    assert emulator.wait_for_steady(100, 16) == (event, 12)
+
+
+def test_wait_ends_when_a_text_box_has_printed(emulator, schedule):
+    memory = emulator.pyboy.memory
+    memory[TEXT_BOX_CORNER:TILEMAP_END] = bytes(TILEMAP_END - TEXT_BOX_CORNER)
+    schedule(emulator, {10: {TEXT_BOX_CORNER: BORDER_TOP_LEFT}, 14: {TEXT_BOX_CORNER + 41: 0x80}})
+    assert emulator.wait_for_steady(100, 16) == ("dialog_opened", 14 + TEXT_STABLE_FRAMES)
+
+
+def test_early_exit_wait_action(environment):
+    environment.step(Wait(frames=100, early_exit=True, steady_frames=4))
+    assert environment.last_step_info == {"condition": "steady", "frames": 5}
+    assert str(Wait(frames=100, early_exit=True, steady_frames=4)) == "Wait: at most 100 frames, until steady for 4"
+    assert Wait(frames=100).to_dict() == {"action_type": "wait", "frames": 100}
+
+    start = environment.emulator.frame_count
+    environment.step(Wait(frames=100))
+    assert environment.emulator.frame_count - start == 100
+    assert "condition" not in environment.last_step_info
+
+    with pytest.raises(ValueError):
+        Wait(frames=10, early_exit=True, steady_frames=0)
+
+
+def test_early_exit_wait_endpoint(client):
+    response = client.post("/action", json={"action_type": "wait", "frames": 100, "early_exit": True})
+    assert response.status_code == 200
+    assert response.json()["action_result"] == {"condition": "steady", "frames": 17}
+
+    response = client.post("/action", json={"action_type": "wait", "frames": 100, "early_exit": True, "steady_frames": 0})
+    assert response.status_code == 400
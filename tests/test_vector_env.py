@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import FixturePyBoy, synthetic_fixture
+from evaluator.milestones import location_scores_by_name
+from pokemon_env.emulator import Emulator
+from pokemon_env.memory_reader import MapLocation
+from pokemon_env.observation import OBSERVATION_SIZE
+from pokemon_env.vector_env import VectorPokemonEnv
+
+
+class WalkingPyBoy(FixturePyBoy):
+    """A fixture that walks onto Route 1 on its first frame and counts the frames it renders in the screen."""
+
+    def tick(self, count=1, render=True):
+        self.memory[0xD35E] = MapLocation.ROUTE_1.value
+        if render:
+            self.screen.ndarray[0, 0, 0] = (self.screen.ndarray[0, 0, 0] + 1) % 256
+        return True
+
+
+def walking_emulator():
+    pyboy = synthetic_fixture()
+    pyboy.__class__ = WalkingPyBoy
+    return Emulator(None, pyboy=pyboy)
+
+
+def missing_rom():
+    raise FileNotFoundError("Pokemon_Red.gb")
+
+
+def test_observations_and_milestone_rewards():
+    with VectorPokemonEnv(2, emulator_factory=walking_emulator, max_steps=3) as env:
+        observations, infos = env.reset()
+        assert observations["screen"].shape == (2, 144, 160, 3)
+        assert observations["tiles"].shape == (2, 18, 20)
+        assert observations["ram"].shape == (2, OBSERVATION_SIZE)
+        assert infos == [{}, {}]
+
+        _, rewards, terminated, truncated, infos = env.step([0, 1])
+        assert np.allclose(rewards, location_scores_by_name["ROUTE_1"])
+        assert infos[0]["milestones"] == ["ROUTE_1"]
+        assert not terminated.any() and not truncated.any()
+
+        _, rewards, _, _, _ = env.step([0, 1])
+        assert not rewards.any()  # Each milestone is rewarded once per episode
+        _, _, _, truncated, infos = env.step([0, 1])
+        assert truncated.all()
+        assert infos[0]["episode"]["length"] == 3
+        assert infos[0]["episode"]["return"] == pytest.approx(location_scores_by_name["ROUTE_1"])
+
+
+@pytest.mark.parametrize("press_frames", [8, 24])
+def test_every_step_renders_the_screen(press_frames):
+    with VectorPokemonEnv(1, emulator_factory=walking_emulator, action_frames=24, press_frames=press_frames) as env:
+        first = env.reset()[0]["screen"][0, 0, 0, 0]
+        after = env.step([0])[0]["screen"][0, 0, 0, 0]
+        assert after == (first + 1) % 256
+
+
+def test_async_send_and_recv():
+    with VectorPokemonEnv(3, emulator_factory=walking_emulator) as env:
+        env.reset()
+        env.send([0, 2], env_ids=[0, 2])
+        with pytest.raises(RuntimeError):
+            env.send([1], env_ids=[2])
+        observations, rewards, _, _, _, env_ids = env.recv()
+        assert list(env_ids) == [0, 2]
+        assert observations["ram"].shape == (2, OBSERVATION_SIZE)
+        assert rewards.shape == (2,)
+
+
+def test_worker_errors_are_raised_in_the_parent():
+    env = VectorPokemonEnv(2, emulator_factory=missing_rom)
+    try:
+        with pytest.raises(FileNotFoundError, match="Pokemon_Red.gb"):
+            env.reset()
+    finally:
+        env.close()
@@ -0,0 +1,112 @@
+import pytest
+
+from pokemon_env.action import PressKey, Wait
+from pokemon_env.watch import WATCH_RANGES, MemoryWatcher
+
+BADGES = WATCH_RANGES["badges"][0]
+
+
+def test_check_reports_changed_ranges_once():
+    memory = bytearray(0x10000)
+    seen = []
+    watcher = MemoryWatcher(memory)
+    watcher.watch("badges", callback=seen.append)
+    watcher.watch("hp", 0xD16C, 0xD16E)
+    assert watcher.watches() == {"badges": WATCH_RANGES["badges"], "hp": (0xD16C, 0xD16E)}
+    assert watcher.check() == []
+
+    memory[BADGES] = 0x03
+    memory[0xD16D] = 20
+    changes = watcher.check(frame=42)
+    assert changes == [
+        {"watch": "badges", "start": BADGES, "frame": 42, "old": [0], "new": [3], "addresses": [BADGES]},
+        {"watch": "hp", "start": 0xD16C, "frame": 42, "old": [0, 0], "new": [0, 20], "addresses": [0xD16D]},
+    ]
+    assert seen == changes[:1]
+    assert watcher.check() == []
+
+
+def test_reset_and_reported():
+    memory = bytearray(0x10000)
+    watcher = MemoryWatcher(memory)
+    watcher.watch("map_id", report=False)
+    watcher.watch("flag", 0xD747)
+    memory[0xD747] = 1
+    watcher.reset()  # e.g. a state was loaded
+    assert watcher.check() == []
+
+    memory[0xD747] = 2
+    memory[WATCH_RANGES["map_id"][0]] = 12
+    changes = watcher.check()
+    assert [change["watch"] for change in watcher.reported(changes)] == ["flag"]
+    watcher.unwatch("flag")
+    assert watcher.reported(changes) == []
+
+
+def test_watch_errors():
+    watcher = MemoryWatcher(bytearray(0x10000))
+    watcher.watch("badges")
+    with pytest.raises(ValueError):
+        watcher.watch("badges")
+    with pytest.raises(ValueError):
+        watcher.watch("somewhere")
+    with pytest.raises(ValueError):
+        watcher.watch("backwards", 0xD000, 0xC000)
+    with pytest.raises(KeyError):
+        watcher.unwatch("somewhere")
+
+
+def test_environment_reports_memory_changes(environment, tmp_path):
+    watcher = environment.emulator.watcher
+    watcher.watch("x", 0xD362)
+    environment.step(PressKey(keys=["right"]))
+    [change] = environment.last_step_info["memory_changes"]
+    assert (change["watch"], change["old"], change["new"]) == ("x", [12], [13])
+    assert change["frame"] == environment.emulator.frame_count
+
+    environment.step(Wait(frames=5))
+    assert "memory_changes" not in environment.last_step_info
+
+    # Loading a state is not a change
+    state = str(tmp_path / "start.state")
+    environment.save_state(state)
+    environment.step(PressKey(keys=["right"]))
+    environment.load_state(state)
+    environment.step(Wait(frames=5))
+    assert "memory_changes" not in environment.last_step_info
+
+
+def test_watch_endpoints(client):
+    assert client.post("/watch", json={"name": "badges"}).json() == {"name": "badges", "start": BADGES, "end": BADGES + 1}
+    assert client.post("/watch", json={"name": "hp", "start": 0xD16C, "end": 0xD16E}).status_code == 200
+    watches = client.get("/watches").json()
+    assert {"badges", "hp"} <= set(watches["watches"])
+    assert set(watches["known_ranges"]) == set(WATCH_RANGES)
+
+    for request in ({"name": "badges"}, {"name": "somewhere"}, {"name": "evaluator.badges"}):
+        assert client.post("/watch", json=request).status_code == 400
+    assert client.delete("/watch/evaluator.badges").status_code == 400
+    assert client.delete("/watch/hp").json() == {"name": "hp", "removed": True}
+    assert client.delete("/watch/hp").status_code == 404
+
+
+def test_memory_changes_in_action_result(client, server):
+    client.post("/watch", json={"name": "badges"})
+    server.ENV.emulator.pyboy.memory[BADGES] |= 0x02
+    result = client.post("/action", json={"action_type": "wait", "frames": 5}).json()["action_result"]
+    assert [change["watch"] for change in result["memory_changes"]] == ["badges"]
+
+
+def test_evaluator_scores_from_its_watches(client, server):
+    milestones = len(server.EVALUATOR.milestone_timeline)
+    client.post("/action", json={"action_type": "wait", "frames": 5})
+    assert len(server.EVALUATOR.milestone_timeline) == milestones
+    # Steps without milestone changes still count towards the progress stats
+    assert server.EVALUATOR.get_progress_stats()["steps"] == 1
+
+    server.ENV.emulator.pyboy.memory[BADGES] |= 0x02  # Cascade badge
+    result = client.post("/action", json={"action_type": "wait", "frames": 5}).json()["action_result"]
+    assert result is None or "memory_changes" not in result  # The evaluator's watches are not reported
+    [milestone] = server.EVALUATOR.milestone_timeline[milestones:]
+    assert (milestone["category"], milestone["step"]) == ("Badge", 2)
+    assert server.EVALUATOR.get_progress_stats()["steps"] == 2
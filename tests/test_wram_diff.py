@@ -0,0 +1,131 @@
+import csv
+import hashlib
+import os
+import random
+
+import pytest
+
+from pokemon_env.action import PressKey
+from pokemon_env.wram_diff import (
+    KEYFRAME,
+    MAGIC,
+    HEADER,
+    WRAM_END,
+    WRAM_START,
+    WramDiffer,
+    WramDiffLog,
+    apply_wram_diff,
+    diff_wram,
+    encode_wram_diff,
+    read_wram_log,
+)
+
+WRAM_SIZE = WRAM_END - WRAM_START
+
+
+def test_diff_merges_nearby_changes():
+    old = bytes(WRAM_SIZE)
+    new = bytearray(old)
+    new[0x10] = 1
+    new[0x15] = 2  # 4 unchanged bytes apart: merged
+    new[0x30] = 3
+    new[0x36] = 4  # 5 apart: separate
+    assert diff_wram(old, bytes(new)) == [
+        (0xC010, bytes([1, 0, 0, 0, 0, 2])),
+        (0xC030, bytes([3])),
+        (0xC036, bytes([4])),
+    ]
+    assert diff_wram(old, bytes(new), gap=0) == [(0xC010, b"\x01"), (0xC015, b"\x02"), (0xC030, b"\x03"), (0xC036, b"\x04")]
+    assert diff_wram(old, old) == []
+    assert encode_wram_diff([(0xC010, b"\x01\xff")]) == [[0xC010, "01ff"]]
+
+
+def test_apply_round_trip():
+    rng = random.Random(0)
+    old = bytes(rng.randrange(256) for _ in range(WRAM_SIZE))
+    new = bytearray(old)
+    for _ in range(200):
+        new[rng.randrange(WRAM_SIZE)] = rng.randrange(256)
+    new[0] ^= 0xFF
+    new[-1] ^= 0xFF  # Both ends of WRAM
+    wram = bytearray(old)
+    apply_wram_diff(wram, diff_wram(old, bytes(new)))
+    assert wram == new
+
+
+def test_differ_diffs_against_the_previous_call():
+    memory = bytearray(0x10000)
+    differ = WramDiffer(memory)
+    memory[0xD362] = 5
+    assert differ.diff() == [(0xD362, b"\x05")]
+    assert differ.diff() == []
+    memory[0xD362] = 6
+    differ.reset()
+    assert differ.diff() == []
+
+
+def test_log_read_back_and_rotation(tmp_path):
+    path = str(tmp_path / "wram_diff.bin")
+    rng = random.Random(1)
+    wram = bytearray(rng.randrange(256) for _ in range(WRAM_SIZE))
+    log = WramDiffLog(path, max_bytes=40_000)
+    log.write_keyframe(0, 0, bytes(wram))
+    expected = {0: bytes(wram)}
+    for step in range(1, 120):
+        for _ in range(50):
+            wram[rng.randrange(WRAM_SIZE)] = rng.randrange(256)
+        log.write_diff(step, step * 130, diff_wram(expected[step - 1], bytes(wram)), wram=bytes(wram))
+        expected[step] = bytes(wram)
+    log.close()
+
+    # The log moved to .1 whenever it reached half of max_bytes, and every file starts with a keyframe
+    assert os.path.getsize(path) + os.path.getsize(path + ".1") <= 40_000 + 8 * 1024
+    for name in (path, path + ".1"):
+        with open(name, "rb") as f:
+            assert f.read(len(MAGIC)) == MAGIC
+            assert HEADER.unpack(f.read(HEADER.size))[0] == KEYFRAME
+
+    older, newer = list(read_wram_log(path + ".1")), list(read_wram_log(path))
+    assert older[0][0] > 0  # The oldest steps were dropped
+    assert newer[0][0] == older[-1][0] + 1 and newer[-1][0] == 119
+    for step, frame, rebuilt in older + newer:
+        assert rebuilt == expected[step]
+        assert frame == step * 130
+
+
+def test_log_appends_and_rejects_other_files(tmp_path):
+    path = str(tmp_path / "wram_diff.bin")
+    log = WramDiffLog(path)
+    log.write_keyframe(0, 0, bytes(WRAM_SIZE))
+    log.close()
+    log = WramDiffLog(path)  # e.g. a resumed session
+    log.write_diff(1, 130, [(0xC000, b"\x07")])
+    log.close()
+    assert [(step, wram[0]) for step, _, wram in read_wram_log(path)] == [(0, 0), (1, 7)]
+
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a log")
+    with pytest.raises(ValueError):
+        list(read_wram_log(str(other)))
+
+
+def test_environment_reports_wram_diff(environment):
+    environment.wram_differ = WramDiffer(environment.emulator.pyboy.memory)
+    environment.step(PressKey(keys=["right"]))
+    assert environment.last_step_info["wram_diff"] == [[0xD362, "0d"]]
+
+
+def test_server_logs_wram_diffs(client, server):
+    client.post("/stop")
+    client.post("/initialize", json={"wram_diff": True})
+    memory = server.ENV.emulator.pyboy.memory
+    for x in (20, 21):
+        memory[0xD362] = x
+        result = client.post("/action", json={"action_type": "wait", "frames": 5}).json()["action_result"]
+        assert result["wram_diff"] == [[0xD362, f"{x:02x}"]]
+    client.post("/stop")
+
+    with open(os.path.join(server.current_session_dir, "gameplay_data.csv"), newline='') as f:
+        hashes = [row["state_hash"] for row in csv.DictReader(f)]
+    rebuilt = read_wram_log(os.path.join(server.current_session_dir, server.WRAM_DIFF_LOG_FILENAME))
+    assert [hashlib.sha1(wram).hexdigest() for _, _, wram in rebuilt] == hashes